@@ -35,10 +35,11 @@ def analyze_linkedin_pdf_text(profile_text: str) -> Dict[str, Any]:
     try:
         # Use the Ollama client to get structured data
         structured_data = ollama_client.invoke_ollama_json( 
-            model_name="llama3", # Or your preferred model 
+            model_name=ollama_client.get_model_for_task(ollama_client.TASK_LINKEDIN_EXTRACTION), 
             system_prompt=prompts.system_prompt_linkedin_pdf, 
             user_content=profile_text, 
-            temperature=0.2 # Lower temperature for extraction 
+            temperature=0.2, # Lower temperature for extraction 
+            schema=prompts.linkedin_pdf_analysis_schema
         )
         logger.info("Successfully extracted structured data from LinkedIn PDF text.") 
 
@@ -8,10 +8,13 @@ import traceback
 from typing import Dict, Any, Set
 
 from database import sessionLocal
+from config import settings
 import models
+import rankings
 from . import utils, prompts
 from . import jd_matching_service
 from . import feedback_service
+from .match_batcher import match_batcher
 from .llm_clients import ollama_client
 
 from .External_profile_services import github_service, leetcode_service, linkedin_service
@@ -29,10 +32,11 @@ def _analyze_cv_text(cv_content: str) -> dict:
     
     try:
         parsed_json = ollama_client.invoke_ollama_json(
-            model_name="llama3",
+            model_name=ollama_client.get_model_for_task(ollama_client.TASK_CV_EXTRACTION),
             system_prompt=prompts.system_prompt_candidate,
             user_content=cv_content,
-            temperature=0.3
+            temperature=0.3,
+            schema=prompts.cv_analysis_schema
         )
 
         # Validation logic
@@ -142,6 +146,7 @@ def run_automatic_analysis(application_id: int, cv_path: str):
     The main background task function.
     """
     db: Session = sessionLocal()
+    job_id = None
     try:
         logger.info(f"Background analysis started for application_id: {application_id}")
         
@@ -153,6 +158,7 @@ def run_automatic_analysis(application_id: int, cv_path: str):
             logger.error(f"No analysis record found for application_id: {application_id}")
             return
 
+        job_id = analysis.job_id
         analysis.analysis_status = "In Progress"
         db.commit()
 
@@ -189,6 +195,10 @@ def run_automatic_analysis(application_id: int, cv_path: str):
     finally:
         db.close()
 
+    if job_id is not None:
+        # Queue the materialized rank refresh for the job (no-op unless enabled)
+        rankings.rank_refresher.mark_dirty(job_id)
+
 
 def analyze_full_candidate_profile(candid: int, cv_file_path: str, db: Session, application_id: int, job_id: int) -> models.Analysis:
     """
@@ -208,10 +218,26 @@ def analyze_full_candidate_profile(candid: int, cv_file_path: str, db: Session,
 
     try:
         cv_content = utils.read_cv(cv_file_path)
-        cv_analysis_data = _analyze_cv_text(cv_content)
     except Exception as e:
         raise RuntimeError(f"CV analysis failed: {e}") from e
 
+    cv_analysis_data = None
+    jd_match_result = {}
+    if settings.ANALYSIS_PIPELINE_MODE == "fused":
+        # Single generation for CV extraction + JD match; falls back to separate calls on failure.
+        try:
+            jd_analysis_data = jd_matching_service.get_job_analysis(job.description)
+            cv_analysis_data, jd_match_result = jd_matching_service.analyze_cv_and_match(cv_content, jd_analysis_data)
+        except Exception as e:
+            logger.warning(f"Fused analysis failed for app_id {application_id}, falling back to separate calls: {e}")
+            cv_analysis_data, jd_match_result = None, {}
+
+    if cv_analysis_data is None:
+        try:
+            cv_analysis_data = _analyze_cv_text(cv_content)
+        except Exception as e:
+            raise RuntimeError(f"CV analysis failed: {e}") from e
+
     readiness_score_data = _calculate_career_readiness(cv_analysis_data)
     final_careerscore = readiness_score_data.get('total_score', 0)
 
@@ -263,13 +289,15 @@ def analyze_full_candidate_profile(candid: int, cv_file_path: str, db: Session,
                 logger.error(f"Error processing LinkedIn PDF analysis for {linkedin_pdf_filename}: {e}", exc_info=True)
 
     jd_match_score = 0
-    jd_match_result = {} 
     try:
-        jd_analysis_data = jd_matching_service.analyze_job_description(job.description)
-        jd_match_result = jd_matching_service.get_match_analysis(
-            cv_analysis=cv_analysis_data,
-            jd_analysis=jd_analysis_data
-        )
+        if not jd_match_result:
+            jd_analysis_data = jd_matching_service.get_job_analysis(job.description)
+            jd_match_result = match_batcher.submit(
+                job_id=job_id,
+                application_id=application_id,
+                cv_analysis=cv_analysis_data,
+                jd_analysis=jd_analysis_data
+            )
         jd_match_score = jd_match_result.get("match_score", 0)
         cv_analysis_data["jd_match"] = jd_match_result # Embed JD match results into the main CV analysis JSON
     except Exception as e:
@@ -315,6 +343,8 @@ def analyze_full_candidate_profile(candid: int, cv_file_path: str, db: Session,
         new_analysis_report = models.Analysis(**analysis_data_to_save)
         db.add(new_analysis_report)
         analysis_report_to_return = new_analysis_report
+    # Ranking score under the job's scoring weights (kept in sync in bulk when they change)
+    analysis_report_to_return.weighted_score = rankings.compute_weighted_score(analysis_report_to_return, rankings.job_weights(job))
 
     # Generate and save the candidate-facing professional feedback
     logger.info(f"Generating professional feedback text for report ID: {analysis_report_to_return.reportid}")
@@ -1,7 +1,12 @@
 # ai_services/jd_matching_service.py
 import json
 import logging
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
 
+from config import settings
 from .llm_clients import ollama_client
 from . import prompts
 
@@ -19,10 +24,11 @@ def analyze_job_description(job_description: str) -> dict:
     
     try:
         parsed_json = ollama_client.invoke_ollama_json(
-            model_name="llama3",
+            model_name=ollama_client.get_model_for_task(ollama_client.TASK_JD_EXTRACTION),
             system_prompt=prompts.system_prompt_job,
             user_content=job_description,
-            temperature=0.3
+            temperature=0.3,
+            schema=prompts.jd_analysis_schema
         )
 
         required_keys = ["degree", "experience_years", "technical_skill", "soft_skill"]
@@ -38,6 +44,53 @@ def analyze_job_description(job_description: str) -> dict:
         raise RuntimeError(f"Ollama JD analysis failed: {e}") from e
 
 
+# Job descriptions rarely change, but every application to a job needs their analysis.
+# Cache the extraction by description text so it runs once per job (per process).
+_jd_analysis_cache: "OrderedDict[str, dict]" = OrderedDict()
+_jd_analysis_cache_lock = threading.Lock()
+
+
+def get_job_analysis(job_description: str) -> dict:
+    """
+    Returns the structured analysis of a job description, reusing a cached
+    result when the same description was analyzed before.
+    """
+    cache_key = hashlib.sha256(job_description.encode("utf-8")).hexdigest()
+    with _jd_analysis_cache_lock:
+        cached = _jd_analysis_cache.get(cache_key)
+        if cached is not None:
+            _jd_analysis_cache.move_to_end(cache_key)
+            logger.info("Using cached JD analysis.")
+            return cached
+
+    jd_analysis = analyze_job_description(job_description)
+
+    with _jd_analysis_cache_lock:
+        _jd_analysis_cache[cache_key] = jd_analysis
+        while len(_jd_analysis_cache) > settings.JD_ANALYSIS_CACHE_SIZE:
+            _jd_analysis_cache.popitem(last=False)
+    return jd_analysis
+
+
+def build_match_content(cv_analysis: dict, jd_analysis: dict) -> str:
+    """
+    Formats the structured CV and JD data into the user message sent to the matcher.
+    The job block comes first and is serialized deterministically, so every applicant
+    to the same job shares it (after the system prompt) as a reusable prompt prefix.
+    """
+    return f"""
+        Here are the key requirements for the job:
+        ---JOB START---
+        {json.dumps(jd_analysis, indent=2, sort_keys=True)}
+        ---JOB END---
+
+        Here is the candidate's profile based on their CV:
+        ---CANDIDATE START---
+        {json.dumps(cv_analysis, indent=2)}
+        ---CANDIDATE END---
+        """
+
+
 def get_match_analysis(cv_analysis: dict, jd_analysis: dict) -> dict:
     """
     Performs a detailed match analysis between structured CV and JD data
@@ -47,27 +100,18 @@ def get_match_analysis(cv_analysis: dict, jd_analysis: dict) -> dict:
 
     try:
         # Combine the CV and JD into a single prompt for the LLM
-        combined_content = f"""
-        Here is the candidate's profile based on their CV:
-        ---CANDIDATE START---
-        {json.dumps(cv_analysis, indent=2)}
-        ---CANDIDATE END---
-
-        Here are the key requirements for the job:
-        ---JOB START---
-        {json.dumps(jd_analysis, indent=2)}
-        ---JOB END---
-        """
+        combined_content = build_match_content(cv_analysis, jd_analysis)
     except Exception as e:
         logger.error(f"Error formatting combined content for match analysis: {e}", exc_info=True)
         raise ValueError("Could not format CV/JD data for Ollama input.") from e
 
     try:
         parsed_json = ollama_client.invoke_ollama_json(
-            model_name="llama3",
+            model_name=ollama_client.get_model_for_task(ollama_client.TASK_MATCHING),
             system_prompt=prompts.system_prompt_matching,
             user_content=combined_content,
-            temperature=0.5
+            temperature=0.5,
+            schema=prompts.matching_analysis_schema
         )
 
         required_keys = ["match_score", "summary", "pros", "cons"]
@@ -85,4 +129,176 @@ def get_match_analysis(cv_analysis: dict, jd_analysis: dict) -> dict:
 
     except (ValueError, RuntimeError) as e:
         logger.error(f"Failed to get or parse Match analysis from Ollama: {e}", exc_info=True)
-        raise RuntimeError(f"Ollama Match analysis failed: {e}") from e
\ No newline at end of file
+        raise RuntimeError(f"Ollama Match analysis failed: {e}") from e
+
+
+def compact_candidate_profile(cv_analysis: dict) -> dict:
+    """
+    Reduces a CV analysis to the fields the matcher scores on, so several
+    candidates fit into one batched prompt. Name and email are not needed for matching.
+    """
+    return {
+        "degree": cv_analysis.get("degree", []),
+        "experience": [
+            {"title": exp.get("title", ""), "duration_months": exp.get("duration_months", 0)}
+            for exp in cv_analysis.get("experience", []) if isinstance(exp, dict)
+        ],
+        "technical_skill": cv_analysis.get("technical_skill", []),
+        "soft_skill": cv_analysis.get("soft_skill", []),
+        "certifications": cv_analysis.get("certifications", []),
+    }
+
+
+def build_batch_match_content(candidates: Dict[int, dict], jd_analysis: dict) -> str:
+    """
+    Formats the JD analysis and several compact candidate profiles (keyed by
+    application_id) into the user message for a batched match call.
+    """
+    profiles = [
+        {"application_id": application_id, **compact_candidate_profile(cv_analysis)}
+        for application_id, cv_analysis in sorted(candidates.items())
+    ]
+    return f"""
+        Here are the key requirements for the job:
+        ---JOB START---
+        {json.dumps(jd_analysis, indent=2, sort_keys=True)}
+        ---JOB END---
+
+        Here are the candidates' profiles based on their CVs:
+        ---CANDIDATES START---
+        {json.dumps(profiles, indent=1)}
+        ---CANDIDATES END---
+        """
+
+
+def _validate_batch_results(parsed_json: dict, candidates: Dict[int, dict]) -> Dict[int, dict]:
+    """
+    Keeps only well-formed results for candidates that were actually in the batch.
+    Duplicated, unknown or non-integer application_ids are dropped.
+    """
+    required_keys = ["match_score", "summary", "pros", "cons"]
+    results = parsed_json.get("results")
+    if not isinstance(results, list):
+        raise ValueError("Batch match analysis JSON from Ollama has no 'results' array.")
+
+    valid: Dict[int, dict] = {}
+    seen: set = set()
+    for item in results:
+        if not isinstance(item, dict):
+            continue
+        application_id = item.get("application_id")
+        if not isinstance(application_id, int) or isinstance(application_id, bool):
+            continue  # Lists/objects are unhashable; the candidate is re-scored on its own
+        if application_id in seen:
+            valid.pop(application_id, None)  # Ambiguous: re-run this candidate on its own
+            continue
+        seen.add(application_id)
+        if application_id not in candidates or not all(key in item for key in required_keys):
+            continue
+        if not isinstance(item["match_score"], int) or not (0 <= item["match_score"] <= 100):
+            continue
+        valid[application_id] = {key: item[key] for key in required_keys}
+    return valid
+
+
+def get_batch_match_analysis(candidates: Dict[int, dict], jd_analysis: dict) -> Dict[int, dict]:
+    """
+    Scores several candidates for the same job in a single generation.
+
+    Args:
+        candidates: CV analyses keyed by application_id.
+        jd_analysis: The structured JD analysis shared by all candidates.
+
+    Returns:
+        Match results keyed by application_id. Candidates missing from (or invalid in)
+        the batched response are scored with individual `get_match_analysis` calls.
+        Candidates whose individual call also fails are left out.
+    """
+    logger.info(f"Performing batched CV-JD match analysis for {len(candidates)} candidates...")
+
+    results: Dict[int, dict] = {}
+    if len(candidates) > 1:
+        try:
+            parsed_json = ollama_client.invoke_ollama_json(
+                model_name=ollama_client.get_model_for_task(ollama_client.TASK_MATCHING),
+                system_prompt=prompts.system_prompt_batch_matching,
+                user_content=build_batch_match_content(candidates, jd_analysis),
+                temperature=0.5,
+                schema=prompts.batch_matching_schema
+            )
+            results = _validate_batch_results(parsed_json, candidates)
+        except Exception as e:
+            # Whatever went wrong, the per-candidate loop below still scores everyone
+            logger.error(f"Batched match analysis failed, falling back to per-candidate calls: {e}", exc_info=True)
+
+    missing = [application_id for application_id in candidates if application_id not in results]
+    if results and missing:
+        logger.warning(f"Batched match analysis returned no valid result for application_ids {missing}; re-scoring individually.")
+
+    for application_id in missing:
+        try:
+            results[application_id] = get_match_analysis(candidates[application_id], jd_analysis)
+        except Exception as e:
+            logger.error(f"Per-candidate match analysis failed for application_id {application_id}: {e}")
+    return results
+
+
+def build_fused_content(cv_content: str, jd_analysis: dict) -> str:
+    """
+    Formats the JD analysis and the raw CV text into the user message for the fused call.
+    As in `build_match_content`, the job block comes first so it can be reused as a prefix.
+    """
+    return f"""
+        Here are the key requirements for the job:
+        ---JOB START---
+        {json.dumps(jd_analysis, indent=2, sort_keys=True)}
+        ---JOB END---
+
+        Here is the raw text of the candidate's CV:
+        ---CV START---
+        {cv_content}
+        ---CV END---
+        """
+
+
+def analyze_cv_and_match(cv_content: str, jd_analysis: dict) -> Tuple[dict, dict]:
+    """
+    Fused pipeline mode: extracts the CV and scores it against the JD analysis
+    in a single generation.
+
+    Returns:
+        A tuple of (cv_analysis, match_result) with the same shapes as
+        `_analyze_cv_text` and `get_match_analysis`.
+    """
+    logger.info("Performing fused CV extraction and JD match using centralized Ollama client...")
+
+    try:
+        parsed_json = ollama_client.invoke_ollama_json(
+            model_name=ollama_client.get_model_for_task(ollama_client.TASK_FUSED_ANALYSIS),
+            system_prompt=prompts.system_prompt_fused,
+            user_content=build_fused_content(cv_content, jd_analysis),
+            temperature=0.3,
+            schema=prompts.fused_analysis_schema
+        )
+
+        cv_analysis = parsed_json.get("candidate")
+        match_result = parsed_json.get("match")
+        if not isinstance(cv_analysis, dict) or not isinstance(match_result, dict):
+            logger.warning(f"Ollama fused analysis JSON missing required sections. Found: {list(parsed_json.keys())}")
+            raise ValueError("Fused analysis JSON from Ollama is missing the 'candidate' or 'match' section.")
+
+        cv_required_keys = ["candidate_name", "email", "degree", "experience", "technical_skill", "certifications"]
+        if not all(key in cv_analysis for key in cv_required_keys):
+            logger.warning(f"Ollama fused CV section missing required keys. Found: {list(cv_analysis.keys())}")
+
+        match_required_keys = ["match_score", "summary", "pros", "cons"]
+        if not all(key in match_result for key in match_required_keys):
+            logger.warning(f"Ollama fused match section missing required keys. Found: {list(match_result.keys())}")
+            raise ValueError("Fused analysis match section is missing required keys.")
+
+        logger.info("Successfully parsed JSON from Ollama fused analysis.")
+        return cv_analysis, match_result
+
+    except (ValueError, RuntimeError) as e:
+        logger.error(f"Failed to get or parse fused analysis from Ollama: {e}", exc_info=True)
+        raise RuntimeError(f"Ollama fused analysis failed: {e}") from e
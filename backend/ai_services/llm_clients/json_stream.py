@@ -0,0 +1,156 @@
+# json_stream.py
+from typing import Any, Dict, Optional
+import json
+
+# First character a JSON value of each schema type can start with.
+_VALUE_START_CHARS = {
+    "object": "{",
+    "array": "[",
+    "string": '"',
+    "integer": "-0123456789",
+    "number": "-0123456789",
+    "boolean": "tf",
+}
+
+
+class JSONStreamAborted(ValueError):
+    """Raised when streamed model output clearly diverges from the expected JSON."""
+
+
+class IncrementalJSONParser:
+    """
+    Consumes an LLM token stream chunk by chunk and tracks the top-level JSON object.
+
+    - `feed()` returns True as soon as the top-level object closes, so the caller
+      can stop reading the stream instead of waiting for trailing text.
+    - When a schema is given, top-level keys and the first character of their
+      values are checked as they arrive; output that clearly diverges raises
+      JSONStreamAborted so the caller can abort the generation early.
+
+    A leading markdown fence (```json) is tolerated, matching the cleanup done
+    in the non-streaming path.
+    """
+
+    def __init__(self, schema: Optional[Dict[str, Any]] = None, max_unknown_keys: int = 2, max_chars: Optional[int] = None):
+        self.properties: Dict[str, Any] = (schema or {}).get("properties", {})
+        self.max_unknown_keys = max_unknown_keys
+        self.max_chars = max_chars
+
+        self.text = ""
+        self.start: Optional[int] = None   # index of the opening '{'
+        self.end: Optional[int] = None     # index of the closing '}'
+        self.unknown_keys = 0
+
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._expect_key = False           # next top-level string is a key
+        self._reading_key = False
+        self._key_chars: list[str] = []
+        self._pending_key: Optional[str] = None  # key whose value has not started yet
+        self._after_colon = False
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    def feed(self, chunk: str) -> bool:
+        """Feeds the next chunk of streamed text. Returns True once the object is complete."""
+        if self.complete:
+            return True
+
+        offset = len(self.text)
+        self.text += chunk
+        if self.max_chars is not None and len(self.text) > self.max_chars:
+            raise JSONStreamAborted(f"Output exceeded {self.max_chars} characters without closing the JSON object.")
+
+        for i, char in enumerate(chunk, start=offset):
+            if self.start is None:
+                self._scan_preamble(i, char)
+            else:
+                self._scan_object(i, char)
+            if self.complete:
+                return True
+        return False
+
+    def result(self) -> Dict[str, Any]:
+        """Parses the completed top-level object."""
+        if not self.complete:
+            raise ValueError("JSON object is not complete yet.")
+        try:
+            return json.loads(self.text[self.start:self.end + 1])
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Streamed output is not valid JSON: {e}") from e
+
+    # ------------------------------------------------------------------
+
+    def _scan_preamble(self, index: int, char: str) -> None:
+        if char == "{":
+            self.start = index
+            self._depth = 1
+            self._expect_key = True
+            return
+        if char.isspace():
+            return
+        # Allow an opening ```json / ``` fence before the object.
+        preamble = self.text[:index + 1].strip()
+        if "```json".startswith(preamble):
+            return
+        raise JSONStreamAborted(f"Output does not start with a JSON object: {preamble[:80]!r}")
+
+    def _scan_object(self, index: int, char: str) -> None:
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                self._in_string = False
+                if self._reading_key:
+                    self._finish_key()
+                return
+            if self._reading_key:
+                self._key_chars.append(char)
+            return
+
+        if self._depth == 1 and not char.isspace():
+            if self._after_colon:
+                self._check_value_start(char)
+            if char == '"' and self._expect_key:
+                self._reading_key = True
+                self._expect_key = False
+                self._key_chars = []
+            elif char == ":" and self._pending_key is not None:
+                self._after_colon = True
+            elif char == ",":
+                self._expect_key = True
+
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self.end = index
+
+    def _finish_key(self) -> None:
+        self._reading_key = False
+        key = "".join(self._key_chars)
+        if self.properties and key not in self.properties:
+            self.unknown_keys += 1
+            if self.unknown_keys > self.max_unknown_keys:
+                raise JSONStreamAborted(f"Too many keys outside the schema (latest: {key!r}).")
+            self._pending_key = None
+            return
+        self._pending_key = key
+
+    def _check_value_start(self, char: str) -> None:
+        self._after_colon = False
+        key, self._pending_key = self._pending_key, None
+        if char == "n" or key is None:
+            return  # null is accepted for any field
+        expected_type = self.properties.get(key, {}).get("type")
+        allowed = _VALUE_START_CHARS.get(expected_type)
+        if allowed and char not in allowed:
+            raise JSONStreamAborted(f"Value for {key!r} should be of type {expected_type!r}, got {char!r}.")
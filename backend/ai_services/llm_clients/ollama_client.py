@@ -3,17 +3,90 @@ import json
 import logging
 from langchain_community.chat_models import ChatOllama
 from langchain.schema import SystemMessage, HumanMessage, AIMessage, BaseMessage
-from typing import List, Dict, Any
+import time
+import uuid
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Optional
+
+from config import settings
+from .json_stream import IncrementalJSONParser, JSONStreamAborted
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# --- Task names used for model routing (see LLM_TASK_MODELS in config.py) ---
+TASK_CV_EXTRACTION = "cv_extraction"
+TASK_JD_EXTRACTION = "jd_extraction"
+TASK_LINKEDIN_EXTRACTION = "linkedin_extraction"
+TASK_MATCHING = "matching"
+TASK_FUSED_ANALYSIS = "fused_analysis"
+
+
+def get_model_for_task(task: str) -> str:
+    """
+    Resolves the Ollama model configured for a given task.
+    Falls back to LLM_DEFAULT_MODEL when the task has no entry in the routing table.
+    """
+    return settings.LLM_TASK_MODELS.get(task) or settings.LLM_DEFAULT_MODEL
+
+
+@lru_cache(maxsize=32)
+def _get_llm(model_name: str, temperature: float) -> ChatOllama:
+    """
+    Returns a shared ChatOllama client for a (model, temperature) pair.
+
+    Every call for a task goes out with identical model options and `keep_alive`, so
+    Ollama keeps the model loaded and reuses the KV cache of the longest prompt prefix
+    it has already evaluated (the system prompt, and for matching the job block too).
+    Changing options such as num_ctx between calls would force a reload and drop that cache.
+    """
+    # `format="json"` can be added if your Ollama version/model reliably supports it.
+    # If it causes errors, remove it and rely solely on the prompt structure.
+    # return ChatOllama(model=model_name, format="json", temperature=temperature, ...)
+    return ChatOllama(
+        model=model_name,
+        temperature=temperature,
+        keep_alive=settings.LLM_KEEP_ALIVE,
+        num_ctx=settings.LLM_NUM_CTX
+    )
+
+
+def _extract_metrics(completion: BaseMessage, model_name: str, latency_s: float) -> Dict[str, Any]:
+    """
+    Builds a timing/token summary from the Ollama response metadata.
+    Ollama reports durations in nanoseconds; missing fields are left as None.
+    """
+    metadata = getattr(completion, "response_metadata", None) or {}
+    eval_count = metadata.get("eval_count")
+    eval_duration = metadata.get("eval_duration")
+    tokens_per_sec = None
+    if eval_count and eval_duration:
+        tokens_per_sec = eval_count / (eval_duration / 1e9)
+    # With a cache hit Ollama only counts and times the prompt tokens it had to evaluate.
+    prompt_eval_duration = metadata.get("prompt_eval_duration")
+    prompt_eval_s = prompt_eval_duration / 1e9 if prompt_eval_duration is not None else None
+
+    return {
+        "model": model_name,
+        "latency_s": latency_s,
+        "prompt_eval_count": metadata.get("prompt_eval_count"),
+        "prompt_eval_duration_ns": prompt_eval_duration,
+        "prompt_eval_share": prompt_eval_s / latency_s if prompt_eval_s is not None and latency_s else None,
+        "eval_count": eval_count,
+        "eval_duration_ns": eval_duration,
+        "tokens_per_sec": tokens_per_sec,
+    }
+
+
 def invoke_ollama_json(
     model_name: str,
     system_prompt: str,
     user_content: str,
-    temperature: float = 0.3
+    temperature: float = 0.3,
+    stream: Optional[bool] = None,
+    schema: Optional[Dict[str, Any]] = None,
+    prefix_cache: Optional[bool] = None
 ) -> Dict[str, Any]:
     """
     Invokes a specified Ollama model expecting a JSON response.
@@ -23,6 +96,13 @@ def invoke_ollama_json(
         system_prompt: The system prompt guiding the model, MUST explicitly request JSON.
         user_content: The user's input/content for the model to process.
         temperature: The temperature setting for the LLM.
+        stream: Consume the response as a token stream (see `_invoke_streaming`).
+            Defaults to the LLM_STREAMING setting.
+        schema: JSON schema the response should follow. In streaming mode it is used
+            to abort the generation early when the output diverges from it.
+        prefix_cache: Keep the system prompt as a stable, reusable prefix. Defaults to the
+            LLM_PREFIX_CACHE setting; False makes every call evaluate its prompt from scratch
+            (only useful to compare prompt-eval times).
 
     Returns:
         A dictionary parsed from the Ollama model's JSON response.
@@ -31,29 +111,74 @@ def invoke_ollama_json(
         RuntimeError: If the Ollama API call fails or initialization fails.
         ValueError: If the Ollama response cannot be parsed as valid JSON or misses expected structure implicitly defined by the prompt.
     """
+    parsed_json, _ = invoke_ollama_json_with_metrics(
+        model_name=model_name,
+        system_prompt=system_prompt,
+        user_content=user_content,
+        temperature=temperature,
+        stream=stream,
+        schema=schema,
+        prefix_cache=prefix_cache
+    )
+    return parsed_json
+
+
+def invoke_ollama_json_with_metrics(
+    model_name: str,
+    system_prompt: str,
+    user_content: str,
+    temperature: float = 0.3,
+    stream: Optional[bool] = None,
+    schema: Optional[Dict[str, Any]] = None,
+    prefix_cache: Optional[bool] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Same as `invoke_ollama_json`, but also returns latency and token metrics
+    (wall-clock latency, prompt-eval and eval token counts/times, tokens per second).
+    Used by the model benchmark harness.
+
+    Returns:
+        A tuple of (parsed JSON response, metrics dictionary).
+    """
     logger.info(f"Initializing Ollama client with model: {model_name}")
     try:
-        # Initialize the ChatOllama client.
-        # `format="json"` can be added if your Ollama version/model reliably supports it.
-        # If it causes errors, remove it and rely solely on the prompt structure.
-        # llm = ChatOllama(model=model_name, format="json", temperature=temperature)
-        llm = ChatOllama(model=model_name, temperature=temperature)
+        llm = _get_llm(model_name, temperature)
 
     except Exception as e:
         logger.error(f"Failed to initialize ChatOllama with model {model_name}: {e}", exc_info=True)
         raise RuntimeError(f"Could not connect to or initialize Ollama model {model_name}: {e}") from e
 
-    # Construct messages for the LLM
+    use_prefix_cache = settings.LLM_PREFIX_CACHE if prefix_cache is None else prefix_cache
+    if not use_prefix_cache:
+        # Comparison mode: a unique first line guarantees no prefix is shared with earlier calls.
+        system_prompt = f"Request id: {uuid.uuid4().hex}\n{system_prompt}"
+
+    # Construct messages for the LLM. The system prompt always goes first, unchanged,
+    # so consecutive calls of the same task share it as a prefix.
     messages: List[BaseMessage] = [
         SystemMessage(content=system_prompt),
         HumanMessage(content=user_content),
     ]
 
+    use_stream = settings.LLM_STREAMING if stream is None else stream
+    if use_stream:
+        parsed_json, metrics = _invoke_streaming(llm, messages, model_name, schema)
+        metrics["prefix_cache"] = use_prefix_cache
+        return parsed_json, metrics
+
     logger.info(f"Sending request to Ollama model {model_name}...")
     
     json_output_str = ""
     try:
+        started_at = time.perf_counter()
         completion: BaseMessage = llm.invoke(messages) 
+        metrics = _extract_metrics(completion, model_name, time.perf_counter() - started_at)
+        metrics["prefix_cache"] = use_prefix_cache
+        if metrics["prompt_eval_duration_ns"] is not None:
+            logger.info(
+                f"Prompt eval: {metrics['prompt_eval_count']} tokens in "
+                f"{metrics['prompt_eval_duration_ns'] / 1e6:.0f} ms (prefix cache {'on' if use_prefix_cache else 'off'})."
+            )
         
         json_output_str = str(completion.content) 
         logger.debug(f"Raw Ollama response: {json_output_str}") # Debug level for potentially verbose output
@@ -72,8 +197,8 @@ def invoke_ollama_json(
 
         logger.info("Attempting to parse JSON response from Ollama.")
         parsed_json = json.loads(cleaned_str)
-        logger.info("Successfully parsed JSON response.")
-        return parsed_json
+        logger.info(f"Successfully parsed JSON response in {metrics['latency_s']:.2f}s.")
+        return parsed_json, metrics
 
     except json.JSONDecodeError as e:
         logger.error(f"Failed to decode JSON from Ollama. Response snippet: {json_output_str[:500]}", exc_info=True)
@@ -83,3 +208,66 @@ def invoke_ollama_json(
         logger.error(f"An error occurred calling Ollama model {model_name} or processing its response: {e}", exc_info=True)
         raise RuntimeError(f"Ollama API call or processing failed: {e}") from e
 
+
+
+
+def _invoke_streaming(
+    llm: ChatOllama,
+    messages: List[BaseMessage],
+    model_name: str,
+    schema: Optional[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Streaming variant of the Ollama call.
+
+    Tokens are fed to an IncrementalJSONParser as they arrive. Reading stops as soon
+    as the top-level JSON object closes, and the stream is aborted when the output
+    diverges from the schema. Closing the stream drops the HTTP connection, which
+    makes Ollama stop generating, so no time is spent on tokens that are thrown away.
+    Time-to-first-token is reported in the metrics as `ttft_s`.
+    """
+    logger.info(f"Streaming request to Ollama model {model_name}...")
+    parser = IncrementalJSONParser(schema=schema)
+    metrics: Dict[str, Any] = {"model": model_name, "ttft_s": None, "streamed_chunks": 0, "aborted": False}
+
+    started_at = time.perf_counter()
+    token_stream = llm.stream(messages)
+    try:
+        for chunk in token_stream:
+            piece = str(chunk.content)
+            if not piece:
+                continue
+            if metrics["ttft_s"] is None:
+                metrics["ttft_s"] = time.perf_counter() - started_at
+            metrics["streamed_chunks"] += 1
+            if parser.feed(piece):
+                break
+    except JSONStreamAborted as e:
+        metrics["aborted"] = True
+        metrics["latency_s"] = time.perf_counter() - started_at
+        logger.warning(
+            f"Aborted Ollama stream after {metrics['streamed_chunks']} chunks ({metrics['latency_s']:.2f}s): {e}. "
+            f"Response snippet: {parser.text[:200]}"
+        )
+        raise ValueError(f"Ollama output diverged from the expected JSON: {e}") from e
+    except Exception as e:
+        logger.error(f"An error occurred streaming from Ollama model {model_name}: {e}", exc_info=True)
+        raise RuntimeError(f"Ollama streaming call failed: {e}") from e
+    finally:
+        token_stream.close()
+
+    metrics["latency_s"] = time.perf_counter() - started_at
+    if not parser.text.strip():
+        logger.error("Ollama returned an empty response.")
+        raise ValueError("Ollama returned an empty response.")
+    if not parser.complete:
+        logger.error(f"Ollama stream ended before the JSON object was closed. Response snippet: {parser.text[:500]}")
+        raise ValueError(f"Ollama returned incomplete JSON. Response snippet: {parser.text[:200]}")
+
+    parsed_json = parser.result()
+    ttft = metrics["ttft_s"] or 0.0
+    logger.info(
+        f"Successfully parsed streamed JSON response in {metrics['latency_s']:.2f}s "
+        f"(time to first token {ttft:.2f}s, {metrics['streamed_chunks']} chunks)."
+    )
+    return parsed_json, metrics
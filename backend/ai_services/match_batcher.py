@@ -0,0 +1,101 @@
+# ai_services/match_batcher.py
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import settings
+from . import jd_matching_service
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class _PendingMatch:
+    def __init__(self, application_id: int, cv_analysis: dict):
+        self.application_id = application_id
+        self.cv_analysis = cv_analysis
+        self.result: Optional[dict] = None
+        self.done = threading.Event()
+
+
+class _JobBatch:
+    def __init__(self, jd_analysis: dict):
+        self.jd_analysis = jd_analysis
+        self.items: List[_PendingMatch] = []
+        self.full = threading.Event()
+
+
+class MatchBatcher:
+    """
+    Groups concurrent match requests for the same job into one batched LLM call.
+
+    Each background analysis thread calls `submit()` and blocks until its result
+    is ready. The first request for a job opens a batch and becomes its leader:
+    it waits up to `max_wait_s` (or until `max_batch_size` requests joined), then
+    runs `get_batch_match_analysis` for the whole batch and hands every waiting
+    thread its own result. Requests for other jobs form separate batches.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_s: float):
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_s
+        self._open_batches: Dict[int, _JobBatch] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job_id: int, application_id: int, cv_analysis: dict, jd_analysis: dict) -> dict:
+        """
+        Returns the match result for one candidate, scored together with any
+        other candidates of the same job submitted within the wait window.
+        """
+        if self.max_batch_size <= 1:
+            return jd_matching_service.get_match_analysis(cv_analysis, jd_analysis)
+
+        item = _PendingMatch(application_id, cv_analysis)
+        with self._lock:
+            batch = self._open_batches.get(job_id)
+            is_leader = batch is None
+            if is_leader:
+                batch = _JobBatch(jd_analysis)
+                self._open_batches[job_id] = batch
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch_size:
+                # Close the batch so later requests start a new one.
+                self._open_batches.pop(job_id, None)
+                batch.full.set()
+
+        if is_leader:
+            batch.full.wait(self.max_wait_s)
+            with self._lock:
+                if self._open_batches.get(job_id) is batch:
+                    self._open_batches.pop(job_id)
+            self._run(job_id, batch)
+        else:
+            item.done.wait()
+
+        if item.result is None:
+            raise RuntimeError(f"Match analysis failed for application_id {application_id}.")
+        return item.result
+
+    def _run(self, job_id: int, batch: _JobBatch) -> None:
+        candidates = {item.application_id: item.cv_analysis for item in batch.items}
+        logger.info(f"Running match batch for job_id {job_id} with {len(candidates)} candidates.")
+        started = time.perf_counter()
+        try:
+            results = jd_matching_service.get_batch_match_analysis(candidates, batch.jd_analysis)
+        except Exception as e:
+            logger.error(f"Match batch for job_id {job_id} failed: {e}", exc_info=True)
+            results = {}
+        finally:
+            logger.info(f"Match batch for job_id {job_id} finished in {time.perf_counter() - started:.2f}s.")
+
+        for item in batch.items:
+            item.result = results.get(item.application_id)
+            item.done.set()
+
+
+match_batcher = MatchBatcher(
+    max_batch_size=settings.MATCH_BATCH_SIZE,
+    max_wait_s=settings.MATCH_BATCH_WAIT_SECONDS
+)
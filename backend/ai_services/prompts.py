@@ -136,4 +136,69 @@ Guidelines:
 - For `education`, capture the institution name and degree/field if available.
 - For `skills`, list the skills mentioned in the skills section.
 - If a section or specific field within a section is not found in the text, use a sensible default (e.g., "" for strings, [] for arrays). Ensure all required fields in the schema are present, even if empty.
-"""
\ No newline at end of file
+"""
+
+# --- Prompt for single-pass CV extraction + JD matching (fused pipeline mode) ---
+fused_analysis_schema = {
+    "type": "object",
+    "properties": {
+        "candidate": cv_analysis_schema,
+        "match": matching_analysis_schema
+    },
+    "required": ["candidate", "match"]
+}
+
+system_prompt_fused = f"""
+You are an expert CV analysis tool and recruitment analyst. You are given the key requirements of a job (JSON) and the raw text of a candidate's CV.
+In a single response, first extract the candidate's information from the CV, then assess how well the candidate matches the job.
+Respond *ONLY* with a valid JSON object conforming exactly to the following schema. Do not add any explanatory text, markdown formatting, or anything else before or after the JSON object.
+
+JSON Schema:
+{json.dumps(fused_analysis_schema, indent=2)}
+
+Guidelines for `candidate`:
+- Experience `duration_months` should be calculated based on the start and end dates if provided, otherwise estimate or use 0 if unclear.
+- `technical_skill` should list specific programming languages, frameworks, databases, cloud platforms, and tools.
+- `soft_skill` (optional) can be inferred from descriptions of teamwork, communication, leadership, etc.
+- If information for a field is not found, use a sensible default (e.g., "" for strings, [] for arrays, 0 for integers). Ensure all required fields are present even if empty.
+
+Guidelines for `match`:
+1.  Calculate a `match_score` (0-100) based on how well the extracted experience duration, degrees, technical skills, and certifications align with the job requirements. Give higher weight to technical skills and experience years.
+2.  Write a concise `summary` highlighting the candidate's strongest qualifications for *this specific role* and mentioning the overall alignment.
+3.  List specific, evidence-based `pros` (reasons for suitability) based on the comparison.
+4.  List specific, evidence-based `cons` (areas where the candidate falls short) based on the comparison. If there are no clear cons, provide an empty array [].
+"""
+
+batch_matching_schema = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "application_id": {"type": "integer", "description": "The application_id of the candidate this result belongs to, copied from the input."},
+                    **matching_analysis_schema["properties"]
+                },
+                "required": ["application_id", "match_score", "summary", "pros", "cons"]
+            },
+            "description": "Exactly one match result per candidate in the input, in any order."
+        }
+    },
+    "required": ["results"]
+}
+
+system_prompt_batch_matching = f"""
+You are an expert recruitment analyst. You are given the key requirements of a job (JSON) and a list of compact candidate profiles (JSON), each identified by an `application_id`.
+Assess every candidate against the job independently; do not compare candidates with each other.
+Respond *ONLY* with a valid JSON object conforming exactly to the following schema. Do not add any explanatory text, markdown formatting, or anything else before or after the JSON object.
+
+JSON Schema:
+{json.dumps(batch_matching_schema, indent=2)}
+
+Guidelines:
+1.  Return exactly one entry in `results` for every candidate, with the candidate's `application_id` copied unchanged.
+2.  Calculate a `match_score` (0-100) based on how well the candidate's experience duration, degrees, technical skills, and certifications align with the job requirements. Give higher weight to technical skills and experience years.
+3.  Write a concise `summary` highlighting the candidate's strongest qualifications for *this specific role* and mentioning the overall alignment.
+4.  List specific, evidence-based `pros` (reasons for suitability) and `cons` (areas where the candidate falls short). If there are no clear cons, provide an empty array [].
+"""
@@ -1,9 +1,10 @@
 # utils.py
 import os
-import shutil
 from fastapi import UploadFile
 from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader
 
+import uploads
+
 def read_cv(file_path: str) -> str:
     """
     Reads the content of a CV file (PDF or DOCX) and returns the raw text.
@@ -39,8 +40,11 @@ def read_cv(file_path: str) -> str:
 
 def save_upload_file(upload_file: UploadFile, destination: str) -> str:
     """
-    Saves an uploaded file to the specified destination path.
-    
+    Saves an uploaded CV to the specified destination path.
+
+    Streams it through uploads.store_upload: size-capped, content-checked and
+    renamed into place once complete.
+
     Args:
         upload_file: The FastAPI UploadFile object
         destination: Full path where to save the file
@@ -48,16 +52,4 @@ def save_upload_file(upload_file: UploadFile, destination: str) -> str:
     Returns:
         The destination path
     """
-    
-    try:
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(destination), exist_ok=True)
-        
-        with open(destination, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
-            
-    finally:
-        # Always close the file handle after use to prevent resource leaks
-        upload_file.file.close() 
-    
-    return destination
\ No newline at end of file
+    return uploads.store_upload(upload_file, destination).path
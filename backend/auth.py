@@ -3,11 +3,14 @@
 from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 from jose import jwt, JWTError
+import orjson
 
 from config import settings
 import models
+from cache import cache, key_for
 from database import get_db
 
 # --- THREE SEPARATE SCHEMES FOR EACH LOGIN ROUTE ---
@@ -33,6 +36,61 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
+# --- PRINCIPAL CACHE ---
+# The dependencies below resolve the token's user on every request. A snapshot of
+# the row is cached per (role, id) for PRINCIPAL_CACHE_TTL_SECONDS, so hot routes skip
+# the primary-key SELECT; routes that change a user's status, password or profile
+# call invalidate_principal() after committing.
+PRINCIPAL_MODELS = {
+    "candidate": (models.Candidates, "candid"),
+    "hr": (models.Hr, "hr_id"),
+    "admin": (models.Admin, "adminid"),
+}
+# Never put in the cache (which may be shared through Redis); loaded from the DB on first access.
+UNCACHED_COLUMNS = {"pass_word"}
+
+
+def principal_scope(role: str, user_id: int) -> str:
+    return f"principal:{role}:{user_id}"
+
+
+def invalidate_principal(role: str, user_id: int) -> None:
+    """Drops the cached snapshot of a user, so the next request re-reads the row."""
+    cache.invalidate([principal_scope(role, user_id)])
+
+
+def _snapshot(user) -> bytes:
+    columns = inspect(type(user)).column_attrs
+    return orjson.dumps({attr.key: getattr(user, attr.key) for attr in columns if attr.key not in UNCACHED_COLUMNS})
+
+
+def _restore(db: Session, model, data: bytes):
+    values = orjson.loads(data)
+    for attr in inspect(model).column_attrs:
+        if isinstance(attr.columns[0].type, DateTime) and values.get(attr.key) is not None:
+            values[attr.key] = datetime.fromisoformat(values[attr.key])
+    user = model(**values)
+    # Persistent-detached with a clean history, then attached without a SELECT. The
+    # object behaves as if queried: routes may update it, and pass_word loads on access.
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def _load_principal(db: Session, role: str, user_id: int):
+    model, primary_key = PRINCIPAL_MODELS[role]
+    ttl_s = settings.PRINCIPAL_CACHE_TTL_SECONDS
+    key = key_for(cache, "principal", [principal_scope(role, user_id)], role, user_id) if ttl_s > 0 else None
+
+    cached = cache.get(key) if key else None
+    if cached is not None:
+        return _restore(db, model, cached)
+
+    user = db.query(model).filter(getattr(model, primary_key) == user_id).first()
+    if user is not None and key:
+        cache.set(key, _snapshot(user), ttl_s)
+    return user
+
+
 def get_current_user(token: str = Depends(oauth2_scheme_candidate), db: Session = Depends(get_db)):
     """
     A FastAPI dependency to get the current authenticated CANDIDATE.
@@ -58,7 +116,7 @@ def get_current_user(token: str = Depends(oauth2_scheme_candidate), db: Session
         raise credentials_exception
     
     # We can safely cast to int here because the check above passed
-    user = db.query(models.Candidates).filter(models.Candidates.candid == int(user_id)).first()
+    user = _load_principal(db, "candidate", int(user_id))
     
     if user is None:
         raise credentials_exception
@@ -97,7 +155,7 @@ def get_current_hr(token: str = Depends(oauth2_scheme_hr), db: Session = Depends
     except JWTError:
         raise credentials_exception
     
-    user = db.query(models.Hr).filter(models.Hr.hr_id == int(user_id)).first()
+    user = _load_principal(db, "hr", int(user_id))
     
     if user is None:
         raise credentials_exception
@@ -135,9 +193,25 @@ def get_current_admin(token: str = Depends(oauth2_scheme_admin), db: Session = D
     except JWTError:
         raise credentials_exception
     
-    admin = db.query(models.Admin).filter(models.Admin.adminid == int(admin_id)).first()
+    admin = _load_principal(db, "admin", int(admin_id))
     
     if admin is None:
         raise credentials_exception
         
-    return admin
\ No newline at end of file
+    return admin
+
+def get_current_hr_or_admin(token: str = Depends(oauth2_scheme_hr), db: Session = Depends(get_db)):
+    """
+    A FastAPI dependency for routes open to both HR users and admins.
+    Returns the models.Hr or models.Admin the token belongs to; callers limit
+    HR users to their own jobs, admins see everything.
+    """
+    try:
+        role: str | None = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("role")
+    except JWTError:
+        role = None
+
+    if role == "admin":
+        return get_current_admin(token, db)
+    # Anything else gets the HR checks (and their 401)
+    return get_current_hr(token, db)
@@ -0,0 +1,121 @@
+# benchmarks/argon2_calibration.py
+"""
+Calibrates the Argon2id parameters (ARGON2_* settings) for the machine it runs on,
+then checks how logins behave under a burst with the bounded hashing pool.
+
+    calibrate  times one hash for each memory_cost x time_cost combination and
+               suggests the strongest one whose median stays under --target-ms
+    burst      fires --burst concurrent verifications through security.hashing_pool
+               (PASSWORD_HASH_WORKERS / PASSWORD_HASH_MAX_QUEUE from the settings)
+               and reports latency percentiles and how many got a fast 503
+
+Run from the backend/ directory, on hardware like production's:
+
+    python -m benchmarks.argon2_calibration
+    python -m benchmarks.argon2_calibration --target-ms 150 --burst 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import HTTPException  # noqa: E402
+from passlib.hash import argon2  # noqa: E402
+
+import security  # noqa: E402
+from config import settings  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+
+
+def time_hash(memory_cost: int, time_cost: int, parallelism: int, repeat: int) -> float:
+    """Median milliseconds to hash one password with the given parameters."""
+    hasher = argon2.using(type="ID", memory_cost=memory_cost, time_cost=time_cost, parallelism=parallelism)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hasher.hash(PASSWORD)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(memory_costs: List[int], time_costs: List[int], parallelism: int, repeat: int, target_ms: float) -> Optional[Tuple[int, int]]:
+    print(f"{'memory_cost (KiB)':>18} {'time_cost':>10} {'median ms':>10}")
+    best = None
+    for memory_cost in memory_costs:
+        for time_cost in time_costs:
+            ms = time_hash(memory_cost, time_cost, parallelism, repeat)
+            fits = ms <= target_ms
+            print(f"{memory_cost:>18} {time_cost:>10} {ms:>10.1f}{'' if fits else '  (over target)'}")
+            # Prefer memory over iterations: memory hardness is what slows down GPU attacks
+            if fits and (best is None or (memory_cost, time_cost) > best):
+                best = (memory_cost, time_cost)
+    return best
+
+
+def burst(n: int) -> None:
+    hashed = security.get_password_hash(PASSWORD)
+    latencies: List[float] = []
+    rejected: List[float] = []
+    lock = threading.Lock()
+    start_gate = threading.Event()
+
+    def login() -> None:
+        start_gate.wait()
+        start = time.perf_counter()
+        try:
+            security.verify_password(PASSWORD, hashed)
+            bucket = latencies
+        except HTTPException:
+            bucket = rejected
+        with lock:
+            bucket.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=login) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    start_gate.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"\nBurst of {n} logins (workers={settings.PASSWORD_HASH_WORKERS}, max_queue={settings.PASSWORD_HASH_MAX_QUEUE}):"
+          f" {elapsed:.2f} s total")
+    if latencies:
+        latencies.sort()
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+        print(f"  verified  {len(latencies):>5}  p50 {statistics.median(latencies):.1f} ms  p95 {p95:.1f} ms  max {latencies[-1]:.1f} ms")
+    if rejected:
+        print(f"  503       {len(rejected):>5}  max {max(rejected):.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibrate Argon2id parameters and test the hashing pool under a burst.")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Latency budget for one hash.")
+    parser.add_argument("--memory-costs", type=int, nargs="+", default=[19456, 47104, 65536, 102400])
+    parser.add_argument("--time-costs", type=int, nargs="+", default=[1, 2, 3, 4])
+    parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--burst", type=int, default=100, help="Concurrent logins for the burst test (0 = skip).")
+    args = parser.parse_args()
+
+    print(f"Current settings: memory_cost={settings.ARGON2_MEMORY_COST} time_cost={settings.ARGON2_TIME_COST}"
+          f" parallelism={settings.ARGON2_PARALLELISM}\n")
+    best = calibrate(args.memory_costs, args.time_costs, args.parallelism, args.repeat, args.target_ms)
+    if best is None:
+        print(f"\nNo combination fits {args.target_ms:.0f} ms; raise --target-ms or add hardware.")
+    else:
+        print(f"\nSuggested (.env): ARGON2_MEMORY_COST={best[0]} ARGON2_TIME_COST={best[1]} ARGON2_PARALLELISM={args.parallelism}")
+
+    if args.burst > 0:
+        burst(args.burst)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# benchmarks/explain_indexes.py
+"""
+EXPLAIN-based regression check for the hot-path indexes (migrations/versions/0001).
+
+Seeds a few tens of thousands of rows inside a transaction, runs ANALYZE, then
+EXPLAINs the queries the routers issue and checks that each plan uses the
+expected index. Everything is rolled back at the end, but run it against a
+development/scratch database anyway: the seed inserts take row locks while it runs.
+
+Run from the backend/ directory after `alembic upgrade head`:
+
+    python -m benchmarks.explain_indexes
+    python -m benchmarks.explain_indexes --scale 5 --verbose
+
+Exits with status 1 if any query does not use its index. The same check runs
+under pytest as tests/test_explain_indexes.py (skipped without a database).
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+from typing import Any, Dict, List, Set
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func, select, text  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+from sqlalchemy.engine import Connection  # noqa: E402
+
+import models  # noqa: E402
+from database import engine  # noqa: E402
+
+# Base row counts at --scale 1
+N_JOBS = 200
+N_CANDIDATES = 5000
+N_APPLICATIONS = 50000
+N_FEEDBACK = 20000
+N_LOGS = 50000
+
+
+def _max_id(conn: Connection, table: str, column: str) -> int:
+    return conn.execute(text(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")).scalar()
+
+
+def seed(conn: Connection, scale: int) -> Dict[str, int]:
+    """
+    Inserts synthetic rows with ids above the current maximum of every table.
+    Returns the first seeded id of each table, used to build the EXPLAIN queries.
+    """
+    base = {
+        "hr": _max_id(conn, "hr", "hr_id"),
+        "job": _max_id(conn, "job_posting", "job_id"),
+        "cand": _max_id(conn, "candidate", "candid"),
+        "app": _max_id(conn, "application", "application_id"),
+        "report": _max_id(conn, "analysis_report", "reportid"),
+        "feedback": _max_id(conn, "feedback", "feedbackid"),
+        "log": _max_id(conn, "system_log", "logid"),
+    }
+    counts = {
+        "n_jobs": N_JOBS * scale, "n_cands": N_CANDIDATES * scale, "n_apps": N_APPLICATIONS * scale,
+        "n_feedback": N_FEEDBACK * scale, "n_logs": N_LOGS * scale,
+    }
+    params = {**base, **counts}
+
+    statements = [
+        """INSERT INTO hr (hr_id, firstname, lastname, email, pass_word)
+           VALUES (:hr + 1, 'Explain', 'Check', 'explain-check-' || (:hr + 1) || '@example.invalid', 'x')""",
+        """INSERT INTO job_posting (job_id, hr_id, title, description)
+           SELECT :job + i, :hr + 1, 'Job ' || i, 'Seeded job ' || i FROM generate_series(1, :n_jobs) AS i""",
+        """INSERT INTO candidate (candid, firstname, lastname, email, pass_word)
+           SELECT :cand + i, 'Cand', 'Seed', 'explain-seed-' || (:cand + i) || '@example.invalid', 'x'
+           FROM generate_series(1, :n_cands) AS i""",
+        """INSERT INTO application (application_id, candid, job_id, applied_on)
+           SELECT :app + i, :cand + 1 + (i / 10) % :n_cands, :job + 1 + i % :n_jobs,
+                  now() - (i % 365) * interval '1 day'
+           FROM generate_series(1, :n_apps) AS i""",
+        """INSERT INTO analysis_report (reportid, candid, job_id, application_id, overall_score, analysis_status)
+           SELECT :report + i, :cand + 1 + (i / 10) % :n_cands, :job + 1 + i % :n_jobs, :app + i,
+                  (i * 37) % 250, CASE WHEN i % 10 = 0 THEN 'Pending' ELSE 'Completed' END
+           FROM generate_series(1, :n_apps) AS i""",
+        """INSERT INTO feedback (feedbackid, candid, hr_id, content, message_type, sent_at)
+           SELECT :feedback + i, :cand + 1 + i % :n_cands, :hr + 1, 'Seeded message', 'General',
+                  now() - i * interval '1 minute'
+           FROM generate_series(1, :n_feedback) AS i""",
+        """INSERT INTO system_log (logid, actiontype, timestamped)
+           SELECT :log + i, 'EXPLAIN_SEED', now() - i * interval '1 second' FROM generate_series(1, :n_logs) AS i""",
+    ]
+    for statement in statements:
+        conn.execute(text(statement), params)
+    for table in ("job_posting", "candidate", "application", "analysis_report", "feedback", "system_log"):
+        conn.execute(text(f"ANALYZE {table}"))
+
+    return {"job_id": base["job"] + 1, "candid": base["cand"] + 1}
+
+
+def hot_queries(ids: Dict[str, int]) -> List[tuple]:
+    """(description, statement, expected index) for each hot query path in the routers."""
+    job_id, candid = ids["job_id"], ids["candid"]
+    one_week_ago = datetime.datetime.now() - datetime.timedelta(days=7)
+    return [
+        (
+            "apply_to_job duplicate check",
+            select(models.Application).where(models.Application.candid == candid, models.Application.job_id == job_id).limit(1),
+            "ix_application_candid_job_id",
+        ),
+        (
+            "HR dashboard new applicants for a job",
+            select(func.count(models.Application.application_id))
+            .where(models.Application.job_id == job_id, models.Application.applied_on >= one_week_ago),
+            "ix_application_job_id_applied_on",
+        ),
+        (
+            "pending analyses for a job",
+            select(func.count(models.Analysis.reportid))
+            .where(models.Analysis.job_id == job_id, models.Analysis.analysis_status.in_(["Pending", "Failed"])),
+            "ix_analysis_report_job_id_analysis_status",
+        ),
+        (
+            "top candidates for a job",
+            select(models.Analysis).where(models.Analysis.job_id == job_id)
+            .order_by(models.Analysis.overall_score.desc()).limit(20),
+            "ix_analysis_report_job_id_overall_score",
+        ),
+        (
+            "candidate feedback inbox",
+            select(models.Feedback).where(models.Feedback.candid == candid).order_by(models.Feedback.sent_at.desc()),
+            "ix_feedback_candid_sent_at",
+        ),
+        (
+            "admin system logs",
+            select(models.SystemLog).order_by(models.SystemLog.timestamped.desc()).limit(100),
+            "ix_system_log_timestamped",
+        ),
+    ]
+
+
+def _index_names(plan: Dict[str, Any], found: Set[str]) -> Set[str]:
+    if "Index Name" in plan:
+        found.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        _index_names(child, found)
+    return found
+
+
+def with_parent_indexes(conn: Connection, names: Set[str]) -> Set[str]:
+    """
+    Adds the parent index of every partition index in `names`: on a partitioned
+    table (system_log) plans name the per-partition index, e.g. system_log_p202610_timestamped_idx.
+    """
+    if not names:
+        return names
+    rows = conn.execute(text(
+        "SELECT child.relname, parent.relname FROM pg_inherits i "
+        "JOIN pg_class child ON child.oid = i.inhrelid JOIN pg_class parent ON parent.oid = i.inhparent "
+        "WHERE child.relkind = 'i' AND child.relname = ANY(:names)"
+    ), {"names": list(names)})
+    return names | {parent for _, parent in rows}
+
+
+def uses_index(conn: Connection, statement, expected_index: str) -> tuple:
+    """(whether the plan of `statement` uses `expected_index`, the plan, the index names it uses)."""
+    plan = explain(conn, statement)
+    used = with_parent_indexes(conn, _index_names(plan, set()))
+    return expected_index in used, plan, used
+
+
+def explain(conn: Connection, statement) -> Dict[str, Any]:
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    result = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]["Plan"]
+
+
+def invalid_indexes(conn: Connection) -> List[str]:
+    """Indexes left INVALID by an interrupted CREATE INDEX CONCURRENTLY."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+    ))
+    return [row[0] for row in rows]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check that the hot query paths use their indexes.")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplier for the number of seeded rows.")
+    parser.add_argument("--verbose", action="store_true", help="Print the full plan of every query.")
+    args = parser.parse_args()
+
+    failures = 0
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            broken = invalid_indexes(conn)
+            if broken:
+                print(f"INVALID indexes (drop and re-run the migration): {', '.join(broken)}")
+                failures += len(broken)
+
+            ids = seed(conn, args.scale)
+            for description, statement, expected_index in hot_queries(ids):
+                ok, plan, used = uses_index(conn, statement, expected_index)
+                failures += 0 if ok else 1
+                print(f"{'ok  ' if ok else 'FAIL'} {description:<40} expected {expected_index}; "
+                      f"plan uses {sorted(used) or 'no index'}")
+                if args.verbose or not ok:
+                    print(json.dumps(plan, indent=2))
+        finally:
+            transaction.rollback()
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+# benchmarks/llm_benchmark.py
+"""
+Replays a fixed corpus of CVs and job descriptions against one or more Ollama
+models and reports latency, tokens/sec and agreement with reference outputs.
+
+Run from the backend/ directory (so the app modules and .env are picked up):
+
+    python -m benchmarks.llm_benchmark --models llama3 llama3.2:3b phi3:mini
+    python -m benchmarks.llm_benchmark --models llama3 --write-reference
+    python -m benchmarks.llm_benchmark --models llama3 --prefix-cache both
+    python -m benchmarks.llm_benchmark --models llama3 --tasks jd_extraction --pipeline both
+
+Corpus layout (default: benchmarks/corpus):
+    cvs/        *.pdf, *.docx or *.txt candidate CVs
+    jds/        *.txt job descriptions
+    linkedin/   *.pdf or *.txt LinkedIn profile exports (optional)
+    reference/<task>/<name>.json   reference outputs used for agreement
+
+`--write-reference` stores the outputs of the first model as the reference set,
+so the usual workflow is: generate references once with the current production
+model (or hand-correct them), then compare cheaper models against them.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ai_services import prompts, utils, jd_matching_service
+from ai_services.llm_clients import ollama_client
+
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+# task -> (system prompt, schema, temperature). Temperatures mirror the production call sites.
+TASKS: Dict[str, Tuple[str, Dict[str, Any], float]] = {
+    ollama_client.TASK_CV_EXTRACTION: (prompts.system_prompt_candidate, prompts.cv_analysis_schema, 0.3),
+    ollama_client.TASK_JD_EXTRACTION: (prompts.system_prompt_job, prompts.jd_analysis_schema, 0.3),
+    ollama_client.TASK_LINKEDIN_EXTRACTION: (prompts.system_prompt_linkedin_pdf, prompts.linkedin_pdf_analysis_schema, 0.2),
+    ollama_client.TASK_MATCHING: (prompts.system_prompt_matching, prompts.matching_analysis_schema, 0.5),
+}
+
+
+# ---------------------------------------------------------------------------
+# Corpus loading
+# ---------------------------------------------------------------------------
+
+def _read_document(path: str) -> str:
+    if path.lower().endswith(".txt"):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    return utils.read_cv(path)
+
+
+def load_documents(directory: str) -> Dict[str, str]:
+    """Returns {document name: text} for every supported file in a corpus folder."""
+    documents: Dict[str, str] = {}
+    if not os.path.isdir(directory):
+        return documents
+    for filename in sorted(os.listdir(directory)):
+        if os.path.splitext(filename)[1].lower() not in (".txt", ".pdf", ".docx"):
+            continue
+        documents[os.path.splitext(filename)[0]] = _read_document(os.path.join(directory, filename))
+    return documents
+
+
+def _reference_path(corpus_dir: str, task: str, name: str) -> str:
+    return os.path.join(corpus_dir, "reference", task, f"{name}.json")
+
+
+def load_reference(corpus_dir: str, task: str, name: str) -> Optional[Dict[str, Any]]:
+    path = _reference_path(corpus_dir, task, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_reference(corpus_dir: str, task: str, name: str, output: Dict[str, Any]) -> None:
+    path = _reference_path(corpus_dir, task, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+
+
+# ---------------------------------------------------------------------------
+# Agreement scoring
+# ---------------------------------------------------------------------------
+
+def _normalize_item(item: Any) -> str:
+    if isinstance(item, dict):
+        # Experience/education entries: compare on their most identifying field.
+        item = item.get("title") or item.get("institution") or json.dumps(item, sort_keys=True)
+    return str(item).strip().lower()
+
+
+def _field_agreement(expected: Any, actual: Any) -> float:
+    if isinstance(expected, list):
+        if not isinstance(actual, list):
+            return 0.0
+        expected_set = {_normalize_item(i) for i in expected}
+        actual_set = {_normalize_item(i) for i in actual}
+        if not expected_set and not actual_set:
+            return 1.0
+        return len(expected_set & actual_set) / len(expected_set | actual_set)
+    if isinstance(expected, (int, float)) and not isinstance(expected, bool):
+        if not isinstance(actual, (int, float)):
+            return 0.0
+        scale = max(abs(expected), abs(actual), 1)
+        return max(0.0, 1.0 - abs(expected - actual) / scale)
+    return 1.0 if _normalize_item(expected) == _normalize_item(actual) else 0.0
+
+
+def agreement(task: str, reference: Dict[str, Any], output: Dict[str, Any]) -> float:
+    """
+    Scores (0-1) how closely an output matches the reference for a task.
+    Matching is scored on match_score distance (out of 100); extraction tasks
+    average a per-field score over the schema's required fields.
+    """
+    if task == ollama_client.TASK_MATCHING:
+        try:
+            return max(0.0, 1.0 - abs(int(reference["match_score"]) - int(output["match_score"])) / 100)
+        except (KeyError, TypeError, ValueError):
+            return 0.0
+
+    fields = TASKS[task][1].get("required", list(reference.keys()))
+    scores = [
+        _field_agreement(reference.get(field), output.get(field)) if field in output else 0.0
+        for field in fields
+    ]
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _build_cases(corpus_dir: str, reference_model_outputs: Dict[str, Dict[str, Any]]) -> List[Tuple[str, str, str]]:
+    """
+    Returns (task, case name, user content) tuples for the whole corpus.
+    Matching cases pair every CV with every JD, using the reference extractions
+    as input so that only the matching step is measured.
+    """
+    cases: List[Tuple[str, str, str]] = []
+    cvs = load_documents(os.path.join(corpus_dir, "cvs"))
+    jds = load_documents(os.path.join(corpus_dir, "jds"))
+    linkedin = load_documents(os.path.join(corpus_dir, "linkedin"))
+
+    cases += [(ollama_client.TASK_CV_EXTRACTION, name, text) for name, text in cvs.items()]
+    cases += [(ollama_client.TASK_JD_EXTRACTION, name, text) for name, text in jds.items()]
+    cases += [(ollama_client.TASK_LINKEDIN_EXTRACTION, name, text) for name, text in linkedin.items()]
+
+    for cv_name in cvs:
+        for jd_name in jds:
+            cv_data = load_reference(corpus_dir, ollama_client.TASK_CV_EXTRACTION, cv_name) \
+                or reference_model_outputs.get(f"{ollama_client.TASK_CV_EXTRACTION}/{cv_name}")
+            jd_data = load_reference(corpus_dir, ollama_client.TASK_JD_EXTRACTION, jd_name) \
+                or reference_model_outputs.get(f"{ollama_client.TASK_JD_EXTRACTION}/{jd_name}")
+            if cv_data is None or jd_data is None:
+                continue
+            content = jd_matching_service.build_match_content(cv_data, jd_data)
+            cases.append((ollama_client.TASK_MATCHING, f"{cv_name}__{jd_name}", content))
+    return cases
+
+
+def run_case(model: str, task: str, content: str, stream: bool = False,
+             prefix_cache: bool = True) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    system_prompt, schema, temperature = TASKS[task]
+    try:
+        return ollama_client.invoke_ollama_json_with_metrics(
+            model_name=model,
+            system_prompt=system_prompt,
+            user_content=content,
+            temperature=temperature,
+            stream=stream,
+            schema=schema,
+            prefix_cache=prefix_cache
+        )
+    except (ValueError, RuntimeError) as e:
+        return None, {"model": model, "error": str(e)}
+
+
+def benchmark(models: List[str], corpus_dir: str, tasks: List[str], repeat: int, write_refs: bool,
+              stream: bool = False, prefix_cache_modes: Tuple[bool, ...] = (True,),
+              pipelines: Tuple[str, ...] = ()) -> List[Dict[str, Any]]:
+    """
+    Runs every case against every model (and every prefix-cache mode) and returns
+    one result row per call. When pipeline modes are given, every CV/JD pair is
+    also run end to end through each mode (one row per pair and mode).
+    """
+    results: List[Dict[str, Any]] = []
+    first_model_outputs: Dict[str, Dict[str, Any]] = {}
+
+    for model_index, model in enumerate(models):
+        for prefix_cache in prefix_cache_modes:
+            results += _run_model(model, model_index == 0, corpus_dir, tasks, repeat, write_refs,
+                                  stream, prefix_cache, first_model_outputs)
+            for mode in pipelines:
+                results += _run_pipeline(model, mode, corpus_dir, repeat, stream, prefix_cache, first_model_outputs)
+    return results
+
+
+def _run_model(model: str, is_baseline: bool, corpus_dir: str, tasks: List[str], repeat: int, write_refs: bool,
+               stream: bool, prefix_cache: bool, first_model_outputs: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    # Extraction cases run first so their outputs can feed the matching cases.
+    for task_group in ([t for t in tasks if t != ollama_client.TASK_MATCHING],
+                       [t for t in tasks if t == ollama_client.TASK_MATCHING]):
+        for task, name, content in _build_cases(corpus_dir, first_model_outputs):
+            if task not in task_group:
+                continue
+            for _ in range(repeat):
+                output, metrics = run_case(model, task, content, stream=stream, prefix_cache=prefix_cache)
+                reference = load_reference(corpus_dir, task, name)
+                if output is not None and is_baseline:
+                    first_model_outputs.setdefault(f"{task}/{name}", output)
+                    if write_refs and reference is None:
+                        write_reference(corpus_dir, task, name, output)
+                        reference = output
+                row = {"model": model, "task": task, "case": name, **metrics, "prefix_cache": prefix_cache}
+                row["ok"] = output is not None
+                row["agreement"] = agreement(task, reference, output) if (output is not None and reference) else None
+                results.append(row)
+                print(f"  {model:<20} {task:<20} {name:<30} cache={'on ' if prefix_cache else 'off'} "
+                      f"{'ok ' if row['ok'] else 'ERR'} {metrics.get('latency_s') or 0:6.2f}s", file=sys.stderr)
+    return results
+
+
+def run_pipeline_case(model: str, mode: str, cv_text: str, jd_analysis: Dict[str, Any], stream: bool,
+                      prefix_cache: bool) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Runs one CV through the analysis pipeline against an already-analyzed JD
+    (the JD analysis is cached per job in production, so it is not timed).
+
+    "multi" makes a CV extraction call followed by a match call; "fused" makes a
+    single combined call. Returns (cv_analysis, match_result, summed metrics).
+    """
+    if mode == "fused":
+        content = jd_matching_service.build_fused_content(cv_text, jd_analysis)
+        try:
+            output, metrics = ollama_client.invoke_ollama_json_with_metrics(
+                model_name=model,
+                system_prompt=prompts.system_prompt_fused,
+                user_content=content,
+                temperature=0.3,
+                stream=stream,
+                schema=prompts.fused_analysis_schema,
+                prefix_cache=prefix_cache
+            )
+        except (ValueError, RuntimeError) as e:
+            return None, None, {"model": model, "error": str(e)}
+        metrics["calls"] = 1
+        return output.get("candidate"), output.get("match"), metrics
+
+    cv_output, cv_metrics = run_case(model, ollama_client.TASK_CV_EXTRACTION, cv_text, stream, prefix_cache)
+    if cv_output is None:
+        return None, None, cv_metrics
+    match_content = jd_matching_service.build_match_content(cv_output, jd_analysis)
+    match_output, match_metrics = run_case(model, ollama_client.TASK_MATCHING, match_content, stream, prefix_cache)
+    if match_output is None:
+        return cv_output, None, match_metrics
+
+    metrics: Dict[str, Any] = {"model": model, "calls": 2}
+    for key in ("latency_s", "prompt_eval_duration_ns", "eval_count", "eval_duration_ns"):
+        values = [m.get(key) for m in (cv_metrics, match_metrics)]
+        metrics[key] = sum(values) if all(v is not None for v in values) else None
+    if metrics["eval_count"] and metrics["eval_duration_ns"]:
+        metrics["tokens_per_sec"] = metrics["eval_count"] / (metrics["eval_duration_ns"] / 1e9)
+    metrics["ttft_s"] = cv_metrics.get("ttft_s")
+    return cv_output, match_output, metrics
+
+
+def _run_pipeline(model: str, mode: str, corpus_dir: str, repeat: int, stream: bool, prefix_cache: bool,
+                  first_model_outputs: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    cvs = load_documents(os.path.join(corpus_dir, "cvs"))
+    jds = load_documents(os.path.join(corpus_dir, "jds"))
+    task = f"pipeline_{mode}"
+
+    for jd_name in jds:
+        jd_analysis = load_reference(corpus_dir, ollama_client.TASK_JD_EXTRACTION, jd_name) \
+            or first_model_outputs.get(f"{ollama_client.TASK_JD_EXTRACTION}/{jd_name}")
+        if jd_analysis is None:
+            print(f"  skipping {jd_name}: no JD reference (run with --write-reference first)", file=sys.stderr)
+            continue
+        for cv_name, cv_text in cvs.items():
+            name = f"{cv_name}__{jd_name}"
+            for _ in range(repeat):
+                cv_output, match_output, metrics = run_pipeline_case(model, mode, cv_text, jd_analysis, stream, prefix_cache)
+                ok = cv_output is not None and match_output is not None
+                scores = []
+                cv_reference = load_reference(corpus_dir, ollama_client.TASK_CV_EXTRACTION, cv_name)
+                match_reference = load_reference(corpus_dir, ollama_client.TASK_MATCHING, name)
+                if ok and cv_reference:
+                    scores.append(agreement(ollama_client.TASK_CV_EXTRACTION, cv_reference, cv_output))
+                if ok and match_reference:
+                    scores.append(agreement(ollama_client.TASK_MATCHING, match_reference, match_output))
+                row = {"model": model, "task": task, "case": name, **metrics, "prefix_cache": prefix_cache}
+                row["ok"] = ok
+                row["agreement"] = sum(scores) / len(scores) if scores else None
+                results.append(row)
+                print(f"  {model:<20} {task:<20} {name:<30} cache={'on ' if prefix_cache else 'off'} "
+                      f"{'ok ' if ok else 'ERR'} {metrics.get('latency_s') or 0:6.2f}s", file=sys.stderr)
+    return results
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Aggregates per (model, task, prefix-cache mode): success rate, latency,
+    prompt-eval time, tokens/sec and mean agreement.
+    """
+    groups: Dict[Tuple[str, str, bool], List[Dict[str, Any]]] = {}
+    for row in results:
+        groups.setdefault((row["model"], row["task"], row["prefix_cache"]), []).append(row)
+
+    summary = []
+    for (model, task, prefix_cache), rows in groups.items():
+        ok_rows = [r for r in rows if r["ok"]]
+        latencies = [r["latency_s"] for r in ok_rows if r.get("latency_s") is not None]
+        tps = [r["tokens_per_sec"] for r in ok_rows if r.get("tokens_per_sec")]
+        ttfts = [r["ttft_s"] for r in ok_rows if r.get("ttft_s") is not None]
+        prompt_evals = [r["prompt_eval_duration_ns"] / 1e9 for r in ok_rows if r.get("prompt_eval_duration_ns") is not None]
+        agreements = [r["agreement"] for r in ok_rows if r.get("agreement") is not None]
+        summary.append({
+            "model": model,
+            "task": task,
+            "prefix_cache": prefix_cache,
+            "runs": len(rows),
+            "success_rate": len(ok_rows) / len(rows),
+            "latency_mean_s": statistics.mean(latencies) if latencies else None,
+            "latency_p95_s": _percentile(latencies, 95) if latencies else None,
+            "prompt_eval_mean_s": statistics.mean(prompt_evals) if prompt_evals else None,
+            "tokens_per_sec": statistics.mean(tps) if tps else None,
+            "ttft_mean_s": statistics.mean(ttfts) if ttfts else None,
+            "aborted": sum(1 for r in rows if r.get("aborted")),
+            "agreement": statistics.mean(agreements) if agreements else None,
+        })
+    return sorted(summary, key=lambda s: (s["task"], s["model"], not s["prefix_cache"]))
+
+
+def print_summary(summary: List[Dict[str, Any]]) -> None:
+    def fmt(value: Optional[float], spec: str) -> str:
+        return format(value, spec) if value is not None else "-"
+
+    header = (f"{'task':<20} {'model':<20} {'cache':>5} {'runs':>4} {'ok%':>5} {'mean s':>7} {'p95 s':>7} "
+              f"{'pe s':>7} {'ttft s':>7} {'tok/s':>7} {'agree':>6}")
+    print(header)
+    print("-" * len(header))
+    for s in summary:
+        print(f"{s['task']:<20} {s['model']:<20} {'on' if s['prefix_cache'] else 'off':>5} {s['runs']:>4} "
+              f"{s['success_rate'] * 100:>5.0f} {fmt(s['latency_mean_s'], '7.2f')} {fmt(s['latency_p95_s'], '7.2f')} "
+              f"{fmt(s['prompt_eval_mean_s'], '7.2f')} {fmt(s['ttft_mean_s'], '7.2f')} "
+              f"{fmt(s['tokens_per_sec'], '7.1f')} {fmt(s['agreement'], '6.2f')}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Ollama models on the XCalibr LLM tasks.")
+    parser.add_argument("--models", nargs="+", required=True, help="Models to compare. The first one is the baseline.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="Corpus directory.")
+    parser.add_argument("--tasks", nargs="+", default=list(TASKS.keys()), choices=list(TASKS.keys()))
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case (for latency variance).")
+    parser.add_argument("--write-reference", action="store_true", help="Store the first model's outputs as missing references.")
+    parser.add_argument("--stream", action="store_true", help="Use the streaming client (reports time-to-first-token).")
+    parser.add_argument("--prefix-cache", choices=["on", "off", "both"], default="on",
+                        help="Prompt-prefix reuse mode; 'both' runs every case in each mode to compare prompt-eval time.")
+    parser.add_argument("--pipeline", choices=["none", "multi", "fused", "both"], default="none",
+                        help="Also run every CV/JD pair end to end in the multi-call and/or fused pipeline mode.")
+    parser.add_argument("--json", dest="json_out", help="Optional path to write raw results and summary as JSON.")
+    args = parser.parse_args(argv)
+
+    prefix_cache_modes = {"on": (True,), "off": (False,), "both": (True, False)}[args.prefix_cache]
+    pipelines = {"none": (), "multi": ("multi",), "fused": ("fused",), "both": ("multi", "fused")}[args.pipeline]
+    results = benchmark(args.models, args.corpus, args.tasks, args.repeat, args.write_reference,
+                        stream=args.stream, prefix_cache_modes=prefix_cache_modes, pipelines=pipelines)
+    summary = summarize(results)
+    print_summary(summary)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/query_budget.py
+"""
+Query-budget check for hot endpoints: calls each endpoint in-process and fails
+if it runs more SQL statements than its budget, as counted by query_stats
+(the X-DB-Query-Count debug header, enabled here).
+Catches N+1 regressions, e.g. a list endpoint that lazy-loads one relationship per row.
+
+Run from the backend/ directory against a database with some data:
+
+    python -m benchmarks.query_budget --hr-token <jwt> --admin-token <jwt> --candidate-token <jwt>
+    python -m benchmarks.query_budget --job-id 12
+
+Endpoints whose token is not given are skipped. Exits with status 1 if any
+endpoint is over budget, so it can run in CI. The public endpoints are also
+checked by tests/test_query_budget.py through the `query_budget` fixture.
+"""
+import argparse
+import os
+import sys
+from typing import List, Optional, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import query_stats  # noqa: E402
+from config import settings  # noqa: E402
+
+settings.DEBUG_QUERY_HEADERS = True
+settings.DASHBOARD_CACHE_TTL_SECONDS = 0  # Measure the real queries, not cache hits
+
+from main import app  # noqa: E402
+
+# (role, path, budget). "{job_id}" is filled from --job-id. Budgets include the auth lookup.
+BUDGETS: List[Tuple[Optional[str], str, int]] = [
+    (None, "/jobs/", 1),
+    (None, "/jobs/{job_id}", 1),
+    ("hr", "/hr/dashboard/kpis", 3),
+    ("hr", "/hr/dashboard/job-summaries", 3),
+    ("hr", "/hr/dashboard/applicant-volume", 3),
+    ("hr", "/hr/my-applicants/list", 3),
+    ("hr", "/hr-views/jobs/{job_id}/rankings", 3),
+    ("hr", "/hr-views/candidates/scores?fields=reportid,overall_score", 1),
+    ("admin", "/api/admin/candidates", 2),
+    ("admin", "/admin-dashboard/hr-activity", 2),
+    ("admin", "/admin-dashboard/kpis", 6),
+    ("candidate", "/candidates/me", 2),
+    ("candidate", "/candidates/my-feedback", 2),
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fail when hot endpoints exceed their SQL query budget.")
+    parser.add_argument("--hr-token")
+    parser.add_argument("--admin-token")
+    parser.add_argument("--candidate-token")
+    parser.add_argument("--job-id", type=int, default=1)
+    args = parser.parse_args()
+
+    tokens = {"hr": args.hr_token, "admin": args.admin_token, "candidate": args.candidate_token}
+    client = TestClient(app)
+    failures = 0
+
+    for role, path, budget in BUDGETS:
+        if role is not None and not tokens[role]:
+            print(f"SKIP  {path} (no --{role}-token)")
+            continue
+        headers = {"Authorization": f"Bearer {tokens[role]}"} if role else {}
+        url = path.format(job_id=args.job_id)
+        response = client.get(url, headers=headers)
+        count = int(response.headers[query_stats.QUERY_COUNT_HEADER])
+        db_ms = response.headers[query_stats.QUERY_TIME_HEADER]
+        over = count > budget
+        failures += over
+        print(f"{'FAIL' if over else 'OK  '}  {url}  HTTP {response.status_code}  {count}/{budget} queries  {db_ms} ms")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
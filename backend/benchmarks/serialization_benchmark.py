@@ -0,0 +1,140 @@
+# benchmarks/serialization_benchmark.py
+"""
+Before/after timing of list-response serialization on synthetic rows
+(no database needed), plus the size and cost of compressing the result.
+
+    before   per-row `schemas.CandidateRead.model_validate(...)`, then
+             jsonable_encoder + json.dumps, as the list endpoints used to do
+    bulk     serialization.validate_list + TypeAdapter.dump_json (one
+             pydantic-core call each), as admin /candidates does now
+    trusted  plain column mappings rendered by orjson without validation,
+             as hr /my-applicants/list does now
+
+Run from the backend/ directory:
+
+    python -m benchmarks.serialization_benchmark
+    python -m benchmarks.serialization_benchmark --rows 50000 --repeat 10
+"""
+import argparse
+import datetime
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import Callable, List
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import orjson  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+import schemas  # noqa: E402
+import serialization  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_candidates(n: int) -> List[SimpleNamespace]:
+    """Attribute-style rows shaped like models.Candidates."""
+    registered = datetime.datetime(2025, 1, 1, 9, 30)
+    return [
+        SimpleNamespace(
+            candid=i,
+            firstname=f"First{i}",
+            lastname=f"Last{i}",
+            email=f"candidate{i}@example.com",
+            contactinfo="+1 555 0100",
+            resumelink=f"static/resumes/{i}.pdf",
+            github_link=f"https://github.com/user{i}",
+            sop_link=None,
+            linkedin_link=f"https://linkedin.com/in/user{i}",
+            linkedin_pdf_link=None,
+            leetcode_link=f"https://leetcode.com/user{i}",
+            current_title="Software Engineer",
+            years_of_experience="3-5",
+            professional_summary="Backend engineer working on APIs and data pipelines. " * 3,
+            skills="python, sql, fastapi, postgres, docker",
+            dateregistered=registered + datetime.timedelta(minutes=i),
+            is_active=True,
+        )
+        for i in range(n)
+    ]
+
+
+def before(rows: List[SimpleNamespace]) -> bytes:
+    items = []
+    for row in rows:
+        item = schemas.CandidateRead.model_validate(row)
+        item.applications_count = 2
+        items.append(item)
+    return json.dumps(jsonable_encoder(items)).encode("utf-8")
+
+
+def bulk(rows: List[SimpleNamespace]) -> bytes:
+    items = serialization.validate_list(schemas.CandidateRead, rows)
+    for item in items:
+        item.applications_count = 2
+    return serialization.list_adapter(schemas.CandidateRead).dump_json(items)
+
+
+def trusted(rows: List[SimpleNamespace]) -> bytes:
+    mappings = [
+        {"candid": r.candid, "firstname": r.firstname, "lastname": r.lastname, "email": r.email,
+         "application_id": r.candid, "job_id": 1, "job_title": "Backend Engineer"}
+        for r in rows
+    ]
+    return serialization.trusted_response(mappings).body
+
+
+def timed(fn: Callable[[], bytes], repeat: int):
+    timings, result = [], b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare list-response serialization paths.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Rows per response.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per path (median is reported).")
+    args = parser.parse_args()
+
+    rows = make_candidates(args.rows)
+    print(f"{args.rows} rows, median of {args.repeat} runs\n")
+    print(f"{'path':<10}{'ms':>10}{'bytes':>12}{'speedup':>10}")
+
+    baseline_ms = None
+    bodies = {}
+    for name, fn in (("before", before), ("bulk", bulk), ("trusted", trusted)):
+        ms, body = timed(lambda: fn(rows), args.repeat)
+        bodies[name] = body
+        baseline_ms = baseline_ms or ms
+        print(f"{name:<10}{ms:>10.1f}{len(body):>12}{baseline_ms / ms:>9.1f}x")
+
+    if orjson.loads(bodies["before"]) != orjson.loads(bodies["bulk"]):
+        print("\nERROR: bulk output differs from the per-row output")
+        return 1
+
+    body = bodies["bulk"]
+    print(f"\ncompression of the bulk body ({len(body)} bytes)")
+    codecs = [("gzip-6", lambda: gzip.compress(body, compresslevel=6))]
+    if brotli is not None:
+        codecs.append(("br-4", lambda: brotli.compress(body, quality=4)))
+    else:
+        print("(install 'brotli' to include br)")
+    for name, fn in codecs:
+        ms, compressed = timed(fn, args.repeat)
+        print(f"{name:<10}{ms:>10.1f}{len(compressed):>12}{len(body) / len(compressed):>9.1f}x smaller")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
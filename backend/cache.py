@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from config import settings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class MemoryCache:
+    """
+    In-process TTL cache for byte values with scope-based invalidation.
+
+    Invalidation does not delete entries: each scope has a generation number
+    that callers embed in their keys (see `key_for`), so bumping it makes every
+    older entry of that scope unreachable; those entries then age out of the LRU.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl_s: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generations(self, scopes: List[str]) -> List[int]:
+        with self._lock:
+            return [self._generations.get(scope, 0) for scope in scopes]
+
+    def invalidate(self, scopes: Iterable[str]) -> None:
+        with self._lock:
+            for scope in scopes:
+                self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+class RedisCache:
+    """
+    Same interface as MemoryCache, backed by Redis so that every API worker
+    shares entries and invalidations.
+    """
+
+    def __init__(self, url: str, prefix: str = "xcalibr:cache:"):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl_s: float) -> None:
+        self.client.set(self.prefix + key, value, px=max(int(ttl_s * 1000), 1))
+
+    def generations(self, scopes: List[str]) -> List[int]:
+        if not scopes:
+            return []
+        values = self.client.mget([f"{self.prefix}gen:{scope}" for scope in scopes])
+        return [int(value) if value is not None else 0 for value in values]
+
+    def invalidate(self, scopes: Iterable[str]) -> None:
+        pipe = self.client.pipeline()
+        for scope in scopes:
+            pipe.incr(f"{self.prefix}gen:{scope}")
+        pipe.execute()
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class _FailSafeCache:
+    """
+    Wraps the shared backend so a Redis outage degrades to cache misses
+    instead of failing requests.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __getattr__(self, name):
+        method = getattr(self.backend, name)
+
+        def call(*args, **kwargs):
+            try:
+                return method(*args, **kwargs)
+            except Exception as e:
+                logger.warning(f"Shared cache unavailable ({name}): {e}")
+                return [0] * len(args[0]) if name == "generations" else None
+
+        return call
+
+
+def key_for(cache, namespace: str, scopes: List[str], *parts) -> str:
+    """
+    Builds a cache key that includes the current generation of each scope,
+    so `cache.invalidate(scopes)` makes it stale immediately.
+    """
+    generations = cache.generations(scopes)
+    scope_part = ",".join(f"{scope}@{generation}" for scope, generation in zip(scopes, generations))
+    return f"{namespace}|{scope_part}|" + "|".join(str(part) for part in parts)
+
+
+def _create_cache():
+    if settings.CACHE_REDIS_URL:
+        if redis is None:
+            logger.warning("CACHE_REDIS_URL is set but the 'redis' package is not installed; using the in-process cache.")
+        else:
+            return _FailSafeCache(RedisCache(settings.CACHE_REDIS_URL))
+    return MemoryCache(max_entries=settings.CACHE_MAX_ENTRIES)
+
+
+cache = _create_cache()
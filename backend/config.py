@@ -1,12 +1,157 @@
 from pydantic_settings import BaseSettings
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
-    
+
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 # Token will be valid for 1 hour
     database_url: str
+    # Async routes derive postgresql+psycopg://... from database_url unless this is set.
+    async_database_url: Optional[str] = None
+    # Optional comma-separated read replicas for read-only routes.
+    database_replica_urls: Optional[str] = None
+
+    # --- LLM model routing ---
+    # Model used for any task that has no entry in LLM_TASK_MODELS.
+    LLM_DEFAULT_MODEL: str = "llama3"
+    # Task -> Ollama model table.
+    # Tasks: cv_extraction, jd_extraction, linkedin_extraction, matching, fused_analysis.
+    # Can be overridden from .env as JSON, e.g. LLM_TASK_MODELS='{"cv_extraction": "llama3.2:3b"}'
+    LLM_TASK_MODELS: Dict[str, str] = {
+        "cv_extraction": "llama3",
+        "jd_extraction": "llama3",
+        "linkedin_extraction": "llama3",
+        "matching": "llama3",
+        "fused_analysis": "llama3",
+    }
+    # Consume Ollama responses as a token stream: stops reading once the JSON object
+    # closes and aborts generations that diverge from the expected schema.
+    LLM_STREAMING: bool = False
+    # Keep system prompts as a stable prefix so Ollama can reuse its cached KV state
+    # across calls of the same task. Set to false only to measure the difference.
+    LLM_PREFIX_CACHE: bool = True
+    # How long Ollama keeps a model (and its prompt cache) loaded after a call.
+    LLM_KEEP_ALIVE: str = "30m"
+    # Fixed context size per call; None uses the model default. Changing it reloads the model.
+    LLM_NUM_CTX: Optional[int] = None
+
+    # --- Analysis pipeline ---
+    # "multi": separate CV extraction and CV-JD match calls.
+    # "fused": one call extracts the CV and scores it against the cached JD analysis.
+    ANALYSIS_PIPELINE_MODE: str = "multi"
+    # Number of JD analyses kept in the in-process cache (keyed by description text).
+    JD_ANALYSIS_CACHE_SIZE: int = 256
+    # Batched matching ("multi" mode): concurrent analyses for the same job are scored
+    # together in one call of up to MATCH_BATCH_SIZE candidates. 1 disables batching.
+    MATCH_BATCH_SIZE: int = 1
+    # How long the first analysis of a batch waits for others to join.
+    MATCH_BATCH_WAIT_SECONDS: float = 2.0
+
+    # --- Dashboard counters ---
+    # How often the background refresher recomputes the rolling 7-day applicant counts (0 disables it).
+    COUNTERS_REFRESH_SECONDS: int = 300
+    # Every N refresher runs, rebuild all counters from the base tables instead (0 = never).
+    COUNTERS_REBUILD_EVERY: int = 288
+
+    # --- Response cache ---
+    # TTL of cached dashboard responses (0 disables caching; ETags are still sent).
+    DASHBOARD_CACHE_TTL_SECONDS: float = 15.0
+    # Max entries of the in-process cache.
+    CACHE_MAX_ENTRIES: int = 2048
+    # Optional Redis URL to share the cache (and invalidations) between workers; needs the 'redis' package.
+    CACHE_REDIS_URL: Optional[str] = None
+
+    # --- Auth ---
+    # How long the user row behind a token is cached (0 = look it up on every request). Suspensions,
+    # deletions and password changes invalidate it at once; with the in-process cache and several
+    # workers, the other workers notice within this many seconds.
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 10.0
+
+    # --- Audit log ---
+    # Buffered admin audit records (views, logins, failures) are inserted in batches by a
+    # background thread every AUDIT_LOG_FLUSH_SECONDS (0 = insert each one immediately).
+    AUDIT_LOG_FLUSH_SECONDS: float = 1.0
+    AUDIT_LOG_BATCH_SIZE: int = 500
+    # Records waiting beyond this are written synchronously by the request instead.
+    AUDIT_LOG_QUEUE_SIZE: int = 10000
+
+    # --- System log partitions ---
+    # How often to create upcoming monthly system_log partitions and archive expired ones
+    # (0 = never in the API processes; run `python log_partitions.py` from cron instead).
+    SYSTEM_LOG_MAINTENANCE_SECONDS: int = 86400
+    SYSTEM_LOG_PARTITIONS_AHEAD: int = 3
+    # Months of logs kept in the database (0 = keep forever). Older months are detached
+    # and written to SYSTEM_LOG_ARCHIVE_DIR as gzip-compressed CSV, then dropped.
+    SYSTEM_LOG_RETENTION_MONTHS: int = 12
+    SYSTEM_LOG_ARCHIVE_DIR: str = "archive/system_log"
+
+    # --- Password hashing ---
+    # Argon2id cost (memory in KiB). Defaults are argon2-cffi's (64 MiB, t=3, p=4), which
+    # existing hashes use; raise them to what `python -m benchmarks.argon2_calibration`
+    # suggests for the production hardware. Lowering them never rehashes stronger hashes.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    # Hashes run on this many dedicated threads; up to PASSWORD_HASH_MAX_QUEUE more requests wait,
+    # each at most PASSWORD_HASH_TIMEOUT_SECONDS. Anything beyond gets a 503 right away.
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 16
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = 5.0
+
+    # --- Rankings ---
+    # Store each analysis' rank within its job (refreshed when analyses complete) and read
+    # it directly, instead of computing RANK() over the job's analyses on every request.
+    RANKINGS_MATERIALIZED: bool = False
+    # Completed analyses mark their job for a rank refresh; each marked job is refreshed
+    # at most once per this many seconds (0 = refresh synchronously after every analysis).
+    RANKINGS_REFRESH_SECONDS: float = 5.0
+    # What-if re-rankings are cached per (job, weight vector) until an analysis for the job changes.
+    WHAT_IF_CACHE_TTL_SECONDS: float = 300.0
+
+    # --- Uploads ---
+    # Largest accepted upload (CVs, LinkedIn PDFs); larger ones get a 413.
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+
+    # --- Exports ---
+    # Rows fetched per server-side cursor round trip (and per NDJSON/CSV chunk / Parquet row group).
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # --- Database connection pools (per engine: primary, async primary, each replica) ---
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds to wait for a free connection before failing the request.
+    DB_POOL_TIMEOUT: float = 30.0
+    # Reconnect connections older than this (seconds); keep below server/PgBouncer idle timeouts.
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Set when connecting through PgBouncer in transaction pooling mode (disables prepared statements).
+    DB_PGBOUNCER: bool = False
+    # Log every SQL statement (debugging only; slow on the hot path).
+    DB_ECHO: bool = False
+    # Sampled slow-query log: statements slower than SLOW_QUERY_MS (0 = off), a SAMPLE_RATE fraction of them.
+    SLOW_QUERY_MS: float = 500.0
+    SLOW_QUERY_SAMPLE_RATE: float = 1.0
+    # Per-request query stats (query_stats.py): warn when a request runs more statements than this (0 = off),
+    # and with DEBUG_QUERY_HEADERS return X-DB-Query-Count / X-DB-Time-Ms / X-DB-Slowest-Ms. Never enable in production.
+    QUERY_COUNT_WARN: int = 50
+    QUERY_STATS_KEEP_SLOWEST: int = 5
+    DEBUG_QUERY_HEADERS: bool = False
+
+    # --- Read replicas (URLs in database_replica_urls) ---
+    # How long a replica that failed stays out of rotation before it is tried again.
+    REPLICA_RETRY_SECONDS: float = 30.0
+    # After a successful write, the client's reads go to the primary for this long (read-your-writes).
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    # --- Response compression ---
+    # Responses at least this large (bytes) are compressed: br when the client accepts it
+    # and the optional 'brotli-asgi' package is installed, gzip otherwise. 0 disables compression.
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESS_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+
     class Config:
         env_file = ".env"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
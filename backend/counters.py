@@ -0,0 +1,383 @@
+import argparse
+import datetime
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, Query
+from sqlalchemy import event, func, inspect, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import models
+from config import settings
+from database import AppSession, sessionLocal
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+NEW_APPLICANTS_WINDOW = datetime.timedelta(days=7)
+
+# Analysis status -> job_counters column. Statuses not listed here (e.g. "Completed") are not counted.
+# Keep in sync with the FILTER clauses in rebuild_job_counters().
+STATUS_COLUMNS = {
+    "Pending": "pending_analyses",
+    "Failed": "failed_analyses",
+    "In Progress": "in_progress_analyses",
+    "Processing": "in_progress_analyses",
+}
+
+
+# ---------------------------------------------------------------------------
+# Transactional maintenance
+# ---------------------------------------------------------------------------
+
+def _loaded(obj, attr: str):
+    """Reads an attribute of a deleted object without triggering a load (the row is already gone)."""
+    return inspect(obj).dict.get(attr)
+
+
+def _collect_deltas(session: Session) -> Dict[int, Dict[str, int]]:
+    """
+    Works out the counter changes implied by the objects being flushed.
+    Runs in after_flush, where new/dirty/deleted and attribute history still
+    describe the flush that just happened.
+    """
+    deltas: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    window_start = datetime.datetime.now() - NEW_APPLICANTS_WINDOW
+
+    for obj in session.new:
+        if isinstance(obj, models.Application):
+            deltas[obj.job_id]["total_applicants"] += 1
+            deltas[obj.job_id]["new_applicants_7d"] += 1
+        elif isinstance(obj, models.Analysis):
+            status = obj.analysis_status or "Pending"  # Column default
+            if status in STATUS_COLUMNS:
+                deltas[obj.job_id][STATUS_COLUMNS[status]] += 1
+
+    for obj in session.deleted:
+        job_id = _loaded(obj, "job_id")
+        if isinstance(obj, models.Application):
+            deltas[job_id]["total_applicants"] -= 1
+            applied_on = _loaded(obj, "applied_on")
+            if applied_on is None or applied_on >= window_start:
+                deltas[job_id]["new_applicants_7d"] -= 1
+        elif isinstance(obj, models.Analysis) and _loaded(obj, "analysis_status") in STATUS_COLUMNS:
+            deltas[job_id][STATUS_COLUMNS[_loaded(obj, "analysis_status")]] -= 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, models.Analysis):
+            continue
+        history = inspect(obj).attrs.analysis_status.history
+        if not history.has_changes():
+            continue
+        for old_status in history.deleted:
+            if old_status in STATUS_COLUMNS:
+                deltas[obj.job_id][STATUS_COLUMNS[old_status]] -= 1
+        for new_status in history.added:
+            if new_status in STATUS_COLUMNS:
+                deltas[obj.job_id][STATUS_COLUMNS[new_status]] += 1
+
+    # Counter rows of deleted jobs go away with the job (ON DELETE CASCADE).
+    deleted_job_ids = _deleted_job_ids(session)
+    return {
+        job_id: {column: value for column, value in columns.items() if value}
+        for job_id, columns in deltas.items()
+        if job_id is not None and job_id not in deleted_job_ids and any(columns.values())
+    }
+
+
+def _deleted_job_ids(session: Session) -> Set[int]:
+    return {_loaded(obj, "job_id") for obj in session.deleted if isinstance(obj, models.JobPosting)}
+
+
+def _collect_rollup_deltas(session: Session) -> Dict[Tuple[int, Optional[datetime.date]], int]:
+    """
+    Works out the daily_application_rollup changes for the flush. A day of None
+    means "today" (applied_on still holds its server default), resolved in SQL.
+    """
+    deltas: Dict[Tuple[int, Optional[datetime.date]], int] = defaultdict(int)
+    for obj in session.new:
+        if isinstance(obj, models.Application):
+            applied_on = inspect(obj).dict.get("applied_on")
+            deltas[(obj.job_id, applied_on.date() if applied_on else None)] += 1
+    for obj in session.deleted:
+        if isinstance(obj, models.Application):
+            applied_on = _loaded(obj, "applied_on")
+            if applied_on is not None:  # Unknown day: left to `rebuild_application_rollup`
+                deltas[(_loaded(obj, "job_id"), applied_on.date())] -= 1
+
+    deleted_job_ids = _deleted_job_ids(session)
+    return {
+        key: value for key, value in deltas.items()
+        if value and key[0] is not None and key[0] not in deleted_job_ids
+    }
+
+
+def _apply_rollup_deltas(session: Session, deltas: Dict[Tuple[int, Optional[datetime.date]], int]) -> None:
+    table = models.DailyApplicationRollup.__table__
+    for (job_id, day), value in sorted(deltas.items(), key=lambda item: (item[0][0], item[0][1] or datetime.date.max)):
+        stmt = insert(table).values(job_id=job_id, day=day if day else func.current_date(), count=max(value, 0))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.job_id, table.c.day],
+            set_={"count": func.greatest(table.c.count + value, 0)}
+        )
+        session.connection().execute(stmt)
+
+
+def _apply_deltas(session: Session, deltas: Dict[int, Dict[str, int]]) -> None:
+    table = models.JobCounters.__table__
+    for job_id in sorted(deltas):  # Fixed order so concurrent flushes lock rows consistently
+        columns = deltas[job_id]
+        stmt = insert(table).values(job_id=job_id, **{column: max(value, 0) for column, value in columns.items()})
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.job_id],
+            set_={
+                **{column: func.greatest(table.c[column] + value, 0) for column, value in columns.items()},
+                "updated_at": func.current_timestamp(),
+            }
+        )
+        session.connection().execute(stmt)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    deltas = _collect_deltas(session)
+    if deltas:
+        _apply_deltas(session, deltas)
+    rollup_deltas = _collect_rollup_deltas(session)
+    if rollup_deltas:
+        _apply_rollup_deltas(session, rollup_deltas)
+
+
+def register(session_factory=AppSession) -> None:
+    """
+    Keeps job_counters and daily_application_rollup in sync with every flush of
+    sessions from `session_factory` (by default every sync and async app session).
+    """
+    if not event.contains(session_factory, "after_flush", _after_flush):
+        event.listen(session_factory, "after_flush", _after_flush)
+
+
+# ---------------------------------------------------------------------------
+# Recomputation (rolling window + full rebuild)
+# ---------------------------------------------------------------------------
+
+def refresh_new_applicants(db: Session) -> None:
+    """
+    Recomputes the rolling 7-day applicant count of every job. Uses the
+    (job_id, applied_on) index, so the cost follows the last week's volume only.
+    """
+    db.execute(text("""
+        INSERT INTO job_counters (job_id, new_applicants_7d, updated_at)
+        SELECT jp.job_id, COUNT(a.application_id), now()
+        FROM job_posting jp
+        LEFT JOIN application a ON a.job_id = jp.job_id AND a.applied_on >= :window_start
+        GROUP BY jp.job_id
+        ON CONFLICT (job_id) DO UPDATE
+        SET new_applicants_7d = EXCLUDED.new_applicants_7d, updated_at = now()
+        WHERE job_counters.new_applicants_7d IS DISTINCT FROM EXCLUDED.new_applicants_7d
+    """), {"window_start": datetime.datetime.now() - NEW_APPLICANTS_WINDOW})
+    db.commit()
+
+
+def rebuild_job_counters(db: Session) -> None:
+    """
+    Recomputes every counter of every job from the base tables. Used for the
+    initial backfill and to correct drift from writes that bypass the ORM.
+    """
+    db.execute(text("""
+        INSERT INTO job_counters (job_id, total_applicants, new_applicants_7d,
+                                  pending_analyses, failed_analyses, in_progress_analyses, updated_at)
+        SELECT jp.job_id,
+               COALESCE(apps.total_applicants, 0),
+               COALESCE(apps.new_applicants_7d, 0),
+               COALESCE(an.pending_analyses, 0),
+               COALESCE(an.failed_analyses, 0),
+               COALESCE(an.in_progress_analyses, 0),
+               now()
+        FROM job_posting jp
+        LEFT JOIN (
+            SELECT job_id,
+                   COUNT(*) AS total_applicants,
+                   COUNT(*) FILTER (WHERE applied_on >= :window_start) AS new_applicants_7d
+            FROM application GROUP BY job_id
+        ) apps ON apps.job_id = jp.job_id
+        LEFT JOIN (
+            SELECT job_id,
+                   COUNT(*) FILTER (WHERE analysis_status = 'Pending') AS pending_analyses,
+                   COUNT(*) FILTER (WHERE analysis_status = 'Failed') AS failed_analyses,
+                   COUNT(*) FILTER (WHERE analysis_status IN ('In Progress', 'Processing')) AS in_progress_analyses
+            FROM analysis_report GROUP BY job_id
+        ) an ON an.job_id = jp.job_id
+        ON CONFLICT (job_id) DO UPDATE SET
+            total_applicants = EXCLUDED.total_applicants,
+            new_applicants_7d = EXCLUDED.new_applicants_7d,
+            pending_analyses = EXCLUDED.pending_analyses,
+            failed_analyses = EXCLUDED.failed_analyses,
+            in_progress_analyses = EXCLUDED.in_progress_analyses,
+            updated_at = now()
+    """), {"window_start": datetime.datetime.now() - NEW_APPLICANTS_WINDOW})
+    db.commit()
+
+
+def rebuild_application_rollup(db: Session, start_date: Optional[datetime.date] = None) -> None:
+    """
+    Recomputes daily_application_rollup from the application table, for every
+    day or only from `start_date` on. Used for the initial backfill.
+    """
+    params = {"start_date": start_date}
+    day_filter = "WHERE day >= :start_date" if start_date else ""
+    applied_filter = "AND applied_on >= :start_date" if start_date else ""
+    db.execute(text(f"DELETE FROM daily_application_rollup {day_filter}"), params)
+    db.execute(text(f"""
+        INSERT INTO daily_application_rollup (job_id, day, count)
+        SELECT job_id, CAST(applied_on AS DATE), COUNT(*)
+        FROM application
+        WHERE applied_on IS NOT NULL {applied_filter}
+        GROUP BY job_id, CAST(applied_on AS DATE)
+    """), params)
+    db.commit()
+
+
+class CountersRefresher:
+    """
+    Background thread that keeps the rolling-window counters current:
+    every `interval_s` it recomputes the 7-day applicant counts, and every
+    `rebuild_every` runs it does a full rebuild to absorb any drift.
+    """
+
+    def __init__(self, interval_s: int, rebuild_every: int):
+        self.interval_s = interval_s
+        self.rebuild_every = rebuild_every
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval_s <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="counters-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        runs = 0
+        while not self._stop.wait(self.interval_s):
+            runs += 1
+            db = sessionLocal()
+            try:
+                if self.rebuild_every > 0 and runs % self.rebuild_every == 0:
+                    rebuild_job_counters(db)
+                else:
+                    refresh_new_applicants(db)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Counters refresh failed: {e}", exc_info=True)
+            finally:
+                db.close()
+
+
+counters_refresher = CountersRefresher(
+    interval_s=settings.COUNTERS_REFRESH_SECONDS,
+    rebuild_every=settings.COUNTERS_REBUILD_EVERY
+)
+
+
+# ---------------------------------------------------------------------------
+# Dashboard reads
+# ---------------------------------------------------------------------------
+
+MAX_VOLUME_RANGE_DAYS = 366
+
+
+class DateRangeParams:
+    """
+    Date-range query parameters for the applicant-volume charts. Use as
+    `date_range: DateRangeParams = Depends()`. Either pass `days` (window ending
+    today) or an explicit `start_date`/`end_date`.
+    """
+
+    def __init__(
+        self,
+        days: int = Query(14, ge=1, le=MAX_VOLUME_RANGE_DAYS, description="Number of days ending today (e.g. 30, 90, 365)."),
+        start_date: Optional[datetime.date] = Query(None, description="First day of the range; overrides `days`."),
+        end_date: Optional[datetime.date] = Query(None, description="Last day of the range (default: today).")
+    ):
+        self.end_date = end_date or datetime.date.today()
+        self.start_date = start_date or self.end_date - datetime.timedelta(days=days - 1)
+        if self.start_date > self.end_date:
+            raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+        if (self.end_date - self.start_date).days + 1 > MAX_VOLUME_RANGE_DAYS:
+            raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_VOLUME_RANGE_DAYS} days")
+
+
+def applicant_volume(db: Session, start_date: datetime.date, end_date: datetime.date,
+                     hr_id: Optional[int] = None) -> List[Tuple[datetime.date, int]]:
+    """
+    Daily application counts from `start_date` to `end_date` (inclusive), with
+    zero-filled gaps, read from daily_application_rollup. Optionally limited to
+    the jobs of one HR. Cost depends on the range and the number of jobs, not on
+    the number of applications.
+    """
+    query = db.query(
+        models.DailyApplicationRollup.day,
+        func.sum(models.DailyApplicationRollup.count)
+    ).filter(
+        models.DailyApplicationRollup.day >= start_date,
+        models.DailyApplicationRollup.day <= end_date
+    )
+    if hr_id is not None:
+        query = query.join(
+            models.JobPosting, models.JobPosting.job_id == models.DailyApplicationRollup.job_id
+        ).filter(models.JobPosting.hr_id == hr_id)
+    counts = dict(query.group_by(models.DailyApplicationRollup.day).all())
+
+    days = (end_date - start_date).days + 1
+    return [
+        (start_date + datetime.timedelta(days=i), int(counts.get(start_date + datetime.timedelta(days=i)) or 0))
+        for i in range(days)
+    ]
+
+
+def hr_counters_query(db: Session):
+    """
+    Per-HR totals aggregated from job_counters; cost is O(jobs), independent of
+    the number of applications.
+    """
+    return db.query(
+        models.JobPosting.hr_id.label("hr_id"),
+        func.count(models.JobPosting.job_id).filter(models.JobPosting.status == "Active").label("active_jobs"),
+        func.coalesce(func.sum(models.JobCounters.total_applicants), 0).label("total_applicants"),
+        func.coalesce(func.sum(models.JobCounters.new_applicants_7d), 0).label("new_applicants_7d"),
+        func.coalesce(func.sum(models.JobCounters.pending_analyses), 0).label("pending_analyses"),
+        func.coalesce(func.sum(models.JobCounters.failed_analyses), 0).label("failed_analyses"),
+        func.coalesce(func.sum(models.JobCounters.in_progress_analyses), 0).label("in_progress_analyses"),
+    ).outerjoin(
+        models.JobCounters, models.JobCounters.job_id == models.JobPosting.job_id
+    ).group_by(
+        models.JobPosting.hr_id
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the pre-aggregated dashboard tables.")
+    parser.add_argument("command", choices=["rebuild", "refresh", "backfill-rollup"],
+                        help="rebuild: recompute all job counters; refresh: recompute the 7-day window only; "
+                             "backfill-rollup: recompute daily_application_rollup.")
+    parser.add_argument("--since", type=datetime.date.fromisoformat, default=None,
+                        help="backfill-rollup only: recompute days from this date (YYYY-MM-DD) on instead of all history.")
+    args = parser.parse_args()
+
+    session = sessionLocal()
+    try:
+        if args.command == "rebuild":
+            rebuild_job_counters(session)
+        elif args.command == "refresh":
+            refresh_new_applicants(session)
+        else:
+            rebuild_application_rollup(session, start_date=args.since)
+        print(f"{args.command} complete.")
+    finally:
+        session.close()
@@ -1,16 +1,54 @@
+import itertools
+import logging
 import os
+import threading
+import time
 from sqlalchemy.orm import sessionmaker,declarative_base,Session
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
-from typing import Generator
+from fastapi import Request
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, List, Optional, TypeVar
+
+from config import settings
+from pooling import engine_options, pool_stats
+from query_stats import instrument
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 database_url = os.getenv("database_url")
 if not database_url:
     raise RuntimeError("database_url not set in environment or .env")
-engine = create_engine(database_url,echo =True)
-sessionLocal= sessionmaker(autoflush=False,autocommit=False,bind=engine)
+
+# Async routes use psycopg 3's asyncio driver on the same database; override with async_database_url if needed.
+async_database_url = settings.async_database_url or make_url(database_url).set(drivername="postgresql+psycopg")
+
+# Optional comma-separated read replicas (streaming replicas of the primary) for read-only routes.
+replica_urls = [url.strip() for url in (settings.database_replica_urls or "").split(",") if url.strip()]
+
+T = TypeVar("T")
+
+
+class AppSession(Session):
+    """
+    Session class shared by sync sessions and the sync side of async sessions,
+    so event listeners registered on it (counters, response cache invalidation)
+    see the writes of both.
+    """
+
+
+engine = create_engine(database_url, **engine_options())
+sessionLocal= sessionmaker(class_=AppSession,autoflush=False,autocommit=False,bind=engine)
+
+async_engine = create_async_engine(async_database_url, **engine_options(is_async=True))
+# expire_on_commit=False: objects stay readable after commit without an implicit (and, in async code, illegal) reload.
+AsyncSessionLocal = async_sessionmaker(async_engine, sync_session_class=AppSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db() -> Generator[Session,None,None]:
@@ -18,4 +56,165 @@ def get_db() -> Generator[Session,None,None]:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for `async def` routes; the session never blocks the event loop."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# ---------------------------------------------------------------------------
+# Read replicas
+# ---------------------------------------------------------------------------
+
+class ReplicaSet:
+    """
+    Round-robin over the replica engines that are currently healthy.
+
+    A replica that fails to hand out a connection (or drops one) is taken out of
+    rotation for REPLICA_RETRY_SECONDS; with no healthy replica, reads go to the primary.
+    """
+
+    def __init__(self, engines: List[Engine], async_engines: list):
+        self.engines = engines
+        self.async_engines = async_engines
+        self._down_until: Dict[int, float] = {}
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        for index, replica in enumerate(engines):
+            event.listen(replica, "handle_error", self._error_listener(index))
+        for index, async_replica in enumerate(async_engines):
+            event.listen(async_replica.sync_engine, "handle_error", self._error_listener(index))
+
+    def _error_listener(self, index: int):
+        def on_error(context) -> None:
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(index, context.original_exception)
+        return on_error
+
+    def mark_down(self, index: int, reason: Any = None) -> None:
+        with self._lock:
+            self._down_until[index] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+        logger.warning(f"Read replica #{index} taken out of rotation for {settings.REPLICA_RETRY_SECONDS}s: {reason}")
+
+    def is_healthy(self, index: int) -> bool:
+        return self._down_until.get(index, 0.0) <= time.monotonic()
+
+    def pick(self) -> Optional[int]:
+        """Index of the next healthy replica, or None to use the primary."""
+        if not self.engines:
+            return None
+        start = next(self._next)
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if self.is_healthy(index):
+                return index
+        return None
+
+
+replicas = ReplicaSet(
+    [create_engine(url, **engine_options()) for url in replica_urls],
+    [create_async_engine(make_url(url).set(drivername="postgresql+psycopg"), **engine_options(is_async=True)) for url in replica_urls],
+)
+
+for _engine in [engine, async_engine.sync_engine] + replicas.engines + [e.sync_engine for e in replicas.async_engines]:
+    instrument(_engine)
+
+# Read-your-writes: after a successful write the response carries this header (epoch
+# seconds); clients echo it back on later requests and, until then, read from the primary.
+# Any client can send a future timestamp to force primary reads.
+READ_PRIMARY_HEADER = "X-Read-Primary-Until"
+
+
+def _wants_primary(request: Request) -> bool:
+    try:
+        return float(request.headers.get(READ_PRIMARY_HEADER, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def mark_primary_reads(request: Request, response) -> None:
+    """
+    Called for every response (middleware in main.py): after a successful
+    mutation, tells the client to read from the primary for READ_YOUR_WRITES_SECONDS
+    so it sees its own change despite replication lag.
+    """
+    if not replicas.engines or request.method in ("GET", "HEAD", "OPTIONS") or response.status_code >= 400:
+        return
+    response.headers[READ_PRIMARY_HEADER] = f"{time.time() + settings.READ_YOUR_WRITES_SECONDS:.3f}"
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    `get_db` for read-only routes: the session is bound to a healthy replica
+    (primary as fallback, or for read-your-writes). Never write through it.
+    """
+    index = None if _wants_primary(request) else replicas.pick()
+    if index is not None:
+        db = sessionLocal(bind=replicas.engines[index])
+        try:
+            db.connection()  # Check out now, so an unreachable replica falls back to the primary
+        except DBAPIError as e:
+            db.close()
+            replicas.mark_down(index, e)
+            index = None
+    if index is None:
+        db = sessionLocal()
+    db.info["replica"] = index
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """`get_async_db` for read-only async routes, with the same replica selection as `get_read_db`."""
+    index = None if _wants_primary(request) else replicas.pick()
+    if index is not None:
+        db = AsyncSessionLocal(bind=replicas.async_engines[index])
+        try:
+            await db.connection()
+        except DBAPIError as e:
+            await db.close()
+            replicas.mark_down(index, e)
+            index = None
+    if index is None:
+        db = AsyncSessionLocal()
+    async with db:
+        yield db
+
+
+def pool_metrics() -> List[Dict[str, Any]]:
+    """
+    Connection pool state of every engine (primary and replicas, sync and async):
+    size, in use, overflow, and checkout latency/timeouts (see pooling.py).
+    """
+    metrics = [
+        {"engine": "primary", "healthy": True, **pool_stats(engine.pool)},
+        {"engine": "primary-async", "healthy": True, **pool_stats(async_engine.sync_engine.pool)},
+    ]
+    for index, (replica, async_replica) in enumerate(zip(replicas.engines, replicas.async_engines)):
+        healthy = replicas.is_healthy(index)
+        metrics.append({"engine": f"replica-{index}", "healthy": healthy, **pool_stats(replica.pool)})
+        metrics.append({"engine": f"replica-{index}-async", "healthy": healthy, **pool_stats(async_replica.sync_engine.pool)})
+    return metrics
+
+
+async def run_in_sync_session(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs sync, blocking code such as the analysis pipeline (LLM calls, sync ORM)
+    from an async route: `fn(db, *args, **kwargs)` is called in the threadpool
+    with its own sync session, which is closed afterwards. Return plain data or
+    validated schemas, not ORM objects, since the session is gone by then.
+    """
+    def call() -> T:
+        db = sessionLocal()
+        try:
+            return fn(db, *args, **kwargs)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    return await run_in_threadpool(call)
@@ -0,0 +1,143 @@
+import csv
+import datetime
+import io
+import logging
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import orjson
+from fastapi import HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query as OrmQuery, Session
+
+from config import settings
+from database import sessionLocal
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+EXPORT_FORMATS = ("ndjson", "csv", "parquet")
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# (column name, kind). The kind only matters for Parquet, whose schema must be fixed up front.
+Columns = List[Tuple[str, str]]
+
+
+class ExportParams:
+    """
+    Query parameters for streaming export endpoints. Use as `export: ExportParams = Depends()`.
+    """
+
+    def __init__(self, format: str = Query("ndjson", description="One of: ndjson, csv, parquet.")):
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported export format '{format}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+        if format == "parquet" and pa is None:
+            raise HTTPException(status_code=501, detail="Parquet export needs the 'pyarrow' package on the server.")
+        self.format = format
+
+
+def _batches(query: OrmQuery, columns: Columns) -> Iterator[List[Dict[str, Any]]]:
+    # yield_per streams from a server-side cursor: only one batch of rows is in memory at a time
+    names = [name for name, _ in columns]
+    rows = iter(query.yield_per(settings.EXPORT_BATCH_SIZE))
+    while True:
+        batch = list(islice(rows, settings.EXPORT_BATCH_SIZE))
+        if not batch:
+            return
+        yield [{name: getattr(row, name) for name in names} for row in batch]
+
+
+def _ndjson(batches: Iterator[List[Dict[str, Any]]], columns: Columns) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(orjson.dumps(row) + b"\n" for row in batch)
+
+
+def _csv(batches: Iterator[List[Dict[str, Any]]], columns: Columns) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for batch in batches:
+        for row in batch:
+            writer.writerow([value.isoformat() if isinstance(value, (datetime.datetime, datetime.date)) else value
+                             for value in row.values()])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    yield buffer.getvalue().encode("utf-8")  # Header only, for an empty export
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that keeps what ParquetWriter wrote until it is drained."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _parquet(batches: Iterator[List[Dict[str, Any]]], columns: Columns) -> Iterator[bytes]:
+    types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "datetime": pa.timestamp("us"), "date": pa.date32()}
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+    sink = _ChunkSink()
+    # One row group per batch, flushed to the client as soon as it is written
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.drain()
+    yield sink.drain()  # Footer
+
+
+WRITERS = {"ndjson": _ndjson, "csv": _csv, "parquet": _parquet}
+
+
+def export_response(
+    export: ExportParams,
+    build_query: Callable[[Session], OrmQuery],
+    columns: Columns,
+    basename: str
+) -> StreamingResponse:
+    """
+    Streams the rows of `build_query(db)` in the requested format.
+
+    Each row must expose every name in `columns` as an attribute (label the
+    selected columns accordingly). The query runs in its own session, opened
+    when the client starts reading, since the request's session is closed
+    once the endpoint returns; memory use is bounded by EXPORT_BATCH_SIZE
+    however many rows are exported.
+    """
+    def generate() -> Iterator[bytes]:
+        db = sessionLocal()
+        try:
+            yield from WRITERS[export.format](_batches(build_query(db), columns), columns)
+        except Exception as e:
+            logger.error(f"Export '{basename}' failed mid-stream: {e}", exc_info=True)
+            raise
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type=MEDIA_TYPES[export.format],
+        headers={"Content-Disposition": f'attachment; filename="{basename}.{export.format}"'},
+    )
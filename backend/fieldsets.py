@@ -0,0 +1,62 @@
+from functools import lru_cache
+from typing import Any, FrozenSet, List, Optional, Type
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, undefer
+
+import serialization
+
+FIELDS_DESCRIPTION = "Comma-separated fields to return (sparse fieldset), e.g. fields=reportid,overall_score. Defaults to every field."
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[FrozenSet[str]]:
+    """
+    Parses a `fields=` query parameter into the set of requested field names of
+    `schema`, or None when every field was requested. Raises a 400 for unknown names.
+    """
+    if not fields:
+        return None
+    selected = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    unknown = sorted(selected - set(schema.model_fields))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(schema.model_fields)}"
+        )
+    return selected or None
+
+
+def load_options(model, selected: Optional[FrozenSet[str]]) -> list:
+    """
+    Loader options for a query on `model` that only hydrates what the response needs.
+
+    Without a fieldset, the model's deferred columns (large text such as
+    analysis remarks/feedback) are undeferred so serializing them does not
+    trigger one extra SELECT per row. With a fieldset, only the selected columns
+    (plus the primary key) are loaded.
+    """
+    mapper = inspect(model)
+    if selected is None:
+        return [undefer(getattr(model, prop.key)) for prop in mapper.column_attrs if prop.deferred]
+    columns = [getattr(model, prop.key) for prop in mapper.column_attrs if prop.key in selected]
+    return [load_only(*columns)] if columns else []
+
+
+@lru_cache(maxsize=64)
+def _subset_schema(schema: Type[BaseModel], selected: FrozenSet[str]) -> Type[BaseModel]:
+    fields = {name: (field.annotation, field) for name, field in schema.model_fields.items() if name in selected}
+    return create_model(f"{schema.__name__}Fields", __config__=ConfigDict(from_attributes=True), **fields)
+
+
+def sparse_response(rows: List[Any], schema: Type[BaseModel], selected: Optional[FrozenSet[str]], response: Optional[Response] = None):
+    """
+    Returns `rows` unchanged when no fieldset was requested (FastAPI validates
+    them against the endpoint's response_model as usual). Otherwise renders
+    only the selected fields of each row; other attributes are never read, so
+    columns left out by `load_options` are not lazily loaded.
+    """
+    if selected is None:
+        return rows
+    return serialization.list_response(_subset_schema(schema, selected), rows, response)
@@ -0,0 +1,207 @@
+import csv
+import datetime
+import gzip
+import logging
+import os
+import re
+import threading
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from config import settings
+from database import engine
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# system_log is range-partitioned by month on `timestamped`: one partition per month,
+# named system_log_pYYYYMM, plus a DEFAULT partition that catches anything outside them.
+PARENT = "system_log"
+DEFAULT_PARTITION = "system_log_default"
+PARTITION_NAME = re.compile(r"^system_log_p(\d{4})(\d{2})$")
+# pg_try_advisory_lock key, so only one worker/process runs maintenance at a time
+MAINTENANCE_LOCK_KEY = 0x5359534C  # "SYSL"
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    years, index = divmod(month.month - 1 + months, 12)
+    return datetime.date(month.year + years, index + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"{PARENT}_p{month:%Y%m}"
+
+
+def _create_partition(conn: Connection, name: str, month: datetime.date) -> None:
+    bounds = f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    has_default = conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is not None
+    in_default = has_default and conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamped >= :start AND timestamped < :end)"
+    ), {"start": month, "end": add_months(month, 1)}).scalar()
+    if not in_default:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES {bounds}"))
+        return
+    # CREATE ... PARTITION OF fails while the default partition holds rows for the month:
+    # move them into a standalone table first, then attach it (indexes are created on attach)
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE timestamped >= :start AND timestamped < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), {"start": month, "end": add_months(month, 1)}).rowcount
+    conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    logger.info(f"Moved {moved} rows from {DEFAULT_PARTITION} into {name}")
+
+
+def ensure_partitions(conn: Connection, months_ahead: int, from_month: Optional[datetime.date] = None) -> List[str]:
+    """
+    Creates the monthly partitions from `from_month` (default: this month) up to
+    `months_ahead` months ahead, and the default partition. Rows of a month
+    that ended up in the default partition are moved into the new partition.
+    Each partition commits on its own; one that fails is logged and skipped.
+    Returns the names created.
+    """
+    month = (from_month or datetime.date.today()).replace(day=1)
+    last = add_months(datetime.date.today().replace(day=1), months_ahead)
+    created = []
+    while month <= last:
+        name = partition_name(month)
+        if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+            try:
+                _create_partition(conn, name, month)
+                conn.commit()
+                created.append(name)
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Creating system_log partition {name} failed: {e}", exc_info=True)
+        month = add_months(month, 1)
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is None:
+        conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"))
+        created.append(DEFAULT_PARTITION)
+    conn.commit()
+    return created
+
+
+def monthly_partitions(conn: Connection) -> List[Tuple[str, datetime.date, bool]]:
+    """(name, month, attached) of every monthly partition table, attached or already detached."""
+    rows = conn.execute(text(
+        "SELECT relname, relispartition FROM pg_class WHERE relkind = 'r' AND relname LIKE :pattern"
+    ), {"pattern": f"{PARENT}\\_p%"}).all()
+    partitions = []
+    for name, attached in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, datetime.date(int(match.group(1)), int(match.group(2)), 1), attached))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def _archive(conn: Connection, name: str, archive_dir: str) -> str:
+    """Streams a detached partition to <archive_dir>/<name>.csv.gz; the file appears only once complete."""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    partial = path + ".partial"
+    result = conn.execute(
+        text(f"SELECT * FROM {name} ORDER BY timestamped, logid").execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+    )
+    rows = 0
+    with gzip.open(partial, "wt", newline="", encoding="utf-8") as archive:
+        writer = csv.writer(archive)
+        writer.writerow(result.keys())
+        for partition in result.partitions():
+            writer.writerows([value.isoformat() if isinstance(value, datetime.datetime) else value for value in row]
+                             for row in partition)
+            rows += len(partition)
+        archive.flush()
+        os.fsync(archive.fileno())
+    os.replace(partial, path)
+    logger.info(f"Archived {rows} rows of {name} to {path}")
+    return path
+
+
+def archive_expired_partitions(conn: Connection, retention_months: int, archive_dir: str) -> List[str]:
+    """
+    Detaches the monthly partitions that ended more than `retention_months` ago,
+    archives each to a gzip-compressed CSV file and drops it. A partition that was
+    detached but not archived (interrupted run) is picked up again on the next run.
+    Returns the archive paths written.
+    """
+    cutoff = add_months(datetime.date.today().replace(day=1), -retention_months)
+    archived = []
+    for name, month, attached in monthly_partitions(conn):
+        if add_months(month, 1) > cutoff:
+            continue
+        if attached:
+            conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+            conn.commit()
+        archived.append(_archive(conn, name, archive_dir))
+        conn.execute(text(f"DROP TABLE {name}"))
+        conn.commit()
+    return archived
+
+
+def run_maintenance(archive: bool = True) -> None:
+    """
+    Creates upcoming partitions and (with `archive`) archives expired ones,
+    unless another process is already at it.
+    """
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}).scalar():
+            conn.rollback()
+            return
+        try:
+            created = ensure_partitions(conn, settings.SYSTEM_LOG_PARTITIONS_AHEAD)
+            if created:
+                logger.info(f"Created system_log partitions: {', '.join(created)}")
+            if archive and settings.SYSTEM_LOG_RETENTION_MONTHS > 0:
+                archive_expired_partitions(conn, settings.SYSTEM_LOG_RETENTION_MONTHS, settings.SYSTEM_LOG_ARCHIVE_DIR)
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+            conn.commit()
+
+
+class LogMaintenance:
+    """
+    Creates the upcoming partitions at startup, so a fresh database has
+    partitions to insert into, then runs the full `run_maintenance` (including
+    archiving, which can take a while) on a background thread: right away and
+    every `interval_s` after that.
+    """
+
+    def __init__(self, interval_s: int):
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval_s <= 0 or self._thread is not None:
+            return
+        try:
+            run_maintenance(archive=False)
+        except Exception as e:
+            logger.error(f"Creating system_log partitions failed: {e}", exc_info=True)
+        self._thread = threading.Thread(target=self._run, name="system-log-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run_once(self) -> None:
+        try:
+            run_maintenance()
+        except Exception as e:
+            logger.error(f"system_log maintenance failed: {e}", exc_info=True)
+
+    def _run(self) -> None:
+        self._run_once()
+        while not self._stop.wait(self.interval_s):
+            self._run_once()
+
+
+log_maintenance = LogMaintenance(interval_s=settings.SYSTEM_LOG_MAINTENANCE_SECONDS)
+
+
+if __name__ == "__main__":
+    # For cron, when SYSTEM_LOG_MAINTENANCE_SECONDS=0 keeps it out of the API processes
+    run_maintenance()
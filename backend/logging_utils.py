@@ -1,38 +1,136 @@
+import logging
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
 from fastapi import Request
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 import models  # Your SQLAlchemy models
-from typing import Optional
+
+from config import settings
+from database import sessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """
+    Background thread that writes buffered system_log records in batches.
+
+    Records are queued in memory and inserted every `flush_interval_s` (or as
+    soon as `batch_size` are waiting) with one multi-row INSERT per batch, so
+    the request that produced them neither writes nor waits for a commit.
+    Records get the database's CURRENT_TIMESTAMP when inserted, at most
+    `flush_interval_s` after the action. Buffered records are lost if the
+    process is killed before a flush; use the transactional mode for entries
+    that must commit with a mutation.
+    """
+
+    def __init__(self, flush_interval_s: float, batch_size: int, max_queue: int):
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.flush_interval_s <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the thread after it has written everything still queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def enqueue(self, record: Dict[str, Any]) -> None:
+        if self._thread is None:
+            self._write([record])  # Not started (scripts, or buffering disabled): write right away
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            logger.warning("Audit log queue is full; writing the record synchronously.")
+            self._write([record])
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval_s))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        db = sessionLocal()
+        try:
+            db.execute(insert(models.SystemLog), batch)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to write {len(batch)} audit log record(s): {e}. Records: {batch}", exc_info=True)
+        finally:
+            db.close()
+
+
+audit_log_writer = AuditLogWriter(
+    flush_interval_s=settings.AUDIT_LOG_FLUSH_SECONDS,
+    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+    max_queue=settings.AUDIT_LOG_QUEUE_SIZE
+)
+
 
 def log_admin_action(
     db: Session,
-    admin: models.Admin,
+    admin: Optional[models.Admin],
     request: Request,
     actiontype: str,
     actiondescription: str,
     affectedtable: Optional[str] = None,
-    status: str = "Success"
+    status: str = "Success",
+    buffered: bool = False
 ):
     """
     Creates a new system log entry for an admin action.
-    This function should be called *before* db.commit() in the endpoint.
+
+    By default the entry is added to `db` and commits with the action, so this
+    should be called *before* db.commit() in the endpoint. With `buffered=True`
+    it is handed to the background audit_log_writer instead: use that for views,
+    logins and failures, where there is nothing else to commit.
     """
     try:
-        
-        ip_address = request.client.host if request.client else "unknown"
-        
-        new_log = models.SystemLog(
-            adminid=admin.adminid,
+
+        ip_address = request.client.host if request.client else None
+        values = dict(
+            adminid=admin.adminid if admin is not None else None,  # None for unknown logins
             actiontype=actiontype,
             actiondescription=actiondescription,
             affectedtable=affectedtable,
             ip_address=ip_address,
             status=status
         )
-        
-        db.add(new_log)
-        
-        
+
+        if buffered:
+            # `timestamped` is left to the database default, like transactional entries,
+            # so both share one clock (buffered ones are at most a flush interval late)
+            audit_log_writer.enqueue(values)
+        else:
+            db.add(models.SystemLog(**values))
+
+
     except Exception as e:
         print(f"--- CRITICAL: ADMIN LOGGING FAILED ---")
-        print(f"Admin: {admin.email}, Action: {actiontype}")
-        print(f"Error: {e}")
\ No newline at end of file
+        print(f"Admin: {admin.email if admin is not None else None}, Action: {actiontype}")
+        print(f"Error: {e}")
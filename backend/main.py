@@ -1,13 +1,78 @@
 # main.py
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import models
-from database import engine
+from config import settings
+from database import engine, async_engine, mark_primary_reads, READ_PRIMARY_HEADER
+from pagination import NEXT_CURSOR_HEADER
+import counters
+import rankings
+import response_cache
+import serialization
+import query_stats
+from logging_utils import audit_log_writer
+from log_partitions import log_maintenance
 from routers import candidates, jobs, applications, analysis, hr_views, hr, admin,admin_dashboard
 models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="XCalibr AI Hiring System")
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+app = FastAPI(title="XCalibr AI Hiring System", default_response_class=serialization.DefaultResponse)
+
+# Keep the dashboard counters in sync with application/analysis writes,
+# and drop cached dashboard responses once those writes commit.
+counters.register()
+response_cache.register()
+
+
+@app.on_event("startup")
+def start_counters_refresher():
+    counters.counters_refresher.start()
+
+
+@app.on_event("shutdown")
+def stop_counters_refresher():
+    counters.counters_refresher.stop()
+
+
+@app.on_event("startup")
+def start_rank_refresher():
+    rankings.rank_refresher.start()
+
+
+@app.on_event("shutdown")
+def stop_rank_refresher():
+    rankings.rank_refresher.stop()
+
+
+@app.on_event("startup")
+def start_audit_log_writer():
+    audit_log_writer.start()
+
+
+@app.on_event("shutdown")
+def stop_audit_log_writer():
+    audit_log_writer.stop()
+
+
+@app.on_event("startup")
+def start_log_maintenance():
+    log_maintenance.start()
+
+
+@app.on_event("shutdown")
+def stop_log_maintenance():
+    log_maintenance.stop()
+
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
 
 origins = [
     "http://localhost:5173",
@@ -20,8 +85,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        NEXT_CURSOR_HEADER, "ETag", READ_PRIMARY_HEADER,
+        query_stats.QUERY_COUNT_HEADER, query_stats.QUERY_TIME_HEADER, query_stats.SLOWEST_QUERY_HEADER,
+    ],
 )
 
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    # Pins a client's reads to the primary right after it writes (no-op without replicas)
+    response = await call_next(request)
+    mark_primary_reads(request, response)
+    return response
+
+
+# Query count / DB time per request (headers only with DEBUG_QUERY_HEADERS)
+app.middleware("http")(query_stats.query_stats_middleware)
+
+# Negotiated compression for large payloads (list endpoints, exports): br if available and accepted, else gzip.
+if settings.COMPRESSION_MINIMUM_SIZE > 0:
+    if BrotliMiddleware is not None:
+        app.add_middleware(
+            BrotliMiddleware,
+            quality=settings.BROTLI_QUALITY,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            gzip_fallback=True,
+        )
+    else:
+        app.add_middleware(
+            GZipMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            compresslevel=settings.GZIP_COMPRESS_LEVEL,
+        )
+
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 app.include_router(candidates.router)
 app.include_router(jobs.router)
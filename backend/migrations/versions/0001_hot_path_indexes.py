@@ -0,0 +1,49 @@
+"""Composite indexes for hot query paths
+
+The tables themselves are still created by `Base.metadata.create_all` in main.py
+(or restored from the SQL dump); this first revision only adds the secondary
+indexes declared in models.py to databases that already exist.
+
+Indexes are built with CREATE INDEX CONCURRENTLY so the tables stay writable
+while they build. CONCURRENTLY cannot run inside a transaction, hence the
+autocommit block. IF NOT EXISTS makes the revision a no-op on databases whose
+tables were created after the indexes were added to the models. If a build is
+interrupted, Postgres leaves an INVALID index behind that IF NOT EXISTS would skip:
+drop it (DROP INDEX CONCURRENTLY <name>) and run the upgrade again.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    ("ix_application_job_id_applied_on", "application", ["job_id", "applied_on"]),
+    ("ix_application_candid_job_id", "application", ["candid", "job_id"]),
+    ("ix_analysis_report_job_id_analysis_status", "analysis_report", ["job_id", "analysis_status"]),
+    ("ix_analysis_report_job_id_overall_score", "analysis_report", ["job_id", "overall_score"]),
+    ("ix_feedback_candid_sent_at", "feedback", ["candid", "sent_at"]),
+    ("ix_system_log_timestamped", "system_log", ["timestamped"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,65 @@
+"""Dashboard counters table
+
+Creates job_counters (one row per job, maintained by counters.py) and fills it
+from the existing applications and analysis reports. The backfill can be re-run
+at any time with `python counters.py rebuild`.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("job_counters"):
+        op.create_table(
+            "job_counters",
+            sa.Column("job_id", sa.Integer(), sa.ForeignKey("job_posting.job_id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("total_applicants", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("new_applicants_7d", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("pending_analyses", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("failed_analyses", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("in_progress_analyses", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.current_timestamp()),
+        )
+
+    op.execute("""
+        INSERT INTO job_counters (job_id, total_applicants, new_applicants_7d,
+                                  pending_analyses, failed_analyses, in_progress_analyses)
+        SELECT jp.job_id,
+               COALESCE(apps.total_applicants, 0),
+               COALESCE(apps.new_applicants_7d, 0),
+               COALESCE(an.pending_analyses, 0),
+               COALESCE(an.failed_analyses, 0),
+               COALESCE(an.in_progress_analyses, 0)
+        FROM job_posting jp
+        LEFT JOIN (
+            SELECT job_id,
+                   COUNT(*) AS total_applicants,
+                   COUNT(*) FILTER (WHERE applied_on >= now() - interval '7 days') AS new_applicants_7d
+            FROM application GROUP BY job_id
+        ) apps ON apps.job_id = jp.job_id
+        LEFT JOIN (
+            SELECT job_id,
+                   COUNT(*) FILTER (WHERE analysis_status = 'Pending') AS pending_analyses,
+                   COUNT(*) FILTER (WHERE analysis_status = 'Failed') AS failed_analyses,
+                   COUNT(*) FILTER (WHERE analysis_status IN ('In Progress', 'Processing')) AS in_progress_analyses
+            FROM analysis_report GROUP BY job_id
+        ) an ON an.job_id = jp.job_id
+        ON CONFLICT (job_id) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("job_counters")
@@ -0,0 +1,46 @@
+"""Daily application rollup
+
+Creates daily_application_rollup (applications per job per day, maintained by
+counters.py) and backfills it from the application table. The backfill can be
+re-run with `python counters.py backfill-rollup [--since YYYY-MM-DD]`.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("daily_application_rollup"):
+        op.create_table(
+            "daily_application_rollup",
+            sa.Column("job_id", sa.Integer(), sa.ForeignKey("job_posting.job_id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.create_index("ix_daily_application_rollup_day", "daily_application_rollup", ["day"])
+
+    op.execute("""
+        INSERT INTO daily_application_rollup (job_id, day, count)
+        SELECT job_id, CAST(applied_on AS DATE), COUNT(*)
+        FROM application
+        WHERE applied_on IS NOT NULL
+        GROUP BY job_id, CAST(applied_on AS DATE)
+        ON CONFLICT (job_id, day) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_application_rollup_day", table_name="daily_application_rollup")
+    op.drop_table("daily_application_rollup")
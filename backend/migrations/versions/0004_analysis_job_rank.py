@@ -0,0 +1,48 @@
+"""Materialized job rank on analysis_report
+
+Adds analysis_report.job_rank (filled by rankings.refresh_job_ranks when
+RANKINGS_MATERIALIZED is enabled) and an index on (job_id, job_rank) for
+reading a job's top applicants straight off the index.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = [column["name"] for column in sa.inspect(op.get_bind()).get_columns("analysis_report")]
+    if "job_rank" not in columns:
+        op.add_column("analysis_report", sa.Column("job_rank", sa.Integer(), nullable=True))
+
+    op.execute("""
+        UPDATE analysis_report AS a
+        SET job_rank = r.rnk
+        FROM (
+            SELECT reportid, RANK() OVER (PARTITION BY job_id ORDER BY overall_score DESC NULLS LAST) AS rnk
+            FROM analysis_report
+        ) AS r
+        WHERE a.reportid = r.reportid
+    """)
+
+    with op.get_context().autocommit_block():
+        op.create_index("ix_analysis_report_job_id_job_rank", "analysis_report", ["job_id", "job_rank"],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_analysis_report_job_id_job_rank", table_name="analysis_report",
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column("analysis_report", "job_rank")
@@ -0,0 +1,57 @@
+"""Per-job scoring weights and analysis_report.weighted_score
+
+Adds weight_<component> columns to job_posting (default 1, i.e. the plain
+sum used for overall_score), analysis_report.weighted_score, backfilled from
+the stored components, and an index on (job_id, weighted_score) for rankings.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COMPONENTS = ["careerscore", "jd_match_score", "githubscore", "leetcodescore", "linkedinscore", "trustscore"]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    job_columns = [column["name"] for column in inspector.get_columns("job_posting")]
+    for component in COMPONENTS:
+        if f"weight_{component}" not in job_columns:
+            op.add_column("job_posting", sa.Column(f"weight_{component}", sa.Float(), nullable=False, server_default="1"))
+
+    analysis_columns = [column["name"] for column in inspector.get_columns("analysis_report")]
+    if "weighted_score" not in analysis_columns:
+        op.add_column("analysis_report", sa.Column("weighted_score", sa.Float(), nullable=True))
+
+    weighted_sum = " + ".join(f"COALESCE(a.{component}, 0) * j.weight_{component}" for component in COMPONENTS)
+    op.execute(f"""
+        UPDATE analysis_report AS a
+        SET weighted_score = CASE WHEN a.overall_score IS NULL THEN NULL ELSE {weighted_sum} END
+        FROM job_posting AS j
+        WHERE j.job_id = a.job_id
+    """)
+
+    with op.get_context().autocommit_block():
+        op.create_index("ix_analysis_report_job_id_weighted_score", "analysis_report", ["job_id", "weighted_score"],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_analysis_report_job_id_weighted_score", table_name="analysis_report",
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column("analysis_report", "weighted_score")
+    for component in COMPONENTS:
+        op.drop_column("job_posting", f"weight_{component}")
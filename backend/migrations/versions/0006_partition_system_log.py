@@ -0,0 +1,119 @@
+"""Partition system_log by month
+
+Rebuilds system_log as a table range-partitioned by month on `timestamped`
+(which joins logid in the primary key, as Postgres requires of the partition
+key), with one partition per month from the oldest row to three months
+ahead plus a DEFAULT partition. log_partitions.py keeps creating upcoming
+partitions and detaches/archives expired ones.
+
+The existing rows are copied into the new table in the same transaction;
+the table is locked while that runs, so apply it in a quiet window on large
+logs. Rows with a NULL `timestamped` get the migration time. Indexes are
+built after the copy: the btree for newest-first listing, a BRIN index for
+time-range filters, and (adminid, timestamped) for per-admin filters.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00
+
+"""
+import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+COLUMNS = "logid, adminid, actiontype, actiondescription, affectedtable, timestamped, ip_address, status"
+
+
+def _add_months(month: datetime.date, months: int) -> datetime.date:
+    years, index = divmod(month.month - 1 + months, 12)
+    return datetime.date(month.year + years, index + 1, 1)
+
+
+def _create_indexes() -> None:
+    op.create_index("ix_system_log_timestamped", "system_log", ["timestamped"])
+    op.create_index("ix_system_log_timestamped_brin", "system_log", ["timestamped"], postgresql_using="brin")
+    op.create_index("ix_system_log_adminid_timestamped", "system_log", ["adminid", "timestamped"])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    is_partitioned = bind.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('system_log'))"
+    )).scalar()
+    if is_partitioned:
+        return  # Created partitioned by create_all from the current models
+
+    op.execute("ALTER TABLE system_log RENAME TO system_log_unpartitioned")
+    # Index names are schema-wide: free the ones the new table uses
+    op.execute("ALTER INDEX IF EXISTS system_log_pkey RENAME TO system_log_unpartitioned_pkey")
+    op.execute("ALTER INDEX IF EXISTS ix_system_log_timestamped RENAME TO ix_system_log_unpartitioned_timestamped")
+    # Keep the logid sequence (and its current value) for the new table
+    op.execute("ALTER SEQUENCE system_log_logid_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE system_log (
+            logid INTEGER NOT NULL DEFAULT nextval('system_log_logid_seq'),
+            adminid INTEGER REFERENCES admin_user (adminid),
+            actiontype VARCHAR(50) NOT NULL,
+            actiondescription TEXT,
+            affectedtable VARCHAR(50),
+            timestamped TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            ip_address INET,
+            status VARCHAR(20),
+            PRIMARY KEY (logid, timestamped)
+        ) PARTITION BY RANGE (timestamped)
+    """)
+    op.execute("ALTER SEQUENCE system_log_logid_seq OWNED BY system_log.logid")
+
+    oldest = bind.execute(sa.text("SELECT min(timestamped) FROM system_log_unpartitioned")).scalar()
+    this_month = datetime.date.today().replace(day=1)
+    month = min(oldest.date().replace(day=1), this_month) if oldest else this_month
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        op.execute(
+            f"CREATE TABLE system_log_p{month:%Y%m} PARTITION OF system_log "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE system_log_default PARTITION OF system_log DEFAULT")
+
+    op.execute(f"""
+        INSERT INTO system_log ({COLUMNS})
+        SELECT logid, adminid, actiontype, actiondescription, affectedtable,
+               COALESCE(timestamped, CURRENT_TIMESTAMP), ip_address, status
+        FROM system_log_unpartitioned
+    """)
+    op.execute("DROP TABLE system_log_unpartitioned")
+    _create_indexes()
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE system_log RENAME TO system_log_partitioned")
+    op.execute("ALTER INDEX system_log_pkey RENAME TO system_log_partitioned_pkey")
+    op.execute("ALTER INDEX ix_system_log_timestamped RENAME TO ix_system_log_partitioned_timestamped")
+    op.execute("ALTER SEQUENCE system_log_logid_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE system_log (
+            logid INTEGER PRIMARY KEY DEFAULT nextval('system_log_logid_seq'),
+            adminid INTEGER REFERENCES admin_user (adminid),
+            actiontype VARCHAR(50) NOT NULL,
+            actiondescription TEXT,
+            affectedtable VARCHAR(50),
+            timestamped TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            ip_address INET,
+            status VARCHAR(20)
+        )
+    """)
+    op.execute("ALTER SEQUENCE system_log_logid_seq OWNED BY system_log.logid")
+    # Detached/archived partitions are not restored
+    op.execute(f"INSERT INTO system_log ({COLUMNS}) SELECT {COLUMNS} FROM system_log_partitioned")
+    op.execute("DROP TABLE system_log_partitioned")  # Drops its partitions and indexes too
+    op.create_index("ix_system_log_timestamped", "system_log", ["timestamped"])
@@ -1,7 +1,7 @@
 import datetime
 from typing import List, Optional
 
-from sqlalchemy import Integer, String, Text, DateTime, func, ForeignKey,Boolean
+from sqlalchemy import Integer, String, Text, DateTime, Date, Float, func, ForeignKey,Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from database import Base
 from sqlalchemy.dialects.postgresql import INET
@@ -64,6 +64,13 @@ class Admin(Base):
     
 class Analysis(Base):
     __tablename__="analysis_report"
+    # Indexes are also created on existing databases by migrations/versions/0001_hot_path_indexes.py
+    __table_args__ = (
+        Index("ix_analysis_report_job_id_analysis_status", "job_id", "analysis_status"), # pending counts per job
+        Index("ix_analysis_report_job_id_overall_score", "job_id", "overall_score"), # rankings per job
+        Index("ix_analysis_report_job_id_job_rank", "job_id", "job_rank"), # materialized rankings per job
+        Index("ix_analysis_report_job_id_weighted_score", "job_id", "weighted_score"), # rankings per job
+    )
 
     reportid: Mapped[int] = mapped_column(Integer,primary_key=True,autoincrement=True)
     candid: Mapped[int] = mapped_column(Integer,ForeignKey("candidate.candid"),nullable=False)
@@ -76,12 +83,18 @@ class Analysis(Base):
     leetcodescore: Mapped[Optional[int]] = mapped_column(Integer,nullable=True)
     jd_match_score: Mapped[Optional[int]] = mapped_column(Integer,nullable=True)
     overall_score: Mapped[Optional[int]] = mapped_column(Integer,nullable=True)
+    # Components weighted by the job's scoring weights; rewritten in bulk when the weights change (see rankings.py).
+    weighted_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     total_possible_score: Mapped[Optional[int]] = mapped_column(Integer, nullable=True) 
-    remarks: Mapped[Optional[str]] = mapped_column(Text,nullable=True) 
-    feedback: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Large text (full CV analysis JSON, feedback email): deferred so list queries don't load them
+    # unless asked to (see fieldsets.load_options); accessing them on one report loads them on demand.
+    remarks: Mapped[Optional[str]] = mapped_column(Text,nullable=True, deferred=True) 
+    feedback: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True)
     reportcardlink: Mapped[Optional[str]] = mapped_column(String(255),nullable=True) 
     analysis_status: Mapped[str] = mapped_column(String(20), default="Pending")
     analyzed_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, nullable=True)
+    # Materialized RANK() of weighted_score within the job (see rankings.py); only maintained with RANKINGS_MATERIALIZED.
+    job_rank: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     application: Mapped["Application"] = relationship("Application", back_populates="analysis")
     candidate : Mapped["Candidates"] = relationship("Candidates", back_populates="analysis_reports")
     job: Mapped["JobPosting"] = relationship("JobPosting", back_populates="analysis_reports")
@@ -89,6 +102,9 @@ class Analysis(Base):
 
 class Feedback(Base):
     __tablename__="feedback"
+    __table_args__ = (
+        Index("ix_feedback_candid_sent_at", "candid", "sent_at"), # candidate inbox, newest first
+    )
 
     feedbackid : Mapped[int] = mapped_column(Integer,primary_key=True,autoincrement=True)
     candid: Mapped[int] = mapped_column(Integer,ForeignKey("candidate.candid"),nullable=False)
@@ -104,6 +120,14 @@ class Feedback(Base):
 
 class SystemLog(Base):
     __tablename__ = "system_log"
+    # Range-partitioned by month on timestamped (see log_partitions.py and
+    # migrations/versions/0006_partition_system_log.py); the partition key must be part of the primary key.
+    __table_args__ = (
+        Index("ix_system_log_timestamped", "timestamped"), # admin log listing, newest first
+        Index("ix_system_log_timestamped_brin", "timestamped", postgresql_using="brin"), # time-range filters, tiny on append-only data
+        Index("ix_system_log_adminid_timestamped", "adminid", "timestamped"), # one admin's actions
+        {"postgresql_partition_by": "RANGE (timestamped)"},
+    )
 
     logid : Mapped[int] = mapped_column(Integer,autoincrement=True,primary_key=True)
     adminid : Mapped[int] = mapped_column(Integer,ForeignKey("admin_user.adminid"),nullable=True)
@@ -112,7 +136,7 @@ class SystemLog(Base):
     affectedtable : Mapped[str] = mapped_column(String(50),nullable=True)
     
     # --- FIX ---
-    timestamped : Mapped[datetime.datetime] = mapped_column(DateTime, server_default=func.current_timestamp())
+    timestamped : Mapped[datetime.datetime] = mapped_column(DateTime, primary_key=True, nullable=False, server_default=func.current_timestamp())
     
     ip_address : Mapped[str] = mapped_column(INET,nullable= True)
     status : Mapped[str] = mapped_column(String(20),nullable=True)
@@ -134,6 +158,13 @@ class JobPosting(Base):
     analyze_github: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="true")
     analyze_leetcode: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="true")
     analyze_linkedin: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="true")
+    # Scoring weights applied to each component at ranking time (1 = unweighted sum, 0 = ignored).
+    weight_careerscore: Mapped[float] = mapped_column(Float, nullable=False, server_default="1")
+    weight_jd_match_score: Mapped[float] = mapped_column(Float, nullable=False, server_default="1")
+    weight_githubscore: Mapped[float] = mapped_column(Float, nullable=False, server_default="1")
+    weight_leetcodescore: Mapped[float] = mapped_column(Float, nullable=False, server_default="1")
+    weight_linkedinscore: Mapped[float] = mapped_column(Float, nullable=False, server_default="1")
+    weight_trustscore: Mapped[float] = mapped_column(Float, nullable=False, server_default="1")
     date_posted: Mapped[datetime.datetime] = mapped_column(DateTime, server_default=func.current_timestamp())
     
     deadline: Mapped[DateTime] = mapped_column(DateTime, nullable=True) 
@@ -145,6 +176,10 @@ class JobPosting(Base):
 
 class Application(Base):
     __tablename__ = "application"
+    __table_args__ = (
+        Index("ix_application_job_id_applied_on", "job_id", "applied_on"), # dashboards / per-job listings
+        Index("ix_application_candid_job_id", "candid", "job_id"), # duplicate check in apply_to_job
+    )
 
     application_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     candid: Mapped[int] = mapped_column(ForeignKey("candidate.candid"), nullable=False)
@@ -157,4 +192,35 @@ class Application(Base):
     
     candidate: Mapped["Candidates"] = relationship("Candidates", back_populates="applications")
     job: Mapped["JobPosting"] = relationship("JobPosting", back_populates="applications")
-    analysis: Mapped["Analysis"] = relationship("Analysis", back_populates="application", uselist=False, cascade="all, delete-orphan")
\ No newline at end of file
+    analysis: Mapped["Analysis"] = relationship("Analysis", back_populates="application", uselist=False, cascade="all, delete-orphan")
+
+class JobCounters(Base):
+    """
+    Pre-aggregated dashboard counters, one row per job. Kept in sync inside the same
+    transaction as the application/analysis writes (see counters.py); the rolling
+    7-day count is recomputed periodically by the counters refresher.
+    """
+    __tablename__ = "job_counters"
+
+    job_id: Mapped[int] = mapped_column(Integer, ForeignKey("job_posting.job_id", ondelete="CASCADE"), primary_key=True)
+    total_applicants: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    new_applicants_7d: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    pending_analyses: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    failed_analyses: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    in_progress_analyses: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    updated_at: Mapped[datetime.datetime] = mapped_column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+
+class DailyApplicationRollup(Base):
+    """
+    Number of applications per job per day (by applied_on date), maintained on
+    insert/delete by counters.py. Backs the applicant-volume charts.
+    """
+    __tablename__ = "daily_application_rollup"
+    __table_args__ = (
+        Index("ix_daily_application_rollup_day", "day"), # all-jobs volume by date range
+    )
+
+    job_id: Mapped[int] = mapped_column(Integer, ForeignKey("job_posting.job_id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
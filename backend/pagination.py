@@ -0,0 +1,125 @@
+import base64
+import binascii
+import datetime
+import json
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query as OrmQuery
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# The response body stays a plain list; the cursor for the next page (if any) goes in this header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """
+    Query parameters for keyset-paginated list endpoints. Use as `page: PageParams = Depends()`.
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header of the previous page."),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of items to return.")
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encodes the sort-key values of the last row of a page into an opaque, URL-safe cursor.
+    """
+    payload = [value.isoformat() if isinstance(value, (datetime.datetime, datetime.date)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_columns: Sequence[Any]) -> List[Any]:
+    """
+    Decodes a cursor back into sort-key values, typed after the given columns.
+    Raises a 400 for anything that was not produced by `encode_cursor` for these columns.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(sort_columns):
+            raise ValueError("wrong number of values")
+
+        decoded = []
+        for value, column in zip(values, sort_columns):
+            python_type = column.type.python_type
+            if python_type is datetime.datetime:
+                value = datetime.datetime.fromisoformat(value)
+            elif python_type is datetime.date:
+                value = datetime.date.fromisoformat(value)
+            elif not isinstance(value, python_type):
+                raise ValueError(f"unexpected value type for {column.key}")
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def paginate(
+    query: OrmQuery,
+    page: PageParams,
+    response: Response,
+    sort_columns: Sequence[Any],
+    descending: bool = False,
+    row_key: Optional[Callable[[Any], Sequence[Any]]] = None
+) -> list:
+    """
+    Applies keyset pagination to a query and returns one page of rows.
+
+    `sort_columns` must be non-null columns whose combination is unique (end it
+    with the primary key), so the order is stable and no row is skipped or
+    repeated between pages. Rows after the cursor are selected with a row-value
+    comparison on those columns, which an index on them can serve directly, so
+    the cost of a page does not grow with its position.
+
+    `row_key` extracts the sort-key values from a result row; by default they are
+    read as attributes of the row (for single-entity queries).
+    """
+    rows = _page_query(query, page, sort_columns, descending).all()
+    return _trim_page(rows, page, response, sort_columns, row_key)
+
+
+async def paginate_async(
+    db: AsyncSession,
+    stmt: Select,
+    page: PageParams,
+    response: Response,
+    sort_columns: Sequence[Any],
+    descending: bool = False,
+    row_key: Optional[Callable[[Any], Sequence[Any]]] = None
+) -> list:
+    """
+    `paginate` for a 2.0-style select() on an AsyncSession. Single-entity
+    statements return entities; others return rows, as `session.execute` would.
+    """
+    result = await db.execute(_page_query(stmt, page, sort_columns, descending))
+    rows = result.scalars().all() if len(stmt.column_descriptions) == 1 else result.all()
+    return _trim_page(list(rows), page, response, sort_columns, row_key)
+
+
+def _page_query(query, page: PageParams, sort_columns: Sequence[Any], descending: bool):
+    # Works for both ORM Query and select(): both have filter/order_by/limit
+    if page.cursor:
+        values = decode_cursor(page.cursor, sort_columns)
+        key = tuple_(*sort_columns)
+        query = query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+
+    order = [column.desc() if descending else column.asc() for column in sort_columns]
+    return query.order_by(*order).limit(page.limit + 1)
+
+
+def _trim_page(rows: list, page: PageParams, response: Response, sort_columns: Sequence[Any], row_key) -> list:
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        values = row_key(last) if row_key else [getattr(last, column.key) for column in sort_columns]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(values)
+    return rows
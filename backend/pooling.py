@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from config import settings
+
+
+class CheckoutStats:
+    """Checkout latency of one pool (time spent waiting for, or opening, a connection)."""
+
+    def __init__(self, window: int = 1000):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._recent: "deque[float]" = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self._recent.append(elapsed_ms)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = sorted(self._recent)
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "checkout_avg_ms": round(self.total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "checkout_p95_ms": round(recent[int(len(recent) * 0.95) - 1], 3) if recent else 0.0,
+                "checkout_max_ms": round(self.max_ms, 3),
+            }
+
+
+class _InstrumentedPool:
+    # Mixin: times every checkout, including the wait when the pool is exhausted
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.checkout_stats = self.checkout_stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_stats.record_timeout()
+            raise
+        self.checkout_stats.record((time.perf_counter() - start) * 1000)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(is_async: bool = False) -> Dict[str, Any]:
+    """
+    create_engine()/create_async_engine() keyword arguments from the DB_* settings.
+
+    With DB_PGBOUNCER (transaction pooling) nothing may rely on per-connection
+    server state between transactions, so psycopg 3's automatic server-side
+    prepared statements are turned off; psycopg2 never prepares statements.
+    """
+    options: Dict[str, Any] = {
+        "echo": settings.DB_ECHO,
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_PGBOUNCER and is_async:
+        options["connect_args"] = {"prepare_threshold": None}
+    return options
+
+
+def pool_stats(pool) -> Dict[str, Any]:
+    """Current size/usage of a pool plus its checkout latency."""
+    stats = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+    checkout_stats = getattr(pool, "checkout_stats", None)
+    if checkout_stats is not None:
+        stats.update(checkout_stats.snapshot())
+    return stats
+
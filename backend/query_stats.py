@@ -0,0 +1,143 @@
+import heapq
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+SLOWEST_QUERY_HEADER = "X-DB-Slowest-Ms"
+
+
+def _short(statement: str, limit: int = 1000) -> str:
+    return " ".join(statement.split())[:limit]
+
+
+class QueryStats:
+    """Statements executed within one request (or one `track()` block)."""
+
+    def __init__(self, keep_slowest: int = 5, parent: Optional["QueryStats"] = None):
+        self.parent = parent  # Enclosing track() block, which sees these statements too
+        self.count = 0
+        self.total_ms = 0.0
+        self.keep_slowest = keep_slowest
+        self._slowest: List[Tuple[float, str]] = []  # min-heap of (ms, statement)
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, (elapsed_ms, statement))
+        elif elapsed_ms > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (elapsed_ms, statement))
+        if self.parent is not None:
+            self.parent.record(statement, elapsed_ms)
+
+    @property
+    def slowest(self) -> List[Tuple[float, str]]:
+        return sorted(self._slowest, reverse=True)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track() -> Iterator[QueryStats]:
+    """Collects the statements executed inside the block (on any engine)."""
+    stats = QueryStats(keep_slowest=settings.QUERY_STATS_KEEP_SLOWEST, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Fails (QueryBudgetExceeded) when the block runs more than `max_queries`
+    statements, listing the slowest ones. For tests that call code in the
+    same thread/context; over HTTP, read the X-DB-Query-Count header instead
+    (see benchmarks/query_budget.py):
+
+        with query_budget(2):
+            counters.hr_counters_query(db).all()
+    """
+    with track() as stats:
+        yield stats
+    if stats.count > max_queries:
+        details = "\n".join(f"  {ms:.1f} ms  {_short(statement, 200)}" for ms, statement in stats.slowest)
+        raise QueryBudgetExceeded(f"{stats.count} queries executed, budget is {max_queries}. Slowest:\n{details}")
+
+
+# ---------------------------------------------------------------------------
+# Engine hooks
+# ---------------------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+
+    # Sampled slow-query log. Statement only: parameters can contain personal data
+    if settings.SLOW_QUERY_MS > 0 and elapsed_ms >= settings.SLOW_QUERY_MS and random.random() < settings.SLOW_QUERY_SAMPLE_RATE:
+        logger.warning(f"Slow query ({elapsed_ms:.1f} ms, {cursor.rowcount} rows): {_short(statement)}")
+
+
+def _on_error(context) -> None:
+    # A failed statement never reaches after_cursor_execute
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+
+
+def instrument(engine: Engine) -> None:
+    """Times every statement of a (sync, or the sync side of an async) engine."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _on_error)
+
+
+# ---------------------------------------------------------------------------
+# Per-request stats
+# ---------------------------------------------------------------------------
+
+async def query_stats_middleware(request: Request, call_next):
+    """
+    Counts the statements of each request. Requests over QUERY_COUNT_WARN
+    statements are logged with their slowest statements; with DEBUG_QUERY_HEADERS
+    the count, total DB time and slowest statement time are returned as headers.
+    """
+    with track() as stats:
+        response = await call_next(request)
+
+    if settings.QUERY_COUNT_WARN > 0 and stats.count > settings.QUERY_COUNT_WARN:
+        slowest = "; ".join(f"{ms:.1f} ms {_short(statement, 200)}" for ms, statement in stats.slowest[:3])
+        logger.warning(f"{request.method} {request.url.path} ran {stats.count} queries ({stats.total_ms:.1f} ms). Slowest: {slowest}")
+
+    if settings.DEBUG_QUERY_HEADERS:
+        response.headers[QUERY_COUNT_HEADER] = str(stats.count)
+        response.headers[QUERY_TIME_HEADER] = f"{stats.total_ms:.1f}"
+        response.headers[SLOWEST_QUERY_HEADER] = f"{stats.slowest[0][0]:.1f}" if stats.count else "0"
+    return response
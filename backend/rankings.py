@@ -0,0 +1,403 @@
+import logging
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+from fastapi import Query, Response
+from sqlalchemy import case, func, or_, select, text, tuple_, update
+from sqlalchemy.orm import Session
+
+import models
+from config import settings
+from database import sessionLocal
+from pagination import NEXT_CURSOR_HEADER, PageParams, decode_cursor, encode_cursor, paginate
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# The stored per-report score components, in the order weight vectors are keyed by.
+SCORE_COMPONENTS = ["careerscore", "jd_match_score", "githubscore", "leetcodescore", "linkedinscore", "trustscore"]
+MAX_COMPONENT_WEIGHT = 10.0
+
+
+class RankingFilters:
+    """
+    Query parameters for the rankings endpoint. Use as `filters: RankingFilters = Depends()`.
+    Filters narrow the returned rows; ranks are always computed over every applicant to the job.
+    """
+
+    def __init__(
+        self,
+        top_k: Optional[int] = Query(None, ge=1, description="Only return applicants ranked in the top K."),
+        status: Optional[str] = Query(None, description="Only return analyses with this status (e.g. Completed)."),
+        min_score: Optional[int] = Query(None, ge=0, description="Minimum overall_score."),
+        min_careerscore: Optional[int] = Query(None, ge=0),
+        min_jd_match_score: Optional[int] = Query(None, ge=0),
+        min_githubscore: Optional[int] = Query(None, ge=0),
+        min_leetcodescore: Optional[int] = Query(None, ge=0),
+        min_linkedinscore: Optional[int] = Query(None, ge=0),
+        min_trustscore: Optional[int] = Query(None, ge=0)
+    ):
+        self.top_k = top_k
+        self.status = status
+        self.min_score = min_score
+        self.component_minimums = dict(zip(SCORE_COMPONENTS, [
+            min_careerscore, min_jd_match_score, min_githubscore,
+            min_leetcodescore, min_linkedinscore, min_trustscore
+        ]))
+
+    def apply(self, query, rank_column, include_unranked: bool = False):
+        if self.top_k is not None:
+            in_top_k = rank_column <= self.top_k
+            query = query.filter(or_(in_top_k, rank_column.is_(None)) if include_unranked else in_top_k)
+        if self.status:
+            query = query.filter(models.Analysis.analysis_status == self.status)
+        if self.min_score is not None:
+            query = query.filter(models.Analysis.overall_score >= self.min_score)
+        for component, minimum in self.component_minimums.items():
+            if minimum is not None:
+                query = query.filter(getattr(models.Analysis, component) >= minimum)
+        return query
+
+
+def _rank_order():
+    # weighted_score equals overall_score unless the job has custom scoring weights
+    return models.Analysis.weighted_score.desc().nullslast()
+
+
+def weighted_score_expression(weights: Dict[str, float]):
+    """
+    SQL expression for the weighted sum of the stored components. Missing
+    components count as 0; analyses without a score yet stay NULL (ranked last).
+    """
+    weighted_sum = sum(
+        func.coalesce(getattr(models.Analysis, component), 0) * float(weights.get(component, 1.0))
+        for component in SCORE_COMPONENTS
+    )
+    return case((models.Analysis.overall_score.is_(None), None), else_=weighted_sum)
+
+
+def job_weights(job: models.JobPosting) -> Dict[str, float]:
+    """The job's persisted scoring weight for each component."""
+    return {component: getattr(job, f"weight_{component}") for component in SCORE_COMPONENTS}
+
+
+def compute_weighted_score(analysis: models.Analysis, weights: Dict[str, float]) -> Optional[float]:
+    """Python counterpart of `weighted_score_expression`, for a report about to be saved."""
+    if analysis.overall_score is None:
+        return None
+    return float(sum((getattr(analysis, component) or 0) * weights.get(component, 1.0) for component in SCORE_COMPONENTS))
+
+
+def apply_job_weights(db: Session, job: models.JobPosting) -> int:
+    """
+    Rewrites weighted_score for every analysis of the job from its current
+    weights in one UPDATE statement (no re-analysis). Does not commit, so the
+    weight change and the rescoring land in the same transaction.
+    Returns the number of updated rows.
+    """
+    result = db.execute(
+        update(models.Analysis)
+        .where(models.Analysis.job_id == job.job_id)
+        .values(weighted_score=weighted_score_expression(job_weights(job)))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def job_total(db: Session, job_id: int) -> int:
+    # Index-only count on ix_analysis_report_job_id_analysis_status
+    return db.query(func.count(models.Analysis.reportid)).filter(models.Analysis.job_id == job_id).scalar() or 0
+
+
+def _ranked_subquery(job_id: int):
+    # RANK()/PERCENT_RANK() over every analysis of the job, keyed by reportid
+    return (
+        select(
+            models.Analysis.reportid.label("reportid"),
+            func.rank().over(order_by=_rank_order()).label("rank"),
+            (1.0 - func.percent_rank().over(order_by=_rank_order())).label("percentile"),
+        )
+        .where(models.Analysis.job_id == job_id)
+        .subquery()
+    )
+
+
+def get_job_rankings(
+    db: Session,
+    job_id: int,
+    filters: RankingFilters,
+    page: PageParams,
+    response: Response
+) -> Tuple[int, list]:
+    """
+    Returns (total applicants, one page of rows) for a job, best first.
+
+    Each row is (Analysis, Candidates, Application, rank, percentile), where rank
+    is the SQL RANK() of weighted_score, i.e. the components weighted by the job's
+    scoring weights (ties share a rank; unscored analyses rank last) and percentile is 1.0 for the top applicant and 0.0 for the bottom.
+
+    With RANKINGS_MATERIALIZED the stored `job_rank` column is read instead of
+    computing the window: the page is selected and ordered on job_rank itself, so
+    it comes off the (job_id, job_rank) index, and the displayed rank and
+    percentile are derived from it afterwards.
+    """
+    if settings.RANKINGS_MATERIALIZED:
+        return _get_materialized_rankings(db, job_id, filters, page, response)
+
+    ranked = _ranked_subquery(job_id)
+    query = db.query(
+        models.Analysis, models.Candidates, models.Application, ranked.c.rank, ranked.c.percentile
+    ).join(
+        ranked, ranked.c.reportid == models.Analysis.reportid
+    )
+    query = filters.apply(_join_candidates(query), ranked.c.rank)
+
+    rows = paginate(
+        query, page, response,
+        sort_columns=[ranked.c.rank, models.Analysis.reportid],
+        row_key=lambda row: [row.rank, row.Analysis.reportid]
+    )
+    return job_total(db, job_id), rows
+
+
+def _join_candidates(query):
+    return query.join(
+        models.Application, models.Analysis.application_id == models.Application.application_id
+    ).join(
+        models.Candidates, models.Application.candid == models.Candidates.candid
+    )
+
+
+# Cursor value for job_rank of an analysis that has no materialized rank yet (ranks start at 1)
+UNRANKED_CURSOR = 0
+
+
+def _get_materialized_rankings(
+    db: Session,
+    job_id: int,
+    filters: RankingFilters,
+    page: PageParams,
+    response: Response
+) -> Tuple[int, list]:
+    total = job_total(db, job_id)
+    job_rank = models.Analysis.job_rank
+    reportid = models.Analysis.reportid
+    query = _join_candidates(
+        db.query(models.Analysis, models.Candidates, models.Application).filter(models.Analysis.job_id == job_id)
+    )
+    # Analyses added since the last refresh have no rank yet; they count as rank `total` and sort last.
+    query = filters.apply(query, job_rank, include_unranked=filters.top_k is not None and total <= filters.top_k)
+
+    # Keyset on (job_rank NULLS LAST, reportid); paginate() needs non-null sort columns
+    if page.cursor:
+        last_rank, last_reportid = decode_cursor(page.cursor, [job_rank, reportid])
+        if last_rank == UNRANKED_CURSOR:
+            query = query.filter(job_rank.is_(None), reportid > last_reportid)
+        else:
+            query = query.filter(or_(tuple_(job_rank, reportid) > tuple_(last_rank, last_reportid), job_rank.is_(None)))
+    rows = query.order_by(job_rank.asc().nullslast(), reportid).limit(page.limit + 1).all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1].Analysis
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([
+            last.job_rank if last.job_rank is not None else UNRANKED_CURSOR, last.reportid
+        ])
+
+    ranked_rows = []
+    for analysis, candidate, application in rows:
+        rank = analysis.job_rank if analysis.job_rank is not None else total
+        percentile = 1.0 - (rank - 1) / max(total - 1, 1)
+        ranked_rows.append((analysis, candidate, application, rank, percentile))
+    return total, ranked_rows
+
+
+class ScoreWeights:
+    """
+    Per-component weights for what-if re-ranking. Use as `weights: ScoreWeights = Depends()`.
+    Every component defaults to 1.0, which reproduces the stored overall_score; 0 ignores it.
+    Weights here are not saved; the job's persisted weights are set through the jobs router.
+    """
+
+    def __init__(
+        self,
+        w_careerscore: float = Query(1.0, ge=0, le=MAX_COMPONENT_WEIGHT),
+        w_jd_match_score: float = Query(1.0, ge=0, le=MAX_COMPONENT_WEIGHT),
+        w_githubscore: float = Query(1.0, ge=0, le=MAX_COMPONENT_WEIGHT),
+        w_leetcodescore: float = Query(1.0, ge=0, le=MAX_COMPONENT_WEIGHT),
+        w_linkedinscore: float = Query(1.0, ge=0, le=MAX_COMPONENT_WEIGHT),
+        w_trustscore: float = Query(1.0, ge=0, le=MAX_COMPONENT_WEIGHT)
+    ):
+        self.weights: Dict[str, float] = dict(zip(SCORE_COMPONENTS, [
+            w_careerscore, w_jd_match_score, w_githubscore,
+            w_leetcodescore, w_linkedinscore, w_trustscore
+        ]))
+
+    def cache_key(self) -> str:
+        # Rounded so slider jitter (1.0 vs 1.0000001) shares a cache entry
+        return ",".join(f"{self.weights[component]:.3f}" for component in SCORE_COMPONENTS)
+
+
+def get_what_if_rankings(db: Session, job_id: int, weights: Dict[str, float], top_k: Optional[int] = None) -> list:
+    """
+    Re-ranks a job's applicants by a weighted sum of their stored component scores,
+    without re-running any analysis. One query: the weighted score, its RANK() and
+    the baseline RANK() under the job's saved weights are all computed in the database.
+
+    Returns rows of (Analysis, Candidates, Application, weighted_score, rank, baseline_rank),
+    best first, optionally cut off at rank `top_k`.
+    """
+    weighted_score = weighted_score_expression(weights)
+    ranked = (
+        select(
+            models.Analysis.reportid.label("reportid"),
+            weighted_score.label("weighted_score"),
+            func.rank().over(order_by=weighted_score.desc().nullslast()).label("rank"),
+            func.rank().over(order_by=_rank_order()).label("baseline_rank"),
+        )
+        .where(models.Analysis.job_id == job_id)
+        .subquery()
+    )
+
+    query = db.query(
+        models.Analysis, models.Candidates, models.Application,
+        ranked.c.weighted_score, ranked.c.rank, ranked.c.baseline_rank
+    ).join(
+        ranked, ranked.c.reportid == models.Analysis.reportid
+    ).join(
+        models.Application, models.Analysis.application_id == models.Application.application_id
+    ).join(
+        models.Candidates, models.Application.candid == models.Candidates.candid
+    )
+    if top_k is not None:
+        query = query.filter(ranked.c.rank <= top_k)
+    return query.order_by(ranked.c.rank, models.Analysis.reportid).all()
+
+
+# Columns of a rankings export, see export_rankings_query
+EXPORT_COLUMNS = [
+    ("rank", "int"), ("percentile", "float"), ("application_id", "int"), ("candid", "int"),
+    ("firstname", "str"), ("lastname", "str"), ("email", "str"),
+    ("weighted_score", "float"), ("overall_score", "int"),
+] + [(component, "int") for component in SCORE_COMPONENTS] + [
+    ("analysis_status", "str"), ("applied_on", "datetime"),
+]
+
+
+def export_rankings_query(db: Session, job_id: int, filters: RankingFilters):
+    """
+    Column-only query of a job's full ranking (best first) for streaming exports:
+    same ranks and filters as `get_job_rankings`, no ORM entities, no pagination.
+    """
+    ranked = _ranked_subquery(job_id)
+    query = db.query(
+        ranked.c.rank,
+        ranked.c.percentile,
+        models.Application.application_id,
+        models.Candidates.candid,
+        models.Candidates.firstname,
+        models.Candidates.lastname,
+        models.Candidates.email,
+        models.Analysis.weighted_score,
+        models.Analysis.overall_score,
+        *[getattr(models.Analysis, component) for component in SCORE_COMPONENTS],
+        models.Analysis.analysis_status,
+        models.Application.applied_on,
+    ).select_from(models.Analysis).join(
+        ranked, ranked.c.reportid == models.Analysis.reportid
+    ).join(
+        models.Application, models.Analysis.application_id == models.Application.application_id
+    ).join(
+        models.Candidates, models.Application.candid == models.Candidates.candid
+    )
+    return filters.apply(query, ranked.c.rank).order_by(ranked.c.rank, models.Analysis.reportid)
+
+
+def refresh_job_ranks(db: Session, job_id: int) -> int:
+    """
+    Recomputes the materialized `job_rank` column for one job in a single UPDATE,
+    touching only rows whose rank changed. Returns the number of updated rows.
+    No-op unless RANKINGS_MATERIALIZED is enabled.
+    """
+    if not settings.RANKINGS_MATERIALIZED:
+        return 0
+    result = db.execute(text("""
+        UPDATE analysis_report AS a
+        SET job_rank = r.rnk
+        FROM (
+            SELECT reportid, RANK() OVER (ORDER BY weighted_score DESC NULLS LAST) AS rnk
+            FROM analysis_report
+            WHERE job_id = :job_id
+        ) AS r
+        WHERE a.reportid = r.reportid
+          AND a.job_rank IS DISTINCT FROM r.rnk
+    """), {"job_id": job_id})
+    db.commit()
+    return result.rowcount
+
+
+def refresh_job_ranks_safely(job_id: int) -> None:
+    """Background-task friendly wrapper: opens its own session and never raises."""
+    if not settings.RANKINGS_MATERIALIZED:
+        return
+
+    db = sessionLocal()
+    try:
+        updated = refresh_job_ranks(db, job_id)
+        logger.info(f"Refreshed materialized ranks for job_id {job_id} ({updated} rows changed).")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to refresh ranks for job_id {job_id}: {e}", exc_info=True)
+    finally:
+        db.close()
+
+
+class RankRefresher:
+    """
+    Coalesces materialized rank refreshes per job. Completed analyses only mark
+    their job dirty; a background thread refreshes each dirty job once every
+    `interval_s`, so a bulk run over a large job costs one RANK() UPDATE per
+    interval instead of one per analysis, and none on the pipeline thread.
+    """
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._dirty: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if not settings.RANKINGS_MATERIALIZED or self.interval_s <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="rank-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the thread after refreshing the jobs still marked."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def mark_dirty(self, job_id: int) -> None:
+        if not settings.RANKINGS_MATERIALIZED:
+            return
+        if self._thread is None:
+            refresh_job_ranks_safely(job_id)  # Not started (scripts, or batching disabled): refresh right away
+            return
+        with self._lock:
+            self._dirty.add(job_id)
+
+    def _flush(self) -> None:
+        with self._lock:
+            job_ids, self._dirty = self._dirty, set()
+        for job_id in sorted(job_ids):
+            refresh_job_ranks_safely(job_id)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self._flush()
+        self._flush()
+
+
+rank_refresher = RankRefresher(interval_s=settings.RANKINGS_REFRESH_SECONDS)
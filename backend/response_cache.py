@@ -0,0 +1,161 @@
+import hashlib
+import json
+from typing import Any, Callable, Iterable, List, Optional, Set
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+import models
+from cache import cache, key_for
+from config import settings
+from database import AppSession
+
+# Invalidation scopes. Admin dashboards aggregate across every HR, so any relevant
+# write invalidates them; HR dashboards only see their own jobs.
+ADMIN_DASHBOARD_SCOPE = "admin-dashboard"
+
+
+def hr_dashboard_scope(hr_id: int) -> str:
+    return f"hr-dashboard:{hr_id}"
+
+
+def job_rankings_scope(job_id: int) -> str:
+    return f"job-rankings:{job_id}"
+
+
+# ---------------------------------------------------------------------------
+# Cached responses with ETag / If-None-Match
+# ---------------------------------------------------------------------------
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _response(request: Request, etag: str, body: bytes) -> Response:
+    headers = {
+        "ETag": etag,
+        # Browsers must revalidate on every poll; the ETag makes unchanged polls a bodiless 304.
+        "Cache-Control": "private, no-cache",
+    }
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached_response(
+    request: Request,
+    namespace: str,
+    principal: Any,
+    scopes: List[str],
+    compute: Callable[[], Any],
+    ttl_s: Optional[float] = None
+) -> Response:
+    """
+    Returns the JSON response for an endpoint, served from the response cache
+    when a fresh entry exists for (endpoint, principal, query string).
+
+    `compute` builds the response data (models/dicts, as the endpoint would
+    return) on a miss. Entries expire after `ttl_s` or as soon as any of
+    `scopes` is invalidated by a write. Responses carry an ETag; a request whose
+    If-None-Match still matches gets a 304 with no body.
+    """
+    ttl_s = settings.DASHBOARD_CACHE_TTL_SECONDS if ttl_s is None else ttl_s
+    key = key_for(cache, namespace, scopes, principal, str(request.query_params))
+
+    entry = cache.get(key) if ttl_s > 0 else None
+    if entry is not None:
+        etag, _, body = entry.partition(b"\n")
+        return _response(request, etag.decode("ascii"), body)
+
+    body = json.dumps(jsonable_encoder(compute()), separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    if ttl_s > 0:
+        cache.set(key, etag.encode("ascii") + b"\n" + body, ttl_s)
+    return _response(request, etag, body)
+
+
+def invalidate(scopes: Iterable[str]) -> None:
+    scopes = list(scopes)
+    if scopes:
+        cache.invalidate(scopes)
+
+
+# ---------------------------------------------------------------------------
+# Invalidation hooks
+# ---------------------------------------------------------------------------
+
+def _affected_scopes(session: Session) -> Set[str]:
+    """
+    Dashboard and job-ranking scopes touched by the flush: new/deleted applications and analyses,
+    analysis status/score changes, job postings being created, changed or deleted,
+    and HR/candidate accounts being added or removed.
+    """
+    job_ids: Set[int] = set()
+    hr_ids: Set[int] = set()
+    admin_totals_changed = False
+
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, (models.Application, models.Analysis)):
+            job_ids.add(inspect(obj).dict.get("job_id"))
+        elif isinstance(obj, models.JobPosting):
+            hr_ids.add(inspect(obj).dict.get("hr_id"))
+        elif isinstance(obj, (models.Hr, models.Candidates)):
+            admin_totals_changed = True  # User counts on the admin dashboard
+
+    for obj in session.dirty:
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, models.Analysis):
+            job_ids.add(obj.job_id)
+        elif isinstance(obj, models.JobPosting):
+            hr_ids.add(obj.hr_id)
+            job_ids.add(obj.job_id)  # Scoring weights change the job's rankings
+        elif isinstance(obj, models.Hr):
+            hr_ids.add(obj.hr_id)  # Name/status shown in the admin HR activity table
+
+    job_ids.discard(None)
+    if job_ids:
+        rows = session.connection().execute(
+            select(models.JobPosting.hr_id).where(models.JobPosting.job_id.in_(job_ids))
+        )
+        hr_ids.update(row[0] for row in rows)
+    hr_ids.discard(None)
+
+    if not hr_ids and not job_ids and not admin_totals_changed:
+        return set()
+    return (
+        {ADMIN_DASHBOARD_SCOPE}
+        | {hr_dashboard_scope(hr_id) for hr_id in hr_ids}
+        | {job_rankings_scope(job_id) for job_id in job_ids}
+    )
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    scopes = _affected_scopes(session)
+    if scopes:
+        session.info.setdefault("invalidate_scopes", set()).update(scopes)
+
+
+def _after_commit(session: Session) -> None:
+    invalidate(session.info.pop("invalidate_scopes", ()))
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop("invalidate_scopes", None)
+
+
+def register(session_factory=AppSession) -> None:
+    """
+    Invalidates cached dashboard and ranking responses after each commit that writes
+    applications, analyses (apply, status changes, completion) or job postings.
+    Scopes are only invalidated once the transaction commits.
+    """
+    for name, listener in (("after_flush", _after_flush), ("after_commit", _after_commit), ("after_rollback", _after_rollback)):
+        if not event.contains(session_factory, name, listener):
+            event.listen(session_factory, name, listener)
@@ -1,15 +1,18 @@
 # routers/admin.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request  
+import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
 from sqlalchemy.orm import Session, joinedload  
 from sqlalchemy import func
-from typing import List  
-from database import get_db
+from typing import List, Optional
+from database import get_db, get_read_db
 import models, schemas, auth
-from security import verify_password
+from security import verify_and_update_password
 from security import get_password_hash
 
 from logging_utils import log_admin_action
+from pagination import PageParams, paginate
+import serialization
 
 router = APIRouter(tags=["Admin"])
 
@@ -25,7 +28,8 @@ def login_admin(
     """
     admin = db.query(models.Admin).filter(models.Admin.email == admin_data.email).first()
     
-    if not admin or not verify_password(admin_data.password, admin.pass_word):
+    valid, new_hash = verify_and_update_password(admin_data.password, admin.pass_word) if admin else (False, None)
+    if not valid:
         # --- Log failed login attempt ---
         log_admin_action(
             db=db,
@@ -34,17 +38,20 @@ def login_admin(
             actiontype="LOGIN",
             actiondescription=f"Failed login attempt for email: {admin_data.email}",
             affectedtable="admin",
-            status="Failure"
+            status="Failure",
+            buffered=True
         )
-        db.commit() # Commit the failure log
-        
-        
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
         
+    if new_hash:
+        # Hashed with outdated Argon2 parameters: upgrade now that we have the plain password
+        admin.pass_word = new_hash
+        db.commit()
+
     # --- Log successful login ---
     log_admin_action(
         db=db,
@@ -53,11 +60,10 @@ def login_admin(
         actiontype="LOGIN",
         actiondescription="Admin successfully logged in.",
         affectedtable="admin",
-        status="Success"
+        status="Success",
+        buffered=True
     )
-    db.commit() # Commit the success log
-    
-    
+
     access_token = auth.create_access_token(
         data={"sub": str(admin.adminid), "role": "admin"}
     )
@@ -79,31 +85,35 @@ def get_current_admin_me(
 
 @router.get("/candidates", response_model=List[schemas.CandidateRead])
 def get_all_candidates_admin(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_admin: models.Admin = Depends(auth.get_current_admin)
 ):
     """
-    Retrieves a list of all candidates (Admin Use).
+    Retrieves a page of candidates ordered by ID (Admin Use).
     (Moved from candidates.py)
     """
-    results = db.query(
+    query = db.query(
         models.Candidates,
         func.count(models.Application.application_id).label("applications_count")
     ).outerjoin(
         models.Application, models.Candidates.candid == models.Application.candid
     ).group_by(
         models.Candidates.candid
-    ).order_by(
-        models.Candidates.candid
-    ).all()
+    )
+    results = paginate(
+        query, page, response,
+        sort_columns=[models.Candidates.candid],
+        row_key=lambda row: [row[0].candid]
+    )
 
-    candidates_with_counts = []
-    for candidate, count in results:
-        candidate_data = schemas.CandidateRead.model_validate(candidate)
+    # Validate the whole page in one pydantic-core call, then render it in one pass
+    candidates_with_counts = serialization.validate_list(schemas.CandidateRead, [candidate for candidate, _ in results])
+    for candidate_data, (_, count) in zip(candidates_with_counts, results):
         candidate_data.applications_count = count
-        candidates_with_counts.append(candidate_data)
 
-    return candidates_with_counts
+    return serialization.list_response(schemas.CandidateRead, candidates_with_counts, response, validated=True)
 
 
 @router.get("/candidates/{candidate_id}", response_model=schemas.CandidateRead)
@@ -167,6 +177,7 @@ def suspend_candidate(
     
         
         db.commit()
+        auth.invalidate_principal("candidate", candidate_id)
         db.refresh(candidate)
         
     except Exception as e:
@@ -179,9 +190,9 @@ def suspend_candidate(
             actiontype="UPDATE",
             actiondescription=f"Failed to suspend Candidate: {candidate.email}. Error: {str(e)}",
             affectedtable="candidates",
-            status="Failure"
+            status="Failure",
+            buffered=True
         )
-        db.commit()
         # --- End Log ---
         raise HTTPException(status_code=500, detail="Could not suspend candidate.")
 
@@ -220,6 +231,7 @@ def activate_candidate(
         # --- End Log ---
         
         db.commit()
+        auth.invalidate_principal("candidate", candidate_id)
         db.refresh(candidate)
         
     except Exception as e:
@@ -232,9 +244,9 @@ def activate_candidate(
             actiontype="UPDATE",
             actiondescription=f"Failed to activate Candidate: {candidate.email}. Error: {str(e)}",
             affectedtable="candidates",
-            status="Failure"
+            status="Failure",
+            buffered=True
         )
-        db.commit()
         # --- End Log ---
         raise HTTPException(status_code=500, detail="Could not activate candidate.")
 
@@ -245,13 +257,15 @@ def activate_candidate(
 
 @router.get("/hr", response_model=List[schemas.HrRead])
 def get_all_hr_admin(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_admin: models.Admin = Depends(auth.get_current_admin)
 ):
     """
-    Retrieves a list of all HR users (Admin Use).
+    Retrieves a page of HR users ordered by ID (Admin Use).
     """
-    hr_users = db.query(models.Hr).all()
+    hr_users = paginate(db.query(models.Hr), page, response, sort_columns=[models.Hr.hr_id])
     return hr_users
 
 
@@ -285,6 +299,7 @@ def suspend_hr(
         # --- End Log ---
         
         db.commit()
+        auth.invalidate_principal("hr", hr_id)
         db.refresh(hr_user)
         
     except Exception as e:
@@ -297,9 +312,9 @@ def suspend_hr(
             actiontype="UPDATE",
             actiondescription=f"Failed to suspend HR User: {hr_user.email}. Error: {str(e)}",
             affectedtable="hr",
-            status="Failure"
+            status="Failure",
+            buffered=True
         )
-        db.commit()
         # --- End Log ---
         raise HTTPException(status_code=500, detail="Could not suspend HR user.")
         
@@ -336,6 +351,7 @@ def activate_hr(
         # --- End Log ---
         
         db.commit()
+        auth.invalidate_principal("hr", hr_id)
         db.refresh(hr_user)
 
     except Exception as e:
@@ -348,9 +364,9 @@ def activate_hr(
             actiontype="UPDATE",
             actiondescription=f"Failed to activate HR User: {hr_user.email}. Error: {str(e)}",
             affectedtable="hr",
-            status="Failure"
+            status="Failure",
+            buffered=True
         )
-        db.commit()
         # --- End Log ---
         raise HTTPException(status_code=500, detail="Could not activate HR user.")
 
@@ -388,6 +404,7 @@ def delete_hr_account(
         # --- End Log ---
         
         db.commit()
+        auth.invalidate_principal("hr", hr_id)
         
     except Exception as e:
         db.rollback()
@@ -399,9 +416,9 @@ def delete_hr_account(
             actiontype="DELETE",
             actiondescription=f"Failed to delete HR User: {hr_email}. Error: {str(e)}",
             affectedtable="hr",
-            status="Failure"
+            status="Failure",
+            buffered=True
         )
-        db.commit()
         # --- End Log ---
         raise HTTPException(status_code=500, detail="Could not delete HR user.")
         
@@ -440,6 +457,7 @@ def delete_candidate_account(
         # --- End Log ---
         
         db.commit()
+        auth.invalidate_principal("candidate", candidate_id)
         
     except Exception as e:
         db.rollback()
@@ -451,9 +469,9 @@ def delete_candidate_account(
             actiontype="DELETE",
             actiondescription=f"Failed to delete Candidate: {candidate_email}. Error: {str(e)}",
             affectedtable="candidates",
-            status="Failure"
+            status="Failure",
+            buffered=True
         )
-        db.commit()
         # --- End Log ---
         raise HTTPException(status_code=500, detail="Could not delete candidate.")
         
@@ -497,6 +515,7 @@ def reset_hr_password(
         # --- End Log ---
         
         db.commit()
+        auth.invalidate_principal("hr", hr_id)
         
     except Exception as e:
         db.rollback()
@@ -508,9 +527,9 @@ def reset_hr_password(
             actiontype="UPDATE",
             actiondescription=f"Failed to reset password for HR User: {hr_user.email}. Error: {str(e)}",
             affectedtable="hr",
-            status="Failure"
+            status="Failure",
+            buffered=True
         )
-        db.commit()
         # --- End Log ---
         raise HTTPException(status_code=500, detail="Could not reset HR password.")
     
@@ -552,6 +571,7 @@ def reset_candidate_password(
         # --- End Log ---
         
         db.commit()
+        auth.invalidate_principal("candidate", candidate_id)
         
     except Exception as e:
         db.rollback()
@@ -563,9 +583,9 @@ def reset_candidate_password(
             actiontype="UPDATE",
             actiondescription=f"Failed to reset password for Candidate: {candidate.email}. Error: {str(e)}",
             affectedtable="candidates",
-            status="Failure"
+            status="Failure",
+            buffered=True
         )
-        db.commit()
         # --- End Log ---
         raise HTTPException(status_code=500, detail="Could not reset candidate password.")
         
@@ -574,25 +594,60 @@ def reset_candidate_password(
 
 # --- 6. NEW ENDPOINT TO FETCH SYSTEM LOGS ---
 
+class SystemLogFilters:
+    """
+    Query parameters for filtering the system logs. Use as `filters: SystemLogFilters = Depends()`.
+    """
+
+    def __init__(
+        self,
+        admin_id: Optional[int] = Query(None, description="Only actions by this admin."),
+        actiontype: Optional[str] = Query(None, description="Only this action type, e.g. LOGIN, UPDATE, DELETE."),
+        status: Optional[str] = Query(None, description="Only this status, e.g. Success, Failure."),
+        since: Optional[datetime.datetime] = Query(None, description="Only entries at or after this time."),
+        until: Optional[datetime.datetime] = Query(None, description="Only entries before this time.")
+    ):
+        if since is not None and until is not None and since >= until:
+            raise HTTPException(status_code=400, detail="'since' must be earlier than 'until'")
+        self.admin_id = admin_id
+        self.actiontype = actiontype
+        self.status = status
+        self.since = since
+        self.until = until
+
+    def apply(self, query):
+        if self.admin_id is not None:
+            query = query.filter(models.SystemLog.adminid == self.admin_id)
+        if self.actiontype is not None:
+            query = query.filter(models.SystemLog.actiontype == self.actiontype)
+        if self.status is not None:
+            query = query.filter(models.SystemLog.status == self.status)
+        if self.since is not None:
+            query = query.filter(models.SystemLog.timestamped >= self.since)
+        if self.until is not None:
+            query = query.filter(models.SystemLog.timestamped < self.until)
+        return query
+
+
 @router.get(
     "/system-logs",
     response_model=List[schemas.SystemLogResponse] 
 )
 def get_system_logs(
-    db: Session = Depends(get_db),
-    current_admin: models.Admin = Depends(auth.get_current_admin), # Protected
-    skip: int = 0,
-    limit: int = 100 
+    response: Response,
+    page: PageParams = Depends(),
+    filters: SystemLogFilters = Depends(),
+    db: Session = Depends(get_read_db),
+    current_admin: models.Admin = Depends(auth.get_current_admin) # Protected
 ):
     """
-    Get all system logs. Protected for Super Admins.
+    Get system logs, newest first, one page at a time. Protected for Super Admins.
+    A time range only scans the monthly partitions it overlaps.
     """
-    logs = (
-        db.query(models.SystemLog)
-        .options(joinedload(models.SystemLog.admin)) 
-        .order_by(models.SystemLog.timestamped.desc()) 
-        .offset(skip)
-        .limit(limit)
-        .all()
+    logs = paginate(
+        filters.apply(db.query(models.SystemLog).options(joinedload(models.SystemLog.admin))),
+        page, response,
+        sort_columns=[models.SystemLog.timestamped, models.SystemLog.logid],
+        descending=True
     )
-    return logs
\ No newline at end of file
+    return logs
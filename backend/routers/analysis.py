@@ -2,12 +2,21 @@
 
 import os
 import json
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, BackgroundTasks, status
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, BackgroundTasks, status, Response, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 import models
 import schemas
-from database import get_db
+import auth
+from database import get_read_db, get_async_db, run_in_sync_session
+import fieldsets
+import exports
+import uploads
+from pagination import PageParams, paginate
 from ai_services import analyzer_service, jd_matching_service, utils
 
 router = APIRouter(prefix="/analysis", tags=["Analysis"])
@@ -20,7 +29,7 @@ UPLOAD_DIRECTORY = "static/resumes"
 async def retry_failed_analysis(
     application_id: int,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Triggers a new background analysis for an existing application
@@ -29,17 +38,15 @@ async def retry_failed_analysis(
     """
     
     # 1. Finding the application
-    application = db.query(models.Application).filter(
-        models.Application.application_id == application_id
-    ).first()
+    application = await db.get(models.Application, application_id)
     
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
 
     # 2. Find the associated analysis report
-    analysis = db.query(models.Analysis).filter(
-        models.Analysis.application_id == application_id
-    ).first()
+    analysis = await db.scalar(
+        select(models.Analysis).where(models.Analysis.application_id == application_id)
+    )
 
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis report not found for this application")
@@ -56,7 +63,8 @@ async def retry_failed_analysis(
         analysis.analysis_status = "Pending"
         analysis.remarks = '{"status": "Retrying analysis..."}' 
         analysis.overall_score = None 
-        db.commit()
+        analysis.weighted_score = None
+        await db.commit()
 
         # 5. Add the background task
         background_tasks.add_task(
@@ -68,7 +76,7 @@ async def retry_failed_analysis(
         return {"message": f"Analysis for application {application_id} has been successfully retried."}
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
 
@@ -78,15 +86,13 @@ async def rerun_analysis_with_new_cv(
     application_id: int,
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Triggers a new background analysis for an existing application
     using a newly uploaded CV.
     """
-    application = db.query(models.Application).filter(
-        models.Application.application_id == application_id
-    ).first()
+    application = await db.get(models.Application, application_id)
     
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
@@ -94,33 +100,27 @@ async def rerun_analysis_with_new_cv(
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file uploaded or file has no name.")
 
-    # Save the new CV
-    if not os.path.exists(UPLOAD_DIRECTORY):
-        os.makedirs(UPLOAD_DIRECTORY)
-        
-    # Use a unique name for the new CV
-    file_path = os.path.join(UPLOAD_DIRECTORY, f"rerun_{application_id}_{file.filename}")
-    
+    # Save the new CV under a unique name (streamed, size-capped, renamed into place once complete)
+    file_path = os.path.join(UPLOAD_DIRECTORY, f"rerun_{application_id}_{uploads.safe_filename(file.filename)}")
+    await uploads.save_upload(file, file_path)
+
     try:
-        with open(file_path, "wb") as buffer:
-            buffer.write(await file.read())
-            
-        
         application.cv_path = file_path 
             
         
-        analysis = db.query(models.Analysis).filter(
-            models.Analysis.application_id == application_id
-        ).first()
+        analysis = await db.scalar(
+            select(models.Analysis).where(models.Analysis.application_id == application_id)
+        )
         
         if analysis:
             analysis.analysis_status = "Pending"
             analysis.remarks = '{"status": "Re-running with new CV..."}' 
             analysis.overall_score = None 
-            db.commit()
+            analysis.weighted_score = None
+            await db.commit()
         else:
             
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=404, detail="Analysis report not found for this application")
 
         # Add the background task i.e analysis 
@@ -143,19 +143,22 @@ async def analyze_candidate_cv_and_save(
     candid: int = Form(...),
     job_id: int = Form(...),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
      Manually runs analysis for a candidate FOR A SPECIFIC JOB
-    they have already applied to. This is a synchronous (slow) endpoint.
+    they have already applied to. This is a synchronous (slow) endpoint:
+    the pipeline runs in the threadpool with its own sync session.
     """
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file uploaded or file has no name.")
 
-    application = db.query(models.Application).filter(
-        models.Application.candid == candid,
-        models.Application.job_id == job_id
-    ).first()
+    application = await db.scalar(
+        select(models.Application).where(
+            models.Application.candid == candid,
+            models.Application.job_id == job_id
+        )
+    )
 
     if not application:
         raise HTTPException(
@@ -163,26 +166,23 @@ async def analyze_candidate_cv_and_save(
             detail="Application not found. Candidate must apply for this job before a manual analysis can be run."
         )
 
-    if not os.path.exists(UPLOAD_DIRECTORY):
-        os.makedirs(UPLOAD_DIRECTORY)
+    file_path = os.path.join(UPLOAD_DIRECTORY, f"{application.application_id}_{uploads.safe_filename(file.filename)}")
+    await uploads.save_upload(file, file_path)
 
-    file_path = os.path.join(UPLOAD_DIRECTORY, f"{application.application_id}_{file.filename}")
-    
     try:
-        with open(file_path, "wb") as buffer:
-            buffer.write(await file.read())
-
-        new_analysis = analyzer_service.analyze_full_candidate_profile(
-            application_id=application.application_id,
-            candid=candid,
-            cv_file_path=file_path,
-            db=db,
-            job_id=job_id
-        )
-        return new_analysis
+        def run_analysis(sync_db: Session) -> schemas.AnalysisRead:
+            new_analysis = analyzer_service.analyze_full_candidate_profile(
+                application_id=application.application_id,
+                candid=candid,
+                cv_file_path=file_path,
+                db=sync_db,
+                job_id=job_id
+            )
+            return schemas.AnalysisRead.model_validate(new_analysis)
+
+        return await run_in_sync_session(run_analysis)
 
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
     finally:
         if os.path.exists(file_path):
@@ -201,19 +201,18 @@ async def match_cv_to_job_description(
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file uploaded or file has no name.")
 
-    if not os.path.exists(UPLOAD_DIRECTORY):
-        os.makedirs(UPLOAD_DIRECTORY)
+    # Unique name: concurrent requests may upload files with the same name
+    file_path = os.path.join(UPLOAD_DIRECTORY, f"match_{uuid.uuid4().hex}_{uploads.safe_filename(file.filename)}")
+    await uploads.save_upload(file, file_path)
 
-    file_path = os.path.join(UPLOAD_DIRECTORY, file.filename)
     try:
-        with open(file_path, "wb") as buffer:
-            buffer.write(await file.read())
-
-        cv_content = utils.read_cv(file_path)
-        cv_analysis_result = analyzer_service._analyze_cv_text(cv_content)
-        jd_analysis_result = jd_matching_service.analyze_job_description(job_description)
+        # The LLM calls are blocking: keep them off the event loop
+        cv_content = await run_in_threadpool(utils.read_cv, file_path)
+        cv_analysis_result = await run_in_threadpool(analyzer_service._analyze_cv_text, cv_content)
+        jd_analysis_result = await run_in_threadpool(jd_matching_service.analyze_job_description, job_description)
 
-        match_result = jd_matching_service.get_match_analysis(
+        match_result = await run_in_threadpool(
+            jd_matching_service.get_match_analysis,
             cv_analysis=cv_analysis_result,
             jd_analysis=jd_analysis_result
         )
@@ -231,15 +230,69 @@ async def match_cv_to_job_description(
 
 
 @router.get("/", response_model=List[schemas.AnalysisRead])
-def get_all_analysis(db: Session = Depends(get_db)):
+def get_all_analysis(
+    response: Response,
+    page: PageParams = Depends(),
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Retrieves analysis reports from the database, one page at a time.
+    Pass `fields=` to fetch only some columns (e.g. the scores, without remarks/feedback).
+    """
+    selected = fieldsets.parse_fields(fields, schemas.AnalysisRead)
+    query = db.query(models.Analysis).options(*fieldsets.load_options(models.Analysis, selected))
+    reports = paginate(query, page, response, sort_columns=[models.Analysis.reportid])
+    return fieldsets.sparse_response(reports, schemas.AnalysisRead, selected, response)
+
+
+# Columns of an analyses export (the large remarks/feedback text is left out)
+ANALYSIS_EXPORT_COLUMNS = [
+    ("reportid", "int"), ("candid", "int"), ("job_id", "int"), ("application_id", "int"),
+    ("careerscore", "int"), ("jd_match_score", "int"), ("githubscore", "int"),
+    ("leetcodescore", "int"), ("linkedinscore", "int"), ("trustscore", "int"),
+    ("overall_score", "int"), ("total_possible_score", "int"), ("weighted_score", "float"),
+    ("analysis_status", "str"), ("analyzed_at", "datetime"),
+]
+
+
+# Declared before "/{candid}" so "export" is not parsed as a candidate id
+@router.get("/export")
+def export_analyses(
+    job_id: Optional[int] = None,
+    export: exports.ExportParams = Depends(),
+    db: Session = Depends(get_read_db),
+    current_user = Depends(auth.get_current_hr_or_admin)
+):
     """
-    Retrieves all analysis reports from the database.
+    Streams analysis reports (optionally for one job) as NDJSON, CSV or Parquet.
+    HR users get the reports of their own jobs; admins all of them.
     """
-    return db.query(models.Analysis).all()
+    # None for admins: no ownership filter
+    hr_id = current_user.hr_id if isinstance(current_user, models.Hr) else None
+    if job_id is not None:
+        job = db.query(models.JobPosting.job_id, models.JobPosting.hr_id).filter(models.JobPosting.job_id == job_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if hr_id is not None and job.hr_id != hr_id:
+            raise HTTPException(status_code=403, detail="You can only export analyses of your own jobs.")
+
+    def build_query(session: Session):
+        query = session.query(*[getattr(models.Analysis, name) for name, _ in ANALYSIS_EXPORT_COLUMNS])
+        if hr_id is not None:
+            query = query.join(
+                models.JobPosting, models.JobPosting.job_id == models.Analysis.job_id
+            ).filter(models.JobPosting.hr_id == hr_id)
+        if job_id is not None:
+            query = query.filter(models.Analysis.job_id == job_id)
+        return query.order_by(models.Analysis.reportid)
+
+    basename = f"job_{job_id}_analyses" if job_id is not None else "analyses"
+    return exports.export_response(export, build_query, ANALYSIS_EXPORT_COLUMNS, basename)
 
 
 @router.get("/{candid}", response_model=schemas.AnalysisRead)
-def get_analysis_by_candidate(candid: int, db: Session = Depends(get_db)):
+def get_analysis_by_candidate(candid: int, db: Session = Depends(get_read_db)):
     """
     Retrieves the analysis for a specific candidate by their ID.
     """
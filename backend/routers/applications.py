@@ -1,11 +1,14 @@
 # In applications.py
 
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks, Form, Response
 from typing import Optional # 
 from sqlalchemy.orm import Session, joinedload
 from database import get_db
+from pagination import PageParams, paginate
 import models, schemas
+import exports
+import uploads
 import datetime
 import auth
 import os 
@@ -60,10 +63,12 @@ def apply_to_job(
         print(f"New CV uploaded for application: {cv_file.filename}")
         timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
         
-        safe_filename = f"app_{candid}_{job_id}_{timestamp}_{cv_file.filename}"
+        safe_filename = f"app_{candid}_{job_id}_{timestamp}_{uploads.safe_filename(cv_file.filename)}"
         try:
             # Save to static/resumes folder
             cv_path_for_application = utils.save_upload_file(cv_file, f"static/resumes/{safe_filename}")
+        except HTTPException:
+            raise
         except Exception as e:
              raise HTTPException(status_code=500, detail=f"Failed to save uploaded CV: {str(e)}")
     else:
@@ -110,7 +115,8 @@ def apply_to_job(
         db.commit()
         db.refresh(new_application)
 
-        # 6. Trigger Background Analysis
+        # 6. Trigger Background Analysis (ranks are refreshed once the score lands;
+        # until then the new applicant sorts last in the materialized rankings)
         background_tasks.add_task(
             analyzer_service.run_automatic_analysis,
             application_id=new_application.application_id,
@@ -149,22 +155,71 @@ def get_applications_for_current_candidate(
     return applications
 
 @router.get("/job/{job_id}", response_model=list[schemas.ApplicationRead])
-def get_job_applicants(job_id: int, db: Session = Depends(get_db)):
+def get_job_applicants(job_id: int, response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)):
     """
-    Retrieves all applicants for a specific job posting.
+    Retrieves applicants for a specific job posting, oldest application first, one page at a time.
     """
-    applications = (
+    applications = paginate(
         db.query(models.Application)
         .options(
             joinedload(models.Application.candidate),
             joinedload(models.Application.job)
         )
-        .filter(models.Application.job_id == job_id)
-        .all()
+        .filter(models.Application.job_id == job_id),
+        page, response,
+        sort_columns=[models.Application.applied_on, models.Application.application_id]
     )
     return applications
 
 
+# Columns of an applicants export
+APPLICANT_EXPORT_COLUMNS = [
+    ("application_id", "int"), ("candid", "int"), ("firstname", "str"), ("lastname", "str"),
+    ("email", "str"), ("status", "str"), ("applied_on", "datetime"),
+    ("analysis_status", "str"), ("overall_score", "int"), ("weighted_score", "float"),
+]
+
+
+@router.get("/job/{job_id}/export")
+def export_job_applicants(
+    job_id: int,
+    export: exports.ExportParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user = Depends(auth.get_current_hr_or_admin)
+):
+    """
+    Streams every applicant of a job, oldest application first, as NDJSON, CSV or Parquet.
+    HR users can export their own jobs; admins any job.
+    """
+    job = db.query(models.JobPosting.job_id, models.JobPosting.hr_id).filter(models.JobPosting.job_id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if isinstance(current_user, models.Hr) and job.hr_id != current_user.hr_id:
+        raise HTTPException(status_code=403, detail="You can only export applicants of your own jobs.")
+
+    def build_query(session: Session):
+        return session.query(
+            models.Application.application_id,
+            models.Candidates.candid,
+            models.Candidates.firstname,
+            models.Candidates.lastname,
+            models.Candidates.email,
+            models.Application.status,
+            models.Application.applied_on,
+            models.Analysis.analysis_status,
+            models.Analysis.overall_score,
+            models.Analysis.weighted_score,
+        ).join(
+            models.Candidates, models.Application.candid == models.Candidates.candid
+        ).outerjoin(
+            models.Analysis, models.Analysis.application_id == models.Application.application_id
+        ).filter(
+            models.Application.job_id == job_id
+        ).order_by(models.Application.applied_on, models.Application.application_id)
+
+    return exports.export_response(export, build_query, APPLICANT_EXPORT_COLUMNS, f"job_{job_id}_applicants")
+
+
 @router.put("/{application_id}/status", response_model=schemas.ApplicationRead)
 def update_application_status(application_id: int, application_status: str, db: Session = Depends(get_db)):
     """
@@ -1,13 +1,13 @@
 # routers/candidates.py
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-import shutil
 import os
 from sqlalchemy.orm import Session,joinedload
-from sqlalchemy import func
-from database import get_db
+from sqlalchemy import func, select
+from database import get_db, get_read_db
 import models, schemas
-from security import get_password_hash, verify_password
+from security import get_password_hash, verify_password, verify_and_update_password
 import auth
+import uploads
 from typing import List
 
 router = APIRouter(prefix="/candidates", tags=["Candidates"])
@@ -58,7 +58,8 @@ def login_candidate(candidate_data: schemas.CandidateLogin, db: Session = Depend
     """
     db_candidate = db.query(models.Candidates).filter(models.Candidates.email == candidate_data.email).first()
 
-    if not db_candidate or not verify_password(candidate_data.pass_word, db_candidate.pass_word):
+    valid, new_hash = verify_and_update_password(candidate_data.pass_word, db_candidate.pass_word) if db_candidate else (False, None)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -71,6 +72,12 @@ def login_candidate(candidate_data: schemas.CandidateLogin, db: Session = Depend
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Your account has been suspended. Please contact support."
         )
+
+    if new_hash:
+        # Hashed with outdated Argon2 parameters: upgrade now that we have the plain password
+        db_candidate.pass_word = new_hash
+        db.commit()
+
     access_token = auth.create_access_token(
         data={"sub": str(db_candidate.candid), "role": "candidate"}
     )
@@ -78,6 +85,23 @@ def login_candidate(candidate_data: schemas.CandidateLogin, db: Session = Depend
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+def _candidate_read(db: Session, candid: int) -> schemas.CandidateRead:
+    """
+    Loads the candidate together with their application count in one SELECT
+    (the count is a correlated subquery), refreshing any stale instance in the session.
+    """
+    application_count = select(func.count(models.Application.application_id)).where(
+        models.Application.candid == models.Candidates.candid
+    ).scalar_subquery()
+    candidate, count = db.query(models.Candidates, application_count).filter(
+        models.Candidates.candid == candid
+    ).populate_existing().one()
+
+    candidate_data = schemas.CandidateRead.model_validate(candidate)
+    candidate_data.applications_count = count
+    return candidate_data
+
+
 @router.get("/me", response_model=schemas.CandidateRead)
 def get_current_candidate(
     current_user: models.Candidates = Depends(auth.get_current_user),
@@ -86,12 +110,7 @@ def get_current_candidate(
     """
     Retrieves the profile information for the currently authenticated candidate.
     """
-    application_count = db.query(models.Application).filter(models.Application.candid == current_user.candid).count()
-
-    candidate_data = schemas.CandidateRead.model_validate(current_user)
-    candidate_data.applications_count = application_count
-
-    return candidate_data
+    return _candidate_read(db, current_user.candid)
 
 
 @router.put("/profile", response_model=schemas.CandidateRead)
@@ -126,16 +145,13 @@ def update_current_candidate_profile(
 
     try:
         db.commit()
-        db.refresh(candidate)
+        auth.invalidate_principal("candidate", candidate.candid)
     except Exception as e:
         db.rollback()
         print(f"Database error during profile update: {e}")
         raise HTTPException(status_code=500, detail="Could not update profile due to a database error.")
 
-    application_count = db.query(models.Application).filter(models.Application.candid == candidate.candid).count()
-    candidate_data = schemas.CandidateRead.model_validate(candidate)
-    candidate_data.applications_count = application_count
-    return candidate_data
+    return _candidate_read(db, candidate.candid)
 
 
 @router.post("/upload-resume", response_model=schemas.CandidateRead)
@@ -162,28 +178,23 @@ def upload_current_candidate_resume(
     file_path = os.path.join(RESUME_DIR, safe_filename)
 
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        uploads.store_upload(file, file_path, allowed_extensions=allowed_resume_extensions)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error saving resume file: {e}")
         raise HTTPException(status_code=500, detail="Could not save resume file.")
-    finally:
-        file.file.close()
 
     candidate.resumelink = file_path
     try:
         db.commit()
-        db.refresh(candidate)
+        auth.invalidate_principal("candidate", candidate_id)
     except Exception as e:
         db.rollback()
         print(f"Database error updating resumelink: {e}")
         raise HTTPException(status_code=500, detail="Could not update resume link in database.")
 
-    application_count = db.query(models.Application).filter(models.Application.candid == candidate.candid).count()
-    
-    candidate_data = schemas.CandidateRead.model_validate(candidate)
-    candidate_data.applications_count = application_count
-    return candidate_data
+    return _candidate_read(db, candidate_id)
 
 
 @router.post("/upload-linkedin-pdf", response_model=schemas.CandidateRead)
@@ -209,28 +220,23 @@ def upload_current_candidate_linkedin_pdf(
     file_path = os.path.join(LINKEDIN_PDF_DIR, safe_filename)
 
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        uploads.store_upload(file, file_path, allowed_extensions=['.pdf'])
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error saving LinkedIn PDF file: {e}")
         raise HTTPException(status_code=500, detail="Could not save LinkedIn PDF file.")
-    finally:
-        file.file.close()
 
     candidate.linkedin_pdf_link = file_path
     try:
         db.commit()
-        db.refresh(candidate)
+        auth.invalidate_principal("candidate", candidate_id)
     except Exception as e:
         db.rollback()
         print(f"Database error updating linkedin_pdf_link: {e}")
         raise HTTPException(status_code=500, detail="Could not update LinkedIn PDF link in database.")
 
-    application_count = db.query(models.Application).filter(models.Application.candid == candidate.candid).count()
-    
-    candidate_data = schemas.CandidateRead.model_validate(candidate)
-    candidate_data.applications_count = application_count
-    return candidate_data
+    return _candidate_read(db, candidate_id)
 
 
 @router.put("/me/change-password")
@@ -251,6 +257,7 @@ def change_current_candidate_password(
     candidate.pass_word = hashed_new_password
     try:
         db.commit()
+        auth.invalidate_principal("candidate", candidate.candid)
     except Exception as e:
         db.rollback()
         print(f"Database error changing password: {e}")
@@ -268,9 +275,11 @@ def delete_current_candidate(
     Allows the currently authenticated candidate to delete their own account.
     """
     candidate_to_delete = current_user
+    candidate_id = candidate_to_delete.candid
     try:
         db.delete(candidate_to_delete)
         db.commit()
+        auth.invalidate_principal("candidate", candidate_id)
     except Exception as e:
         db.rollback()
         print(f"Database error deleting candidate: {e}")
@@ -284,7 +293,7 @@ def delete_current_candidate(
 
 @router.get("/my-feedback", response_model=List[schemas.FeedbackRead])
 def get_my_feedback(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.Candidates = Depends(auth.get_current_user) # Protects
 ):
     """
@@ -1,12 +1,17 @@
 # routers/hr.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request  # Added Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response  # Added Request
 from sqlalchemy.orm import Session, joinedload, Query
-from database import get_db
+from database import get_db, get_read_db
+from pagination import PageParams, paginate
+import counters
+import response_cache
+import fieldsets
+import serialization
 import models, schemas, auth 
-from security import get_password_hash, verify_password
+from security import get_password_hash, verify_password, verify_and_update_password
 from sqlalchemy import desc, func, distinct, and_
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta, date
 
 
@@ -43,9 +48,9 @@ def create_hr(
             actiontype="Create HR",
             actiondescription=f"Failed attempt to create HR: Email '{hr.email}' already registered.",
             affectedtable="hr",
-            status="Failed"
+            status="Failed",
+            buffered=True
         )
-        db.commit() # Commit the failure log
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
 
     # --- 2. Main Action & Logging (Transaction) ---
@@ -90,7 +95,8 @@ def login_hr(hr_data: schemas.HrLogin, db: Session = Depends(get_db)):
     """Authenticates an HR user, checks if active, and returns a JWT token."""
     hr = db.query(models.Hr).filter(models.Hr.email == hr_data.email).first()
     
-    if not hr or not verify_password(hr_data.pass_word, hr.pass_word):
+    valid, new_hash = verify_and_update_password(hr_data.pass_word, hr.pass_word) if hr else (False, None)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
         
     if not hr.is_active:
@@ -98,6 +104,11 @@ def login_hr(hr_data: schemas.HrLogin, db: Session = Depends(get_db)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Your account has been suspended. Please contact admin."
         )
+
+    if new_hash:
+        # Hashed with outdated Argon2 parameters: upgrade now that we have the plain password
+        hr.pass_word = new_hash
+        db.commit()
     
     access_token = auth.create_access_token(
         data={"sub": str(hr.hr_id), "role": "hr"}
@@ -117,7 +128,7 @@ def get_current_hr_me(
 def get_hr_by_id(
     hr_id: int, 
     request: Request, 
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_admin: models.Admin = Depends(auth.get_current_admin)
 ):
     """Retrieves a single HR user's profile by their ID (Admin Protected)."""
@@ -133,9 +144,9 @@ def get_hr_by_id(
             actiontype="View HR Profile",
             actiondescription=f"Failed attempt to view profile for non-existent HR ID: {hr_id}",
             affectedtable="hr",
-            status="Failed"
+            status="Failed",
+            buffered=True
         )
-        db.commit() # Commit the log
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"HR user with id {hr_id} not found")
     
     # Log the successful read action
@@ -146,9 +157,9 @@ def get_hr_by_id(
         actiontype="View HR Profile",
         actiondescription=f"Admin viewed profile for: {hr_user.email} (ID: {hr_id})",
         affectedtable="hr",
-        status="Success"
+        status="Success",
+        buffered=True
     )
-    db.commit() # Commit the log
     
     return hr_user
 
@@ -168,6 +179,7 @@ def update_hr_profile(
     for key, value in update_data.items():
         setattr(current_user, key, value)
     db.commit()
+    auth.invalidate_principal("hr", hr_id)
     db.refresh(current_user)
     return current_user
 
@@ -189,6 +201,7 @@ def change_hr_password(
 
     current_user.pass_word = get_password_hash(passwords.new_password)
     db.commit()
+    auth.invalidate_principal("hr", hr_id)
     return {"detail": "Password updated successfully"}
 
 
@@ -212,9 +225,9 @@ def delete_hr(
             actiontype="Delete HR",
             actiondescription=f"Failed attempt to delete non-existent HR ID: {hr_id}",
             affectedtable="hr",
-            status="Failed"
+            status="Failed",
+            buffered=True
         )
-        db.commit() # Commit the log
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="HR user not found")
     
     # Store email for logging before it's deleted
@@ -236,6 +249,7 @@ def delete_hr(
         
         # Commit both the deletion and the log
         db.commit()
+        auth.invalidate_principal("hr", hr_id)
         
     except Exception as e:
         db.rollback()
@@ -266,6 +280,8 @@ def get_jobs_by_hr(
 @router.get("/jobs/{job_id}/applications", response_model=list[schemas.ApplicationRead])
 def get_applications_by_job(
     job_id: int, 
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_hr: models.Hr = Depends(auth.get_current_hr)
 ):
@@ -277,14 +293,15 @@ def get_applications_by_job(
     if job.hr_id != current_hr.hr_id:
         raise HTTPException(status_code=403, detail="You do not have permission to view applications for this job.")
 
-    applications = (
+    applications = paginate(
         db.query(models.Application)
         .options(
             joinedload(models.Application.candidate),
             joinedload(models.Application.job)
         )
-        .filter(models.Application.job_id == job_id)
-        .all()
+        .filter(models.Application.job_id == job_id),
+        page, response,
+        sort_columns=[models.Application.applied_on, models.Application.application_id]
     )
     return applications
 
@@ -349,14 +366,15 @@ def create_feedback_for_candidate(
     )
     
     db.add(db_feedback)
+    db.flush()
+    feedback_id = db_feedback.feedbackid  # Read before commit expires it, saving a refresh SELECT
     db.commit()
-    db.refresh(db_feedback)
 
     final_feedback = db.query(models.Feedback).options(
         joinedload(models.Feedback.cand),
         joinedload(models.Feedback.report),
         joinedload(models.Feedback.sender)
-    ).filter(models.Feedback.feedbackid == db_feedback.feedbackid).first()
+    ).filter(models.Feedback.feedbackid == feedback_id).first()
 
     return final_feedback
 
@@ -364,13 +382,15 @@ def create_feedback_for_candidate(
 @router.get("/my-applicants/reports/{candid}", response_model=List[schemas.AnalysisRead])
 def get_available_reports_for_candidate(
     candid: int,
+    fields: Optional[str] = None,  # Sparse fieldset, see fieldsets.parse_fields
     db: Session = Depends(get_db),
     current_hr: models.Hr = Depends(auth.get_current_hr)
 ):
-    # (Unchanged)
-    reports = db.query(models.Analysis).options(
-        joinedload(models.Analysis.job)
-    ).filter(
+    selected = fieldsets.parse_fields(fields, schemas.AnalysisRead)
+    options = fieldsets.load_options(models.Analysis, selected)
+    if selected is None or "job" in selected:
+        options.append(joinedload(models.Analysis.job))
+    reports = db.query(models.Analysis).options(*options).filter(
         models.Analysis.candid == candid,
         models.Analysis.job_id.in_(
             db.query(models.JobPosting.job_id).filter(models.JobPosting.hr_id == current_hr.hr_id)
@@ -380,7 +400,7 @@ def get_available_reports_for_candidate(
         desc(models.Analysis.analyzed_at)
     ).all()
     
-    return reports
+    return fieldsets.sparse_response(reports, schemas.AnalysisRead, selected)
 
 
 @router.get("/my-applicants/list", response_model=List[schemas.CandidateSimpleRead])
@@ -400,12 +420,17 @@ def get_all_applicants_for_hr(
     if not job_id_list:
         return []
 
+    # Only the columns CandidateSimpleRead needs: no Candidates entities are built,
+    # and the rows are rendered directly (trusted, straight from our own columns).
     applicants_query = (
         db.query(
-            models.Candidates,
+            models.Candidates.candid,
+            models.Candidates.firstname,
+            models.Candidates.lastname,
+            models.Candidates.email,
             models.Application.application_id,
             models.Application.job_id,
-            models.JobPosting.title
+            models.JobPosting.title.label("job_title")
         )
         .join(models.Application, models.Candidates.candid == models.Application.candid)
         .join(models.JobPosting, models.Application.job_id == models.JobPosting.job_id)
@@ -413,22 +438,8 @@ def get_all_applicants_for_hr(
         .distinct(models.Candidates.candid)
         .all()
     )
-    
-    applicant_list = []
-    for candidate, app_id, job_id, job_title in applicants_query:
-        applicant_list.append(
-            schemas.CandidateSimpleRead(
-                candid=candidate.candid,
-                firstname=candidate.firstname,
-                lastname=candidate.lastname,
-                email=candidate.email,
-                application_id=app_id,
-                job_id=job_id,
-                job_title=job_title
-            )
-        )
         
-    return applicant_list
+    return serialization.trusted_response(row._mapping for row in applicants_query)
 
 # ========================================================
 # === NEW HR DASHBOARD ENDPOINTS ===
@@ -440,35 +451,30 @@ def get_hr_job_ids_subquery(hr_id: int, db: Session) -> Query:
         models.JobPosting.hr_id == hr_id
     )
 
+# Dashboard endpoints are polled by the frontend: responses are cached per HR
+# (see response_cache.py), invalidated by writes to that HR's jobs, and carry an
+# ETag so unchanged polls get a 304.
+
 @router.get("/dashboard/kpis", response_model=schemas.DashboardKPIs)
 def get_hr_dashboard_kpis(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_hr: models.Hr = Depends(auth.get_current_hr)
 ):
-    # (Unchanged)
     hr_id = current_hr.hr_id
-    one_week_ago = datetime.now() - timedelta(days=7)
-    
-    hr_job_ids_subquery = get_hr_job_ids_subquery(hr_id, db)
-
-    active_jobs = db.query(models.JobPosting).filter(
-        models.JobPosting.hr_id == hr_id,
-        models.JobPosting.status == "Active"
-    ).count()
-
-    total_applicants = db.query(models.Application).filter(
-        models.Application.job_id.in_(hr_job_ids_subquery)
-    ).count()
+    return response_cache.cached_response(
+        request, "hr/dashboard/kpis", hr_id,
+        [response_cache.hr_dashboard_scope(hr_id)], lambda: _build_hr_dashboard_kpis(db, hr_id)
+    )
 
-    new_applicants_weekly = db.query(models.Application).filter(
-        models.Application.job_id.in_(hr_job_ids_subquery),
-        models.Application.applied_on >= one_week_ago
-    ).count()
+def _build_hr_dashboard_kpis(db: Session, hr_id: int) -> schemas.DashboardKPIs:
+    # Reads the pre-aggregated job_counters (see counters.py) instead of counting applications.
+    totals = counters.hr_counters_query(db).filter(models.JobPosting.hr_id == hr_id).first()
 
-    pending_analyses = db.query(models.Analysis).filter(
-        models.Analysis.job_id.in_(hr_job_ids_subquery),
-        models.Analysis.analysis_status.in_(["Pending", "Failed"])
-    ).count()
+    active_jobs = totals.active_jobs if totals else 0
+    total_applicants = totals.total_applicants if totals else 0
+    new_applicants_weekly = totals.new_applicants_7d if totals else 0
+    pending_analyses = (totals.pending_analyses + totals.failed_analyses) if totals else 0
 
     return schemas.DashboardKPIs(
         active_jobs=active_jobs,
@@ -479,43 +485,25 @@ def get_hr_dashboard_kpis(
 
 @router.get("/dashboard/job-summaries", response_model=List[schemas.JobSummary])
 def get_hr_job_summaries(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_hr: models.Hr = Depends(auth.get_current_hr)
 ):
-    # (Unchanged)
     hr_id = current_hr.hr_id
-    one_week_ago = datetime.now() - timedelta(days=7)
-
-    total_app_sq = db.query(
-        models.Application.job_id,
-        func.count(models.Application.application_id).label("total_applicants")
-    ).group_by(models.Application.job_id).subquery()
-
-    new_app_sq = db.query(
-        models.Application.job_id,
-        func.count(models.Application.application_id).label("new_applicants")
-    ).filter(
-        models.Application.applied_on >= one_week_ago
-    ).group_by(models.Application.job_id).subquery()
-
-    pending_an_sq = db.query(
-        models.Analysis.job_id,
-        func.count(models.Analysis.reportid).label("pending_analyses")
-    ).filter(
-        models.Analysis.analysis_status.in_(["Pending", "Failed"])
-    ).group_by(models.Analysis.job_id).subquery()
+    return response_cache.cached_response(
+        request, "hr/dashboard/job-summaries", hr_id,
+        [response_cache.hr_dashboard_scope(hr_id)], lambda: _build_hr_job_summaries(db, hr_id)
+    )
 
+def _build_hr_job_summaries(db: Session, hr_id: int) -> List[schemas.JobSummary]:
+    # One row per job from job_counters (see counters.py); no scan of application/analysis_report.
     jobs_with_counts = db.query(
         models.JobPosting,
-        func.coalesce(total_app_sq.c.total_applicants, 0).label("total_applicants"),
-        func.coalesce(new_app_sq.c.new_applicants, 0).label("new_applicants"),
-        func.coalesce(pending_an_sq.c.pending_analyses, 0).label("pending_analyses")
-    ).outerjoin(
-        total_app_sq, models.JobPosting.job_id == total_app_sq.c.job_id
-    ).outerjoin(
-        new_app_sq, models.JobPosting.job_id == new_app_sq.c.job_id
+        func.coalesce(models.JobCounters.total_applicants, 0).label("total_applicants"),
+        func.coalesce(models.JobCounters.new_applicants_7d, 0).label("new_applicants"),
+        func.coalesce(models.JobCounters.pending_analyses + models.JobCounters.failed_analyses, 0).label("pending_analyses")
     ).outerjoin(
-        pending_an_sq, models.JobPosting.job_id == pending_an_sq.c.job_id
+        models.JobCounters, models.JobPosting.job_id == models.JobCounters.job_id
     ).filter(
         models.JobPosting.hr_id == hr_id
     ).order_by(
@@ -539,53 +527,22 @@ def get_hr_job_summaries(
 
 @router.get("/dashboard/applicant-volume", response_model=List[schemas.ApplicantVolumeData])
 def get_hr_applicant_volume(
-    db: Session = Depends(get_db),
+    request: Request,
+    date_range: counters.DateRangeParams = Depends(),
+    db: Session = Depends(get_read_db),
     current_hr: models.Hr = Depends(auth.get_current_hr)
 ):
-    # (Unchanged)
-    from typing import Any
-    
+    """
+    Daily applicant counts for the HR's jobs over the requested range (default: last 14 days),
+    read from daily_application_rollup.
+    """
     hr_id = current_hr.hr_id
-    fourteen_days_ago = date.today() - timedelta(days=13) 
 
-    hr_job_ids_subquery = get_hr_job_ids_subquery(hr_id, db)
+    def build_volume():
+        volume = counters.applicant_volume(db, date_range.start_date, date_range.end_date, hr_id=hr_id)
+        return [schemas.ApplicantVolumeData(date=day, count=count) for day, count in volume]
 
-    volume = db.query(
-        func.date(models.Application.applied_on).label("date"),
-        func.count(models.Application.application_id).label("count")
-    ).filter(
-        models.Application.job_id.in_(hr_job_ids_subquery),
-        func.date(models.Application.applied_on) >= fourteen_days_ago
-    ).group_by(
-        func.date(models.Application.applied_on)
-    ).order_by(
-        func.date(models.Application.applied_on)
-    ).all()
-
-    date_map: dict[date, int] = {}
-    for item in volume:
-        raw_count: Any = item.count
-        
-        try:
-            if raw_count is None:
-                final_count = 0
-            elif callable(raw_count):
-                final_count = 0
-            else:
-                final_count = int(raw_count)
-        except (TypeError, ValueError):
-            final_count = 0
-        
-        date_map[item.date] = final_count
-
-    chart_data: list[schemas.ApplicantVolumeData] = []
-    for i in range(14):
-        current_date = fourteen_days_ago + timedelta(days=i)
-        daily_count = date_map.get(current_date, 0)
-        
-        chart_data.append(schemas.ApplicantVolumeData(
-            date=current_date,
-            count=daily_count
-        ))
-
-    return chart_data
\ No newline at end of file
+    return response_cache.cached_response(
+        request, "hr/dashboard/applicant-volume", hr_id,
+        [response_cache.hr_dashboard_scope(hr_id)], build_volume
+    )
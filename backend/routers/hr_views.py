@@ -1,10 +1,16 @@
 # In hr_views.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session, joinedload 
-from typing import List
-from database import get_db
-import models, schemas
+from typing import List, Optional
+from database import get_read_db
+from config import settings
+from pagination import PageParams, paginate
+import fieldsets
+import exports
+import models, schemas, auth
+import rankings
+import response_cache
 
 router = APIRouter(prefix="/hr-views", tags=["HR Views"])
 
@@ -13,12 +19,16 @@ router = APIRouter(prefix="/hr-views", tags=["HR Views"])
 @router.get("/jobs/{job_id}/rankings", response_model=schemas.JobRankingsResponse)
 def get_job_rankings(
     job_id: int,
-    db: Session = Depends(get_db)
+    response: Response,
+    filters: rankings.RankingFilters = Depends(),
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db)
     # TODO: 
 ):
     """
-    Get ranked applicants for a specific job.
-    Ranking is calculated on-the-fly from the overall_score in the Analysis table.
+    Get ranked applicants for a specific job, best first, one page at a time.
+    Ranks come from RANK()/PERCENT_RANK() over the job-weighted score in SQL (see rankings.py);
+    filters (top_k, status, min_score, min_<component>) narrow the rows without changing ranks.
     """
     
     # 1. Check if job exists
@@ -26,26 +36,15 @@ def get_job_rankings(
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    # 2. Query, Join, Filter, and Order!
-    ranked_results = db.query(
-        models.Analysis,
-        models.Candidates,
-        models.Application
-    ).join(
-        models.Application, models.Analysis.application_id == models.Application.application_id
-    ).join(
-        models.Candidates, models.Application.candid == models.Candidates.candid
-    ).filter(
-        models.Analysis.job_id == job_id
-    ).order_by(
-        models.Analysis.overall_score.desc().nullslast()  
-    ).all()
+    # 2. Rank, filter and page in SQL
+    total_applicants, ranked_results = rankings.get_job_rankings(db, job_id, filters, page, response)
 
     # 3. Format the response
     formatted_rankings = []
-    for rank, (analysis, candidate, application) in enumerate(ranked_results, start=1):
+    for analysis, candidate, application, rank, percentile in ranked_results:
         formatted_rankings.append({
-            "rank": rank, # The rank is calculated here
+            "rank": rank,
+            "percentile": round(float(percentile), 4) if percentile is not None else None,
             "application_id": application.application_id,
             "candidate_name": f"{candidate.firstname} {candidate.lastname}",
             "candidate_email": candidate.email,
@@ -56,27 +55,120 @@ def get_job_rankings(
             "jd_match_score": analysis.jd_match_score, 
             "leetcodescore": analysis.leetcodescore,   
             "linkedinscore": analysis.linkedinscore,
+            "weighted_score": analysis.weighted_score,
             "applied_on": application.applied_on,
             "analysis_status": analysis.analysis_status
         })
 
     return {
         "job_id": job_id,
-        "total_applicants": len(formatted_rankings),
+        "total_applicants": total_applicants,
         "rankings": formatted_rankings
     }
 
+# --- WHAT-IF RE-RANKING WITH CUSTOM WEIGHTS ---
+@router.get("/jobs/{job_id}/rankings/what-if", response_model=schemas.WhatIfRankingsResponse)
+def get_what_if_rankings(
+    job_id: int,
+    request: Request,
+    weights: rankings.ScoreWeights = Depends(),
+    top_k: Optional[int] = Query(None, ge=1, description="Only return applicants ranked in the top K under these weights."),
+    db: Session = Depends(get_read_db),
+    current_hr: models.Hr = Depends(auth.get_current_hr)
+):
+    """
+    Re-ranks the applicants of one of the HR's jobs with custom component weights
+    (w_<component>, default 1.0), using the stored component scores only; nothing is re-analyzed.
+    Results are cached per (job, weight vector) until an analysis for the job changes,
+    so moving a slider back to a previous position is served from the cache
+    (only after the ownership check, so the job's owner is the only one served from it).
+    """
+    job = db.query(models.JobPosting.job_id, models.JobPosting.hr_id).filter(models.JobPosting.job_id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.hr_id != current_hr.hr_id:
+        raise HTTPException(status_code=403, detail="You can only re-rank applicants of your own jobs.")
+
+    def build_rankings():
+        rows = rankings.get_what_if_rankings(db, job_id, weights.weights, top_k)
+        total_applicants = rankings.job_total(db, job_id) if top_k is not None else len(rows)
+        return {
+            "job_id": job_id,
+            "weights": weights.weights,
+            "total_applicants": total_applicants,
+            "rankings": [
+                {
+                    "rank": rank,
+                    "baseline_rank": baseline_rank,
+                    "rank_change": baseline_rank - rank,
+                    "weighted_score": round(float(weighted_score), 2) if weighted_score is not None else None,
+                    "application_id": application.application_id,
+                    "candidate_name": f"{candidate.firstname} {candidate.lastname}",
+                    "candidate_email": candidate.email,
+                    "overall_score": analysis.overall_score,
+                    "careerscore": analysis.careerscore,
+                    "githubscore": analysis.githubscore,
+                    "trustscore": analysis.trustscore,
+                    "jd_match_score": analysis.jd_match_score,
+                    "leetcodescore": analysis.leetcodescore,
+                    "linkedinscore": analysis.linkedinscore,
+                    "applied_on": application.applied_on,
+                    "analysis_status": analysis.analysis_status
+                }
+                for analysis, candidate, application, weighted_score, rank, baseline_rank in rows
+            ]
+        }
+
+    return response_cache.cached_response(
+        request, "hr-views/what-if", f"{job_id}:{weights.cache_key()}:{top_k}",
+        [response_cache.job_rankings_scope(job_id)], build_rankings,
+        ttl_s=settings.WHAT_IF_CACHE_TTL_SECONDS
+    )
+
+# --- STREAMING EXPORT OF RANKINGS ---
+@router.get("/jobs/{job_id}/rankings/export")
+def export_job_rankings(
+    job_id: int,
+    filters: rankings.RankingFilters = Depends(),
+    export: exports.ExportParams = Depends(),
+    db: Session = Depends(get_read_db),
+    current_user = Depends(auth.get_current_hr_or_admin)
+):
+    """
+    Streams the full ranking of a job (same ranks and filters as /rankings) as NDJSON,
+    CSV or Parquet. HR users can export their own jobs; admins any job.
+    """
+    job = db.query(models.JobPosting.job_id, models.JobPosting.hr_id).filter(models.JobPosting.job_id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if isinstance(current_user, models.Hr) and job.hr_id != current_user.hr_id:
+        raise HTTPException(status_code=403, detail="You can only export rankings of your own jobs.")
+
+    return exports.export_response(
+        export,
+        lambda session: rankings.export_rankings_query(session, job_id, filters),
+        rankings.EXPORT_COLUMNS,
+        f"job_{job_id}_rankings"
+    )
+
 @router.get("/candidates/scores", response_model=List[schemas.AnalysisRead])
-def list_candidates_scores(db: Session = Depends(get_db)):
+def list_candidates_scores(
+    response: Response,
+    page: PageParams = Depends(),
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
     """
-    Returns a list of candidates with their analysis scores.
-    Useful for HR to quickly see performance summary.
+    Returns a page of candidates with their analysis scores.
+    Useful for HR to quickly see performance summary; pass `fields=` to fetch only the score columns.
     """
-    candidates_scores = db.query(models.Analysis).all()
-    return candidates_scores
+    selected = fieldsets.parse_fields(fields, schemas.AnalysisRead)
+    query = db.query(models.Analysis).options(*fieldsets.load_options(models.Analysis, selected))
+    candidates_scores = paginate(query, page, response, sort_columns=[models.Analysis.reportid])
+    return fieldsets.sparse_response(candidates_scores, schemas.AnalysisRead, selected, response)
 
 @router.get("/candidate/{candid}", response_model=schemas.CandidateRead)
-def get_candidate_full_details(candid: int, db: Session = Depends(get_db)):
+def get_candidate_full_details(candid: int, db: Session = Depends(get_read_db)):
     """
     Returns full candidate details by candidate ID.
     Called when HR wants to view complete profile.
@@ -87,7 +179,7 @@ def get_candidate_full_details(candid: int, db: Session = Depends(get_db)):
     return candidate
 
 @router.get("/candidate/{candid}/score", response_model=schemas.AnalysisRead)
-def get_candidate_score(candid: int, db: Session = Depends(get_db)):
+def get_candidate_score(candid: int, db: Session = Depends(get_read_db)):
     """
     Returns analysis/score of a single candidate.
     """
@@ -1,54 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List,Optional
-from database import get_db
+from database import get_async_db, get_async_read_db
+from pagination import PageParams, paginate_async
 import models, schemas
+import auth
+import rankings
 
+# Job board routes are I/O-bound and polled a lot: they run on the event loop with async sessions.
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 
+async def _get_job_or_404(db: AsyncSession, job_id: int) -> models.JobPosting:
+    job = await db.get(models.JobPosting, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 # Create job
 @router.post("/", response_model=schemas.JobPostingRead)
-def create_job(job: schemas.JobPostingCreate, db: Session = Depends(get_db)):
+async def create_job(job: schemas.JobPostingCreate, db: AsyncSession = Depends(get_async_db)):
     new_job = models.JobPosting(**job.dict())
     db.add(new_job)
-    db.commit()
-    db.refresh(new_job)
+    await db.commit()
+    await db.refresh(new_job)
     return new_job
 
 # Get jobs 
 @router.get("/", response_model=List[schemas.JobPostingRead])
-def get_jobs(hr_id: Optional[int] = None, db: Session = Depends(get_db)):
-    query = db.query(models.JobPosting)
+async def get_jobs(response: Response, hr_id: Optional[int] = None, page: PageParams = Depends(), db: AsyncSession = Depends(get_async_read_db)):
+    stmt = select(models.JobPosting)
     if hr_id:
-        query = query.filter(models.JobPosting.hr_id == hr_id)
-    return query.all()
+        stmt = stmt.where(models.JobPosting.hr_id == hr_id)
+    return await paginate_async(db, stmt, page, response, sort_columns=[models.JobPosting.job_id])
 
 # Get job by ID
 @router.get("/{job_id}", response_model=schemas.JobPostingRead)
-def get_job(job_id: int, db: Session = Depends(get_db)):
-    job = db.query(models.JobPosting).filter(models.JobPosting.job_id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    return job
+async def get_job(job_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    return await _get_job_or_404(db, job_id)
 
 # Update job
 @router.put("/{job_id}", response_model=schemas.JobPostingRead)
-def update_job(job_id: int, job: schemas.JobPostingCreate, db: Session = Depends(get_db)):
-    db_job = db.query(models.JobPosting).filter(models.JobPosting.job_id == job_id).first()
-    if not db_job:
-        raise HTTPException(status_code=404, detail="Job not found")
+async def update_job(job_id: int, job: schemas.JobPostingCreate, db: AsyncSession = Depends(get_async_db)):
+    db_job = await _get_job_or_404(db, job_id)
     for key, value in job.dict(exclude_unset=True).items():
         setattr(db_job, key, value)
-    db.commit()
-    db.refresh(db_job)
+    await db.commit()
+    await db.refresh(db_job)
+    return db_job
+
+# Update scoring weights
+@router.put("/{job_id}/scoring-weights", response_model=schemas.JobPostingRead)
+async def update_job_scoring_weights(
+    job_id: int,
+    weights: schemas.JobScoringWeights,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_hr: models.Hr = Depends(auth.get_current_hr)
+):
+    """
+    Saves the per-component scoring weights of one of the HR's jobs and rescores every
+    applicant with one UPDATE; rankings reflect the change immediately, without re-analysis.
+    """
+    db_job = await _get_job_or_404(db, job_id)
+    if db_job.hr_id != current_hr.hr_id:
+        raise HTTPException(status_code=403, detail="You can only change the scoring weights of your own jobs.")
+    for key, value in weights.dict().items():
+        setattr(db_job, key, value)
+    await db.run_sync(rankings.apply_job_weights, db_job)
+    await db.commit()
+    await db.refresh(db_job)
+    background_tasks.add_task(rankings.refresh_job_ranks_safely, job_id)
     return db_job
 
 # Delete job
 @router.delete("/{job_id}")
-def delete_job(job_id: int, db: Session = Depends(get_db)):
-    db_job = db.query(models.JobPosting).filter(models.JobPosting.job_id == job_id).first()
-    if not db_job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    db.delete(db_job)
-    db.commit()
+async def delete_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_job = await _get_job_or_404(db, job_id)
+    await db.delete(db_job)
+    await db.commit()
     return {"detail": "Job deleted"}
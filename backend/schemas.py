@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Dict
 from datetime import datetime, date
 
 
@@ -184,10 +184,25 @@ class JobPostingRead(BaseModel):
     analyze_github: bool
     analyze_leetcode: bool
     analyze_linkedin: bool
+    weight_careerscore: float = 1.0
+    weight_jd_match_score: float = 1.0
+    weight_githubscore: float = 1.0
+    weight_leetcodescore: float = 1.0
+    weight_linkedinscore: float = 1.0
+    weight_trustscore: float = 1.0
 
     class Config:
         from_attributes = True
 
+# --- Per-job scoring weights (applied at ranking time, see rankings.py) ---
+class JobScoringWeights(BaseModel):
+    weight_careerscore: float = Field(1.0, ge=0, le=10)
+    weight_jd_match_score: float = Field(1.0, ge=0, le=10)
+    weight_githubscore: float = Field(1.0, ge=0, le=10)
+    weight_leetcodescore: float = Field(1.0, ge=0, le=10)
+    weight_linkedinscore: float = Field(1.0, ge=0, le=10)
+    weight_trustscore: float = Field(1.0, ge=0, le=10)
+
 class JobSimple(BaseModel):
     job_id: int
     title: str
@@ -285,6 +300,7 @@ class FeedbackRead(BaseModel):
 # --- Schemas for Job Ranking Response ---
 class RankedApplicant(BaseModel):
     rank: int
+    percentile: Optional[float] = None
     application_id: int
     candidate_name: str
     candidate_email: EmailStr
@@ -295,6 +311,7 @@ class RankedApplicant(BaseModel):
     jd_match_score: Optional[int]
     leetcodescore: Optional[int]
     linkedinscore: Optional[int]
+    weighted_score: Optional[float] = None
 
     applied_on: datetime
     analysis_status: str
@@ -310,6 +327,17 @@ class JobRankingsResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class WhatIfRankedApplicant(RankedApplicant):
+    weighted_score: Optional[float]
+    baseline_rank: int
+    rank_change: int  # Positive = moved up compared to the overall_score ranking
+
+class WhatIfRankingsResponse(BaseModel):
+    job_id: int
+    weights: Dict[str, float]
+    total_applicants: int
+    rankings: List[WhatIfRankedApplicant]
+
 
 # =============================================================================
 # 4. AI Service Schemas (For processing raw AI output)
@@ -1,11 +1,99 @@
 # security.py
 
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+from config import settings
+
+T = TypeVar("T")
+
+# Argon2id parameters come from settings (calibrate them with benchmarks/argon2_calibration.py).
+# Hashes made with other parameters still verify and are upgraded on the next login,
+# unless that would lower their memory or time cost.
+ARGON2_COST = re.compile(r"\$m=(\d+),t=(\d+),p=(\d+)\$")
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+
+class HashingPool:
+    """
+    Dedicated, bounded executor for Argon2 work.
+
+    At most `workers` hashes run at once (capping CPU and the memory_cost per
+    hash), and at most `max_queue` more wait for a worker. Further callers get
+    an immediate 503 instead of piling up in the request threadpool, so a
+    login burst cannot starve every other endpoint.
+    """
+
+    def __init__(self, workers: int, max_queue: int, timeout_s: float):
+        self.timeout_s = timeout_s
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="argon2")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+
+    def run(self, fn: Callable[..., T], *args) -> T:
+        if not self._slots.acquire(blocking=False):
+            raise _overloaded()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the work itself is done, even if the caller gave up waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout_s)
+        except FutureTimeoutError:
+            future.cancel()
+            raise _overloaded()
+
+
+def _overloaded() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="The server is busy processing sign-ins. Please try again in a moment.",
+        headers={"Retry-After": "1"},
+    )
+
+
+hashing_pool = HashingPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    timeout_s=settings.PASSWORD_HASH_TIMEOUT_SECONDS,
+)
+
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies a password and, if its hash uses outdated parameters, returns a
+    new hash to store (else None). Use on login so hashes follow the settings.
+    A hash with a higher memory or time cost than the settings is kept as is.
+    """
+    verified, new_hash = hashing_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+    if new_hash is not None and _is_stronger_than_settings(hashed_password):
+        new_hash = None
+    return verified, new_hash
+
+def _is_stronger_than_settings(hashed_password: str) -> bool:
+    match = ARGON2_COST.search(hashed_password or "")
+    if match is None:
+        return False  # Not Argon2 (or unreadable): upgrade it
+    memory_cost, time_cost = int(match.group(1)), int(match.group(2))
+    return memory_cost > settings.ARGON2_MEMORY_COST or time_cost > settings.ARGON2_TIME_COST
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
\ No newline at end of file
+    return hashing_pool.run(pwd_context.hash, password)
@@ -0,0 +1,61 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Mapping, Optional, Type
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+from pagination import NEXT_CURSOR_HEADER
+
+# Response class for the whole app (see main.py): FastAPI still validates
+# response_model as usual, but the final encoding is done by orjson.
+DefaultResponse = ORJSONResponse
+
+
+@lru_cache(maxsize=128)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """One TypeAdapter(List[schema]) per schema, built once and reused."""
+    return TypeAdapter(List[schema])
+
+
+def _headers(response: Optional[Response]) -> dict:
+    # The endpoint's own Response is bypassed when another one is returned, so carry the pagination cursor over.
+    if response is not None and NEXT_CURSOR_HEADER in response.headers:
+        return {NEXT_CURSOR_HEADER: response.headers[NEXT_CURSOR_HEADER]}
+    return {}
+
+
+def validate_list(schema: Type[BaseModel], rows: Iterable[Any]) -> List[BaseModel]:
+    """
+    Validates ORM rows (or dicts) into `schema` models in one call to
+    pydantic-core, instead of one `schema.model_validate(row)` per row.
+    """
+    return list_adapter(schema).validate_python(list(rows), from_attributes=True)
+
+
+def list_response(
+    schema: Type[BaseModel],
+    rows: Iterable[Any],
+    response: Optional[Response] = None,
+    validated: bool = False
+) -> Response:
+    """
+    Validates `rows` against `schema` in bulk (unless they are `validated`
+    models already) and renders them to JSON with pydantic-core. Returning this
+    Response skips FastAPI's second validation and encoding of the endpoint's
+    response_model, which is kept for the docs.
+    """
+    adapter = list_adapter(schema)
+    body = adapter.dump_json(rows if validated else validate_list(schema, rows))
+    return Response(content=body, media_type="application/json", headers=_headers(response))
+
+
+def trusted_response(rows: Iterable[Mapping[str, Any]], response: Optional[Response] = None) -> Response:
+    """
+    Renders rows that are already plain JSON-compatible mappings (e.g. the
+    `_mapping` of column-only query rows) straight with orjson, without any
+    validation. Only for data read from our own database columns.
+    """
+    body = orjson.dumps([dict(row) for row in rows], option=orjson.OPT_NON_STR_KEYS)
+    return Response(content=body, media_type="application/json", headers=_headers(response))
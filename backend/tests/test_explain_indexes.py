@@ -0,0 +1,38 @@
+# tests/test_explain_indexes.py
+"""
+Fails when a hot query path stops using its index (see benchmarks/explain_indexes.py,
+which seeds the data inside a transaction that is rolled back afterwards).
+"""
+import pytest
+
+
+@pytest.fixture(scope="module")
+def seeded(db_engine):
+    from benchmarks import explain_indexes
+
+    with db_engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            ids = explain_indexes.seed(conn, scale=1)
+            yield conn, ids
+        finally:
+            transaction.rollback()
+
+
+def test_no_invalid_indexes(seeded):
+    from benchmarks import explain_indexes
+
+    conn, _ = seeded
+    assert explain_indexes.invalid_indexes(conn) == []
+
+
+def test_hot_queries_use_their_indexes(seeded):
+    from benchmarks import explain_indexes
+
+    conn, ids = seeded
+    failures = []
+    for description, statement, expected_index in explain_indexes.hot_queries(ids):
+        ok, _, used = explain_indexes.uses_index(conn, statement, expected_index)
+        if not ok:
+            failures.append(f"{description}: expected {expected_index}, plan uses {sorted(used) or 'no index'}")
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,72 @@
+# tests/test_query_budget.py
+"""
+Query budgets for hot endpoints: catches N+1 regressions, e.g. a list endpoint that
+lazy-loads one relationship per row, or a follow-up COUNT after loading a row.
+Budgets include the auth lookup (the principal cache is off in the `client` fixture).
+HR/admin endpoints are covered by benchmarks/query_budget.py.
+"""
+import pytest
+
+
+def test_job_list_budget(query_budget):
+    response = query_budget(1)("/jobs/")
+    assert response.status_code == 200
+
+
+def test_job_detail_budget(db_engine, query_budget):
+    from sqlalchemy import text
+
+    with db_engine.connect() as conn:
+        job_id = conn.execute(text("SELECT job_id FROM job_posting ORDER BY job_id LIMIT 1")).scalar()
+    if job_id is None:
+        pytest.skip("No job postings in the database")
+    response = query_budget(1)(f"/jobs/{job_id}")
+    assert response.status_code == 200
+
+
+def test_query_budget_exceeded(db_engine):
+    from sqlalchemy import text
+
+    import query_stats
+
+    with pytest.raises(query_stats.QueryBudgetExceeded):
+        with query_stats.query_budget(1), db_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+
+# The candidate's profile is loaded together with its application count: no COUNT afterwards.
+
+def test_candidate_me_budget(query_budget, candidate_headers):
+    # Auth lookup + profile with count
+    response = query_budget(2)("/candidates/me", headers=candidate_headers)
+    assert response.status_code == 200
+    assert response.json()["applications_count"] == 0
+
+
+def test_candidate_profile_update_budget(query_budget, candidate_headers):
+    # Auth lookup + UPDATE + profile with count
+    response = query_budget(3)(
+        "/candidates/profile", "PUT", json={"current_title": "Engineer"}, headers=candidate_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["current_title"] == "Engineer"
+
+
+PDF = b"%PDF-1.4\n%query budget test\n"
+
+
+def test_candidate_resume_upload_budget(query_budget, candidate_headers):
+    response = query_budget(3)(
+        "/candidates/upload-resume", "POST",
+        files={"file": ("resume.pdf", PDF, "application/pdf")}, headers=candidate_headers
+    )
+    assert response.status_code == 200
+
+
+def test_candidate_linkedin_upload_budget(query_budget, candidate_headers):
+    response = query_budget(3)(
+        "/candidates/upload-linkedin-pdf", "POST",
+        files={"file": ("linkedin.pdf", PDF, "application/pdf")}, headers=candidate_headers
+    )
+    assert response.status_code == 200
@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import os
+import tempfile
+from typing import BinaryIO, NamedTuple, Optional, Sequence
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DOC = "application/msword"
+
+CONTENT_TYPES = {".pdf": PDF, ".docx": DOCX, ".doc": DOC}
+CV_EXTENSIONS = (".pdf", ".docx")
+
+# (leading bytes, content type). DOCX is a ZIP container; DOC is an OLE2 compound file.
+SIGNATURES = [
+    (b"%PDF-", PDF),
+    (b"PK\x03\x04", DOCX),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", DOC),
+]
+
+
+class StoredUpload(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+    content_type: str
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Content type from the file's leading bytes, or None if it is none of the accepted formats."""
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. The maximum size is {max_bytes // (1024 * 1024)} MB."
+    )
+
+
+def _store(source: BinaryIO, destination: str, expected_type: str, max_bytes: int) -> StoredUpload:
+    directory = os.path.dirname(destination) or "."
+    os.makedirs(directory, exist_ok=True)
+    # Same directory as the destination, so the final rename is atomic
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(handle, "wb") as out:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if size == 0 and sniff_content_type(chunk) != expected_type:
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail="The file content does not match its extension."
+                    )
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+            if size == 0:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The uploaded file is empty.")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_path, destination)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return StoredUpload(destination, size, digest.hexdigest(), expected_type)
+
+
+def store_upload(
+    file: UploadFile,
+    destination: str,
+    allowed_extensions: Sequence[str] = CV_EXTENSIONS,
+    max_bytes: Optional[int] = None
+) -> StoredUpload:
+    """
+    Saves an uploaded file to `destination` in CHUNK_SIZE pieces, so memory use
+    does not depend on the file size. For sync routes (already in the threadpool);
+    async routes use `save_upload`.
+
+    The extension must be one of `allowed_extensions` (400) and the leading bytes
+    must match it (415); anything over `max_bytes` (default MAX_UPLOAD_BYTES) is
+    rejected with a 413 as soon as it is known. The file is written to a
+    temporary name and renamed into place once complete, so `destination` never
+    holds a partial file. Closes the upload.
+    """
+    max_bytes = settings.MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    try:
+        extension = os.path.splitext(file.filename or "")[1].lower()
+        if extension not in allowed_extensions:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
+            )
+        # Starlette knows the size once the multipart body is spooled: reject before copying anything
+        if file.size is not None and file.size > max_bytes:
+            raise _too_large(max_bytes)
+        stored = _store(file.file, destination, CONTENT_TYPES[extension], max_bytes)
+    finally:
+        file.file.close()
+    logger.info(f"Stored upload {stored.path} ({stored.size} bytes, sha256 {stored.sha256})")
+    return stored
+
+
+async def save_upload(
+    file: UploadFile,
+    destination: str,
+    allowed_extensions: Sequence[str] = CV_EXTENSIONS,
+    max_bytes: Optional[int] = None
+) -> StoredUpload:
+    """`store_upload` for async routes: the copy runs in the threadpool, off the event loop."""
+    return await run_in_threadpool(store_upload, file, destination, allowed_extensions, max_bytes)
+
+
+def safe_filename(filename: Optional[str]) -> str:
+    """The client's file name without any directory part (which could point outside the upload folder)."""
+    return os.path.basename((filename or "").replace("\\", "/"))
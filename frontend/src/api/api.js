@@ -44,6 +44,40 @@ AdminAPI.interceptors.request.use((config) => {
 }, (error) => Promise.reject(error));
 
 
+// --- Read replicas ---
+// Read-your-writes with read replicas: after a write the backend returns X-Read-Primary-Until;
+// sending it back until then makes reads go to the primary, so the change is visible right away.
+let readPrimaryUntil = 0;
+[API, CandidateAPI, HrAPI, AdminAPI].forEach((client) => {
+  client.interceptors.request.use((config) => {
+    if (readPrimaryUntil * 1000 > Date.now()) {
+      config.headers["X-Read-Primary-Until"] = readPrimaryUntil;
+    }
+    return config;
+  });
+  client.interceptors.response.use((res) => {
+    const until = parseFloat(res.headers["x-read-primary-until"]);
+    if (until > readPrimaryUntil) readPrimaryUntil = until;
+    return res;
+  });
+});
+
+
+// --- Keyset pagination ---
+// Paginated list endpoints return one page as an array and put the cursor for the
+// next page in the "X-Next-Cursor" response header (absent on the last page).
+const fetchAllPages = async (client, url, params = {}) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const res = await client.get(url, { params: { ...params, limit: 500, ...(cursor ? { cursor } : {}) } });
+    items.push(...res.data);
+    cursor = res.headers["x-next-cursor"];
+  } while (cursor);
+  return items;
+};
+
+
 // ========================================================
 // PUBLIC / AUTH Endpoints (Use base API)
 // ========================================================
@@ -78,7 +112,23 @@ export const getMyFeedback = () => CandidateAPI.get("/candidates/my-feedback").t
 export const getHrMe = () => HrAPI.get(`/hr/me`).then(res => res.data);
 export const getJobsByHr = (hr_id) => HrAPI.get(`/hr/${hr_id}/jobs`).then(res => res.data);
 export const createJob = (jobData) => HrAPI.post("/jobs/", jobData).then(res => res.data);
-export const getRankedApplicantsForJob = (job_id) => HrAPI.get(`/hr-views/jobs/${job_id}/rankings`).then(res => res.data);
+export const updateJobScoringWeights = (job_id, weights) => HrAPI.put(`/jobs/${job_id}/scoring-weights`, weights).then(res => res.data);
+export const getRankedApplicantsForJob = async (job_id) => {
+  const url = `/hr-views/jobs/${job_id}/rankings`;
+  let res = await HrAPI.get(url, { params: { limit: 500 } });
+  const data = { ...res.data, rankings: [...res.data.rankings] };
+  while (res.headers["x-next-cursor"]) {
+    res = await HrAPI.get(url, { params: { limit: 500, cursor: res.headers["x-next-cursor"] } });
+    data.rankings.push(...res.data.rankings);
+  }
+  return data;
+};
+// weights: { githubscore: 2, leetcodescore: 0, ... } -> w_githubscore=2&w_leetcodescore=0
+export const getWhatIfRankings = (job_id, weights = {}, top_k) => {
+  const params = Object.fromEntries(Object.entries(weights).map(([component, weight]) => [`w_${component}`, weight]));
+  if (top_k) params.top_k = top_k;
+  return HrAPI.get(`/hr-views/jobs/${job_id}/rankings/what-if`, { params }).then(res => res.data);
+};
 export const getDashboardKpis = () => HrAPI.get('/hr/dashboard/kpis').then(res => res.data);
 export const getDashboardJobSummaries = () => HrAPI.get('/hr/dashboard/job-summaries').then(res => res.data);
 export const getDashboardApplicantVolume = () => HrAPI.get('/hr/dashboard/applicant-volume').then(res => res.data);
@@ -112,12 +162,12 @@ export const getAdminHrActivity = () => AdminAPI.get("/admin-dashboard/hr-activi
 
 // HR Management
 export const createHr = (hrData) => AdminAPI.post("/hr/", hrData).then(res => res.data);
-export const getAllHrUsers = () => AdminAPI.get("/api/admin/hr").then(res => res.data);
+export const getAllHrUsers = () => fetchAllPages(AdminAPI, "/api/admin/hr");
 export const suspendHr = (hrId) => AdminAPI.post(`/api/admin/hr/${hrId}/suspend`).then(res => res.data);
 export const activateHr = (hrId) => AdminAPI.post(`/api/admin/hr/${hrId}/activate`).then(res => res.data);
 export const deleteHr = (hrId) => AdminAPI.delete(`/api/admin/hr/${hrId}`).then(res => res.data);
 // Candidate Management
-export const getAllCandidates = () => AdminAPI.get("/api/admin/candidates").then(res => res.data);
+export const getAllCandidates = () => fetchAllPages(AdminAPI, "/api/admin/candidates");
 export const suspendCandidate = (candidateId) => AdminAPI.post(`/api/admin/candidates/${candidateId}/suspend`).then(res => res.data);
 export const activateCandidate = (candidateId) => AdminAPI.post(`/api/admin/candidates/${candidateId}/activate`).then(res => res.data);
 export const deleteCandidate = (candidateId) => AdminAPI.delete(`/api/admin/candidates/${candidateId}`).then(res => res.data);
@@ -132,4 +182,4 @@ export const getSystemLogs = () => AdminAPI.get("/api/admin/system-logs").then(r
 // ========================================================
 // PUBLIC Endpoints (No token needed)
 // ========================================================
-export const getJobs = () => API.get("/jobs/").then(res => res.data);
\ No newline at end of file
+export const getJobs = () => fetchAllPages(API, "/jobs/");
\ No newline at end of file